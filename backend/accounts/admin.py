@@ -3,7 +3,7 @@ Configuration de l'interface d'administration
 """
 from django.contrib import admin
 from django.contrib.auth.admin import UserAdmin as BaseUserAdmin
-from .models import User, Stagiaire, Entreprise
+from .models import User, Stagiaire, Entreprise, RevokedToken, Ville, Domaine, SecteurActivite
 
 
 @admin.register(User)
@@ -18,7 +18,7 @@ class UserAdmin(BaseUserAdmin):
         (None, {'fields': ('email', 'password')}),
         ('Informations', {'fields': ('role',)}),
         ('Permissions', {'fields': ('is_active', 'is_staff', 'is_superuser')}),
-        ('Dates importantes', {'fields': ('last_login', 'date_joined')}),
+        ('Dates importantes', {'fields': ('last_login', 'date_joined', 'tokens_revoked_at')}),
     )
     
     add_fieldsets = (
@@ -36,7 +36,7 @@ class StagiaireAdmin(admin.ModelAdmin):
     list_filter = ['niveau_etude', 'ville', 'date_creation']
     search_fields = ['nom', 'prenom', 'telephone', 'domaine']
     ordering = ['-date_creation']
-    readonly_fields = ['date_creation', 'date_modification']
+    readonly_fields = ['date_creation', 'date_modification', 'cv_sha256']
     
     fieldsets = (
         ('Utilisateur', {'fields': ('user',)}),
@@ -45,7 +45,7 @@ class StagiaireAdmin(admin.ModelAdmin):
         }),
         ('Adresse', {'fields': ('adresse', 'ville')}),
         ('Formation', {'fields': ('niveau_etude', 'domaine')}),
-        ('CV', {'fields': ('cv_file',)}),
+        ('CV', {'fields': ('cv_file', 'cv_sha256')}),
         ('Dates', {'fields': ('date_creation', 'date_modification')}),
     )
 
@@ -70,3 +70,22 @@ class EntrepriseAdmin(admin.ModelAdmin):
         }),
         ('Dates', {'fields': ('date_creation', 'date_modification')}),
     )
+
+
+@admin.register(RevokedToken)
+class RevokedTokenAdmin(admin.ModelAdmin):
+    """Configuration de l'admin pour les jetons révoqués"""
+    list_display = ['jti', 'user', 'expires_at', 'created_at']
+    search_fields = ['jti', 'user__email']
+    ordering = ['-created_at']
+    readonly_fields = ['jti', 'user', 'expires_at', 'created_at']
+
+
+@admin.register(Ville, Domaine, SecteurActivite)
+class ReferenceValueAdmin(admin.ModelAdmin):
+    """Configuration de l'admin pour les valeurs de référence : déclarer une valeur alias d'une autre"""
+    list_display = ['nom', 'cle', 'alias_de']
+    list_filter = [('alias_de', admin.EmptyFieldListFilter)]
+    search_fields = ['nom', 'cle']
+    readonly_fields = ['cle']
+    raw_id_fields = ['alias_de']
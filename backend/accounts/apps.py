@@ -5,3 +5,6 @@ class AccountsConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'accounts'
     verbose_name = 'Gestion des comptes'
+    
+    def ready(self):
+        import accounts.signals  # noqa
@@ -0,0 +1,47 @@
+"""
+Authentification JWT avec résolution de l'utilisateur mise en cache
+"""
+from django.utils.translation import gettext_lazy as _
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.exceptions import AuthenticationFailed, InvalidToken
+from rest_framework_simplejwt.settings import api_settings
+from rest_framework_simplejwt.utils import get_md5_hash_password
+
+from .cache import get_cached_user
+from .models import User
+from .revocation import issued_before_revocation, revocation_store
+
+
+class CachedJWTAuthentication(JWTAuthentication):
+    """
+    Identique à JWTAuthentication, mais l'utilisateur (avec son profil
+    stagiaire ou entreprise déjà chargé) est lu dans le cache du processus :
+    une requête authentifiée courante ne fait aucune requête SQL d'authentification.
+    Les jetons révoqués (déconnexion, désactivation du compte) sont refusés.
+    """
+
+    def get_user(self, validated_token):
+        try:
+            user_id = validated_token[api_settings.USER_ID_CLAIM]
+        except KeyError:
+            raise InvalidToken(_("Token contained no recognizable user identification"))
+
+        try:
+            user = get_cached_user(user_id)
+        except User.DoesNotExist:
+            raise AuthenticationFailed(_("User not found"), code="user_not_found")
+
+        if not user.is_active:
+            raise AuthenticationFailed(_("User is inactive"), code="user_inactive")
+
+        if issued_before_revocation(validated_token, user) or \
+                revocation_store.is_revoked(validated_token[api_settings.JTI_CLAIM]):
+            raise InvalidToken("Ce jeton a été révoqué")
+
+        if api_settings.CHECK_REVOKE_TOKEN:
+            if validated_token.get(api_settings.REVOKE_TOKEN_CLAIM) != get_md5_hash_password(user.password):
+                raise AuthenticationFailed(
+                    _("The user's password has been changed."), code="password_changed"
+                )
+
+        return user
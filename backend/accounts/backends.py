@@ -0,0 +1,26 @@
+"""
+Backend d'authentification dont la vérification du mot de passe passe par le pool de hachage
+"""
+from django.contrib.auth.backends import ModelBackend
+
+from .hashing import hash_password, verify_password
+from .models import User
+
+
+class PooledModelBackend(ModelBackend):
+    """ModelBackend dont le calcul du hachage ne s'exécute pas sur le thread de la requête"""
+
+    def authenticate(self, request, username=None, password=None, **kwargs):
+        if username is None:
+            username = kwargs.get(User.USERNAME_FIELD)
+        if username is None or password is None:
+            return None
+        try:
+            user = User._default_manager.get_by_natural_key(username)
+        except User.DoesNotExist:
+            # Calculer un hachage pour ne pas révéler par le temps de réponse que le compte n'existe pas
+            hash_password(password)
+            return None
+        if verify_password(user, password) and self.user_can_authenticate(user):
+            return user
+        return None
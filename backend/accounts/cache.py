@@ -0,0 +1,81 @@
+"""
+Cache en mémoire (par processus) des utilisateurs authentifiés
+"""
+import copy
+import threading
+import time
+from collections import OrderedDict
+
+from django.conf import settings
+
+from .models import User
+
+DEFAULTS = {
+    'TTL': 60,
+    'MAX_SIZE': 10000,
+}
+
+
+def get_cache_setting(name):
+    """Lire un paramètre de settings.AUTH_USER_CACHE avec sa valeur par défaut"""
+    return getattr(settings, 'AUTH_USER_CACHE', {}).get(name, DEFAULTS[name])
+
+
+def load_user(user_id):
+    """Charger l'utilisateur et son profil (stagiaire ou entreprise) en une seule requête"""
+    return User.objects.select_related('stagiaire_profile', 'entreprise_profile').get(pk=user_id)
+
+
+class UserCache:
+    """
+    Cache LRU à durée de vie courte. Chaque lecture retourne une copie pour
+    qu'une requête ne modifie pas l'instance vue par les autres. Les entrées
+    sont invalidées explicitement à l'enregistrement de l'utilisateur ou de
+    son profil ; les autres processus voient la modification au plus tard
+    après TTL secondes.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._entries = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, user_id):
+        with self._lock:
+            entry = self._entries.get(user_id)
+            if entry is None or entry[0] < time.monotonic():
+                self.misses += 1
+                return None
+            self._entries.move_to_end(user_id)
+            self.hits += 1
+            user = entry[1]
+        return copy.deepcopy(user)
+
+    def set(self, user_id, user):
+        expires = time.monotonic() + get_cache_setting('TTL')
+        with self._lock:
+            self._entries[user_id] = (expires, copy.deepcopy(user))
+            self._entries.move_to_end(user_id)
+            while len(self._entries) > get_cache_setting('MAX_SIZE'):
+                self._entries.popitem(last=False)
+
+    def invalidate(self, user_id):
+        with self._lock:
+            self._entries.pop(user_id, None)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+
+user_cache = UserCache()
+
+
+def get_cached_user(user_id):
+    """Utilisateur (avec son profil) depuis le cache, chargé et mis en cache si absent"""
+    user = user_cache.get(user_id)
+    if user is None:
+        user = load_user(user_id)
+        user_cache.set(user_id, user)
+    return user
@@ -0,0 +1,267 @@
+"""
+Accès aux CV : liens signés à durée de vie courte, servis par le serveur web
+frontal (X-Accel-Redirect / X-Sendfile) ou par Django avec ETag, Range et
+Cache-Control ; archives ZIP de plusieurs CV générées en flux
+"""
+import os
+import re
+import time
+import zipfile
+from concurrent.futures import ThreadPoolExecutor
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.core import signing
+from django.core.files.storage import default_storage
+from django.core.handlers.asgi import ASGIRequest
+from django.db import connections
+from django.http import FileResponse, HttpResponse, HttpResponseNotModified, StreamingHttpResponse
+from django.urls import reverse
+from django.utils.text import slugify
+
+DEFAULTS = {
+    'MODE': 'python',  # 'python', 'x-accel' (nginx) ou 'x-sendfile' (Apache, lighttpd)
+    'URL_TTL': 300,  # secondes de validité d'un lien signé
+    'ACCEL_PREFIX': '/protected-media/',  # location nginx « internal » qui pointe sur MEDIA_ROOT
+    'CHUNK_SIZE': 64 * 1024,
+}
+
+SALT = 'accounts.cv'
+RANGE_RE = re.compile(r'^bytes=(\d*)-(\d*)$')
+SHA256_RE = re.compile(r'^[0-9a-f]{64}$')
+_END = object()
+
+
+def get_delivery_setting(name):
+    """Lire un paramètre de settings.CV_DELIVERY avec sa valeur par défaut"""
+    return getattr(settings, 'CV_DELIVERY', {}).get(name, DEFAULTS[name])
+
+
+def download_name(stagiaire):
+    return f"CV_{slugify(f'{stagiaire.prenom} {stagiaire.nom}') or stagiaire.id}.pdf"
+
+
+def sign_cv(stagiaire):
+    """Jeton signé désignant le fichier du CV et son expiration (aucune requête SQL à la lecture)"""
+    return signing.Signer(salt=SALT).sign_object({
+        'n': stagiaire.cv_file.name,
+        'd': download_name(stagiaire),
+        'e': int(time.time()) + get_delivery_setting('URL_TTL'),
+    })
+
+
+def signed_cv_url(stagiaire, request=None):
+    """Lien temporaire vers le CV du stagiaire, ou None s'il n'en a pas"""
+    if not stagiaire.cv_file:
+        return None
+    url = reverse('cv-file', args=[sign_cv(stagiaire)])
+    return request.build_absolute_uri(url) if request is not None else url
+
+
+def read_cv_token(token):
+    """(nom de stockage, nom de téléchargement, secondes de validité restantes) ; BadSignature si invalide ou expiré"""
+    data = signing.Signer(salt=SALT).unsign_object(token)
+    remaining = data['e'] - int(time.time())
+    if remaining <= 0:
+        raise signing.SignatureExpired("Lien expiré")
+    return data['n'], data['d'], remaining
+
+
+def file_etag(name, stat):
+    """Empreinte du contenu pour les CV adressés par le contenu, sinon taille et date"""
+    stem = os.path.splitext(os.path.basename(name))[0]
+    if SHA256_RE.match(stem):
+        return f'"{stem}"'
+    return f'"{stat.st_size:x}-{int(stat.st_mtime):x}"'
+
+
+def parse_range(header, size):
+    """
+    En-tête Range à une seule plage -> (début, fin incluse), None pour
+    servir le fichier entier (absent, plages multiples, syntaxe inconnue),
+    ou False si la plage est hors du fichier (416)
+    """
+    match = RANGE_RE.match(header.strip()) if header else None
+    if not match:
+        return None
+    first, last = match.groups()
+    if not first and not last:
+        return None
+    if not first:
+        # bytes=-N : les N derniers octets
+        length = int(last)
+        if length == 0:
+            return False
+        return max(0, size - length), size - 1
+    start = int(first)
+    end = min(int(last), size - 1) if last else size - 1
+    if start >= size or end < start:
+        return False
+    return start, end
+
+
+def _read_range(path, start, length, chunk_size):
+    with open(path, 'rb') as file:
+        file.seek(start)
+        while length > 0:
+            data = file.read(min(chunk_size, length))
+            if not data:
+                break
+            length -= len(data)
+            yield data
+
+
+def is_asgi(request):
+    """La requête (Django ou DRF) est servie sous ASGI"""
+    return isinstance(getattr(request, '_request', request), ASGIRequest)
+
+
+def _close_in_thread(iterator):
+    # Client déconnecté : fermer le générateur (et ses fichiers), puis la connexion
+    # à la base ouverte par ce thread s'il en a utilisé une
+    try:
+        if hasattr(iterator, 'close'):
+            iterator.close()
+    finally:
+        connections.close_all()
+
+
+async def _async_chunks(iterator, executor=None):
+    read = sync_to_async(next, thread_sensitive=False, executor=executor)
+    try:
+        while (chunk := await read(iterator, _END)) is not _END:
+            yield chunk
+    finally:
+        if executor is None:
+            if hasattr(iterator, 'close'):
+                await sync_to_async(iterator.close, thread_sensitive=False)()
+        else:
+            await sync_to_async(_close_in_thread, thread_sensitive=False, executor=executor)(iterator)
+            executor.shutdown(wait=False)
+
+
+def streaming_content(request, iterator, dedicated_thread=False):
+    """
+    Contenu d'une StreamingHttpResponse. Sous ASGI, Django 4.2 lit un
+    itérateur synchrone en entier (sync_to_async(list)) avant d'envoyer le
+    premier octet : il reçoit alors un itérateur asynchrone qui produit
+    chaque morceau dans un thread du pool, au fil de l'envoi, sans occuper
+    le thread synchrone partagé par les vues de toutes les requêtes.
+    dedicated_thread : l'itérateur lit un curseur de base de données, lié à
+    la connexion d'un thread ; tous ses morceaux sont alors produits dans un
+    thread réservé à la réponse, qui ferme sa connexion à la fin.
+    """
+    if is_asgi(request):
+        executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix='streaming') if dedicated_thread else None
+        return _async_chunks(iterator, executor)
+    return iterator
+
+
+def serve_cv(request, name, filename, max_age=0):
+    """
+    Réponse HTTP pour le CV stocké sous `name`. En mode x-accel / x-sendfile,
+    Django ne renvoie que les en-têtes et le serveur frontal envoie le fichier
+    (Range compris). En mode python : 304 si l'ETag correspond, 206 pour une
+    plage, sinon le fichier entier, lu par morceaux au fil de l'envoi sous
+    WSGI comme sous ASGI.
+    """
+    path = default_storage.path(name)
+    try:
+        stat = os.stat(path)
+    except FileNotFoundError:
+        return None
+    etag = file_etag(name, stat)
+    mode = get_delivery_setting('MODE')
+
+    if etag in [tag.strip() for tag in request.headers.get('If-None-Match', '').split(',')]:
+        response = HttpResponseNotModified()
+    elif mode == 'x-accel':
+        response = HttpResponse(content_type='application/pdf')
+        response['X-Accel-Redirect'] = get_delivery_setting('ACCEL_PREFIX') + name
+    elif mode == 'x-sendfile':
+        response = HttpResponse(content_type='application/pdf')
+        response['X-Sendfile'] = path
+    else:
+        byte_range = parse_range(request.headers.get('Range'), stat.st_size)
+        if byte_range and request.headers.get('If-Range', etag) != etag:
+            byte_range = None
+        if byte_range is False:
+            response = HttpResponse(status=416)
+            response['Content-Range'] = f'bytes */{stat.st_size}'
+        elif byte_range:
+            start, end = byte_range
+            response = StreamingHttpResponse(
+                streaming_content(
+                    request, _read_range(path, start, end - start + 1, get_delivery_setting('CHUNK_SIZE'))
+                ),
+                status=206,
+                content_type='application/pdf'
+            )
+            response['Content-Range'] = f'bytes {start}-{end}/{stat.st_size}'
+            response['Content-Length'] = str(end - start + 1)
+        elif is_asgi(request):
+            # FileResponse serait lu en entier en mémoire sous ASGI
+            response = StreamingHttpResponse(
+                streaming_content(request, _read_range(path, 0, stat.st_size, get_delivery_setting('CHUNK_SIZE'))),
+                content_type='application/pdf'
+            )
+            response['Content-Length'] = str(stat.st_size)
+        else:
+            response = FileResponse(open(path, 'rb'), content_type='application/pdf')
+        response['Accept-Ranges'] = 'bytes'
+
+    response['ETag'] = etag
+    response['Content-Disposition'] = f'inline; filename="{filename}"'
+    response['Cache-Control'] = f'private, max-age={max_age}' if max_age else 'private, no-cache'
+    return response
+
+
+class _ZipSink:
+    """
+    Sortie de zipfile sans tell() ni seek() : zipfile écrit alors la taille
+    et le CRC de chaque fichier après son contenu (descripteur de données)
+    au lieu de revenir sur l'en-tête
+    """
+
+    def __init__(self):
+        self._chunks = []
+
+    def write(self, data):
+        self._chunks.append(bytes(data))
+        return len(data)
+
+    def flush(self):
+        pass
+
+    def drain(self):
+        data = b''.join(self._chunks)
+        self._chunks.clear()
+        return data
+
+
+def stream_zip(files, chunk_size=None):
+    """
+    Archive ZIP des fichiers (chemin, nom dans l'archive) produite morceau par
+    morceau : rien n'est mis en tampon au-delà d'un morceau, hormis l'entrée
+    du répertoire central de chaque fichier. Les PDF sont déjà compressés :
+    ils sont stockés tels quels. Les fichiers introuvables sont ignorés.
+    """
+    chunk_size = chunk_size or get_delivery_setting('CHUNK_SIZE')
+    sink = _ZipSink()
+    with zipfile.ZipFile(sink, 'w', zipfile.ZIP_STORED) as archive:
+        for path, arcname in files:
+            try:
+                source = open(path, 'rb')
+            except FileNotFoundError:
+                continue
+            with source:
+                info = zipfile.ZipInfo.from_file(path, arcname, strict_timestamps=False)
+                with archive.open(info, 'w') as target:
+                    while data := source.read(chunk_size):
+                        target.write(data)
+                        yield sink.drain()
+            # En-tête local et descripteur de données
+            if data := sink.drain():
+                yield data
+    # Répertoire central
+    yield sink.drain()
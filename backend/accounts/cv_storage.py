@@ -0,0 +1,198 @@
+"""
+Téléversement des CV en flux (hachage et validation au fil de l'eau) et
+stockage adressé par le contenu : cvs/<sha256[:2]>/<sha256>.pdf
+"""
+import hashlib
+import logging
+import os
+import tempfile
+import time
+
+from django.conf import settings
+from django.core.files.storage import default_storage
+from django.core.files.uploadedfile import UploadedFile
+from django.core.files.uploadhandler import FileUploadHandler, StopUpload
+from django.http import QueryDict
+from django.utils.datastructures import MultiValueDict
+
+from .models import Stagiaire
+
+logger = logging.getLogger('accounts')
+
+DEFAULTS = {
+    'MAX_SIZE': 10 * 1024 * 1024,  # octets
+    'CHUNK_SIZE': 64 * 1024,  # octets lus puis écrits à chaque étape
+    'DIRECTORY': 'cvs',  # sous MEDIA_ROOT
+    'SWEEP_GRACE': 3600,  # secondes avant qu'un fichier non référencé puisse être supprimé
+}
+
+PDF_SIGNATURE = b'%PDF-'
+FIELD_NAME = 'cv_file'
+
+
+def get_cv_setting(name):
+    """Lire un paramètre de settings.CV_UPLOAD avec sa valeur par défaut"""
+    return getattr(settings, 'CV_UPLOAD', {}).get(name, DEFAULTS[name])
+
+
+def temporary_directory():
+    """Fichiers en cours de réception : sur le même disque que les CV pour un renommage atomique"""
+    path = os.path.join(settings.MEDIA_ROOT, get_cv_setting('DIRECTORY'), 'tmp')
+    os.makedirs(path, exist_ok=True)
+    return path
+
+
+def content_name(sha256):
+    """Nom de stockage d'un CV d'après l'empreinte de son contenu"""
+    return f"{get_cv_setting('DIRECTORY')}/{sha256[:2]}/{sha256}.pdf"
+
+
+class HashedUploadedFile(UploadedFile):
+    """CV reçu dans un fichier temporaire, avec l'empreinte SHA-256 de son contenu"""
+
+    def __init__(self, file, name, size, sha256):
+        super().__init__(file, name, 'application/pdf', size)
+        self.sha256 = sha256
+
+    def temporary_file_path(self):
+        return self.file.name
+
+
+class StreamingCVUploadHandler(FileUploadHandler):
+    """
+    Écrit le champ cv_file morceau par morceau dans un fichier temporaire
+    en calculant son SHA-256. L'envoi est interrompu dès que l'en-tête n'est
+    pas celui d'un PDF ou que la taille dépasse MAX_SIZE ; la raison est
+    conservée dans `error` (et `error_status`) pour la vue.
+    Les autres fichiers éventuels de la requête sont ignorés.
+    """
+
+    def __init__(self, request=None):
+        super().__init__(request)
+        self.chunk_size = get_cv_setting('CHUNK_SIZE')
+        self.error = None
+        self.error_status = None
+        self.file = None
+        self._active = False
+
+    def handle_raw_input(self, input_data, META, content_length, boundary, encoding=None):
+        # Requête annonçant déjà une taille excessive : refusée sans lire le corps
+        if content_length > get_cv_setting('MAX_SIZE') + 64 * 1024:
+            self.error = too_large_message()
+            self.error_status = 413
+            return QueryDict(encoding=encoding), MultiValueDict()
+        return None
+
+    def new_file(self, field_name, file_name, content_type, content_length, charset=None, content_type_extra=None):
+        super().new_file(field_name, file_name, content_type, content_length, charset, content_type_extra)
+        self._active = field_name == FIELD_NAME and self.file is None
+        if not self._active:
+            return
+        self.file = tempfile.NamedTemporaryFile(dir=temporary_directory(), suffix='.upload', delete=False)
+        self._hasher = hashlib.sha256()
+        self._size = 0
+        self._head = b''
+
+    def receive_data_chunk(self, raw_data, start):
+        if not self._active:
+            return None
+        if len(self._head) < len(PDF_SIGNATURE):
+            self._head += raw_data[:len(PDF_SIGNATURE) - len(self._head)]
+            if not PDF_SIGNATURE.startswith(self._head):
+                self._fail("Le fichier n'est pas un PDF", 400)
+        self._size += len(raw_data)
+        if self._size > get_cv_setting('MAX_SIZE'):
+            self._fail(too_large_message(), 413)
+        self._hasher.update(raw_data)
+        self.file.write(raw_data)
+        return None
+
+    def file_complete(self, file_size):
+        if not self._active:
+            return None
+        self._active = False
+        self.file.flush()
+        os.fsync(self.file.fileno())
+        self.file.seek(0)
+        if self._head != PDF_SIGNATURE:
+            self._fail("Le fichier n'est pas un PDF", 400)
+        return HashedUploadedFile(self.file, self.file_name, self._size, self._hasher.hexdigest())
+
+    def upload_complete(self):
+        # Envoi interrompu : ne pas laisser le fichier temporaire derrière soi
+        if self.error and self.file is not None:
+            discard_temporary(self.file)
+
+    def _fail(self, message, status_code):
+        self.error = message
+        self.error_status = status_code
+        if self.file is not None:
+            discard_temporary(self.file)
+        # Le reste du corps est lu et ignoré, sans être écrit sur le disque
+        raise StopUpload()
+
+
+def too_large_message():
+    return f"Le fichier ne doit pas dépasser {get_cv_setting('MAX_SIZE') // (1024 * 1024)} Mo"
+
+
+def discard_temporary(file):
+    file.close()
+    try:
+        os.remove(file.name)
+    except FileNotFoundError:
+        pass
+
+
+def store_cv(uploaded):
+    """
+    Déplacer le fichier temporaire à son emplacement définitif. Si un CV de
+    même contenu est déjà stocké, il est réutilisé et le fichier temporaire
+    supprimé. Retourne le nom de stockage.
+    """
+    name = content_name(uploaded.sha256)
+    path = default_storage.path(name)
+    uploaded.file.close()
+    if os.path.exists(path):
+        os.remove(uploaded.temporary_file_path())
+        # Rafraîchir la date : le nettoyage ne supprime pas un fichier sur le point d'être référencé
+        os.utime(path)
+    else:
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        os.chmod(uploaded.temporary_file_path(), 0o644)
+        # Renommage atomique : un lecteur ne voit jamais un CV partiellement écrit
+        os.replace(uploaded.temporary_file_path(), path)
+    return name
+
+
+def sweep_cv_files(now=None):
+    """
+    Supprimer les fichiers de CV qui ne sont plus référencés par aucun
+    stagiaire (CV remplacés ou supprimés, anciens noms non adressés par le
+    contenu) et les fichiers temporaires abandonnés. Les fichiers plus
+    récents que SWEEP_GRACE sont conservés : un envoi peut être en train
+    d'enregistrer sa référence.
+    """
+    now = now or time.time()
+    grace = get_cv_setting('SWEEP_GRACE')
+    root = os.path.join(settings.MEDIA_ROOT, get_cv_setting('DIRECTORY'))
+    referenced = set(Stagiaire.objects.exclude(cv_file='').values_list('cv_file', flat=True))
+    stats = {'scanned': 0, 'deleted': 0, 'bytes': 0}
+    for directory, _, files in os.walk(root):
+        for filename in files:
+            path = os.path.join(directory, filename)
+            name = os.path.relpath(path, settings.MEDIA_ROOT).replace(os.sep, '/')
+            stats['scanned'] += 1
+            if name in referenced:
+                continue
+            try:
+                info = os.stat(path)
+                if now - info.st_mtime < grace:
+                    continue
+                os.remove(path)
+            except FileNotFoundError:
+                continue
+            stats['deleted'] += 1
+            stats['bytes'] += info.st_size
+    logger.info("Nettoyage des CV : %s", stats)
+    return stats
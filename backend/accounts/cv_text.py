@@ -0,0 +1,63 @@
+"""
+Extraction du texte des CV PDF et normalisation en termes de recherche.
+Ce module n'importe pas Django : ses fonctions s'exécutent dans les
+processus du pool d'indexation.
+"""
+import hashlib
+import io
+import re
+import unicodedata
+from collections import Counter
+
+try:
+    import pypdf
+except ImportError:  # dépendance déclarée (requirements.txt) ; absente, l'indexation le signale
+    pypdf = None
+
+MAX_TERM_LENGTH = 64
+TERM_RE = re.compile(r'[a-z0-9][a-z0-9+#.]*')
+# Langages d'une lettre conservés malgré la longueur minimale
+SHORT_TERMS = {'c', 'r'}
+STOPWORDS = set("""
+    au aux avec ce ces dans de des du elle en et eux il je la le les leur lui ma mais me meme mes moi
+    mon ne nos notre nous on ou par pas pour qu que qui sa se ses son sur ta te tes toi ton tu un une
+    vos votre vous est sont ete etre avoir ai as avons avez ont cette cet ainsi aussi tres plus
+    the and for with from that this are was were been have has had not but all any can will your our
+    their its into out about over under than then them they you he she his her who what when where
+""".split())
+
+
+def normalize_terms(text):
+    """Texte -> Counter des termes : minuscules sans accents, mots vides et termes trop courts écartés"""
+    text = unicodedata.normalize('NFKD', text.lower())
+    text = ''.join(char for char in text if not unicodedata.combining(char))
+    terms = Counter()
+    for token in TERM_RE.findall(text):
+        token = token.rstrip('.')
+        if len(token) > MAX_TERM_LENGTH or token in STOPWORDS:
+            continue
+        if len(token) < 2 and token not in SHORT_TERMS:
+            continue
+        terms[token] += 1
+    return terms
+
+
+def extract_text(data):
+    """Texte d'un PDF (octets) ; chaîne vide si pypdf n'est pas installé ou si le fichier est illisible"""
+    if pypdf is None:
+        return ''
+    try:
+        reader = pypdf.PdfReader(io.BytesIO(data))
+        return ' '.join(page.extract_text() or '' for page in reader.pages)
+    except Exception:
+        return ''
+
+
+def analyze_cv(path):
+    """(sha256, {terme: occurrences}) pour le fichier, ou (None, {}) s'il est introuvable"""
+    try:
+        with open(path, 'rb') as file:
+            data = file.read()
+    except OSError:
+        return None, {}
+    return hashlib.sha256(data).hexdigest(), dict(normalize_terms(extract_text(data)))
@@ -0,0 +1,64 @@
+"""
+Recherche, filtres et tris des listes d'administration (utilisateurs, stagiaires, entreprises)
+"""
+from django.db.models import Q
+from django.db.models.functions import Lower
+
+
+def prefix_bounds(term):
+    """'dup' -> ('dup', 'duq') : les chaînes qui commencent par term sont dans [borne basse, borne haute["""
+    term = term.lower()
+    return term, term[:-1] + chr(ord(term[-1]) + 1)
+
+
+def prefix_q(alias, term):
+    """
+    Condition « commence par term » sur une annotation Lower(champ). L'encadrement
+    >= / < est servi par l'index sur Lower(champ) ; startswith écarte les
+    éventuels écarts dus à la collation de la base.
+    """
+    low, high = prefix_bounds(term)
+    return Q(**{f'{alias}__gte': low, f'{alias}__lt': high, f'{alias}__startswith': low})
+
+
+def prefix_search(queryset, term, fields, extra=None):
+    """
+    Filtrer les lignes dont un des champs commence par term (insensible à la
+    casse). `extra` : condition supplémentaire combinée en OU (par exemple une
+    sous-requête sur l'email de l'utilisateur).
+    """
+    term = (term or '').strip()
+    if not term:
+        return queryset
+    aliases = {f'_search_{field}': Lower(field) for field in fields}
+    condition = Q()
+    for alias in aliases:
+        condition |= prefix_q(alias, term)
+    if extra is not None:
+        condition |= extra
+    return queryset.alias(**aliases).filter(condition)
+
+
+def users_by_email_prefix(model, term):
+    """Sous-requête des identifiants d'utilisateurs dont l'email commence par term"""
+    return model.objects.alias(_search_email=Lower('email')).filter(
+        prefix_q('_search_email', term)
+    ).values('id')
+
+
+def apply_ordering(queryset, value, allowed, default):
+    """
+    Trier selon `?ordering=champ` ou `?ordering=-champ` si le champ figure dans
+    la liste blanche `allowed` ({nom public: champ ou expression}), sinon selon
+    `default`. L'identifiant départage les égalités pour une pagination stable.
+    """
+    name = (value or '').strip()
+    descending = name.startswith('-')
+    expression = allowed.get(name.lstrip('-'))
+    if expression is None:
+        return queryset.order_by(*default)
+    if isinstance(expression, str):
+        ordering = f'-{expression}' if descending else expression
+    else:
+        ordering = expression.desc() if descending else expression.asc()
+    return queryset.order_by(ordering, '-id' if descending else 'id')
@@ -0,0 +1,33 @@
+"""
+Hachage des mots de passe : scrypt avec des paramètres réglables
+"""
+from django.conf import settings
+from django.contrib.auth.hashers import ScryptPasswordHasher
+
+
+class TunedScryptPasswordHasher(ScryptPasswordHasher):
+    """
+    scrypt dont le coût est lu dans settings.PASSWORD_SCRYPT. L'algorithme
+    reste 'scrypt' : un changement de paramètres provoque un nouveau hachage
+    à la prochaine connexion réussie (must_update).
+    """
+
+    def _get_param(self, name, default):
+        return getattr(settings, 'PASSWORD_SCRYPT', {}).get(name, default)
+
+    @property
+    def work_factor(self):
+        return self._get_param('WORK_FACTOR', ScryptPasswordHasher.work_factor)
+
+    @property
+    def block_size(self):
+        return self._get_param('BLOCK_SIZE', ScryptPasswordHasher.block_size)
+
+    @property
+    def parallelism(self):
+        return self._get_param('PARALLELISM', ScryptPasswordHasher.parallelism)
+
+    @property
+    def maxmem(self):
+        # Mémoire nécessaire à scrypt (128 * N * r * p) avec une marge, au-delà du plafond par défaut d'OpenSSL
+        return 2 * 128 * self.work_factor * self.block_size * self.parallelism
@@ -0,0 +1,86 @@
+"""
+Calcul des hachages de mots de passe dans un pool de threads borné
+"""
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.contrib.auth.hashers import check_password, make_password
+from rest_framework import status
+from rest_framework.exceptions import APIException
+
+DEFAULTS = {
+    'WORKERS': os.cpu_count() or 1,
+    'MAX_PENDING': 32,
+    'QUEUE_TIMEOUT': 2,
+}
+
+_executor = None
+_slots = None
+_lock = threading.Lock()
+
+
+class HashingBusy(APIException):
+    """Trop de hachages en attente : la requête est refusée plutôt que mise en file indéfiniment"""
+    status_code = status.HTTP_503_SERVICE_UNAVAILABLE
+    default_detail = "Le serveur est surchargé, veuillez réessayer dans quelques instants."
+    default_code = 'hashing_busy'
+
+
+def get_hashing_setting(name):
+    """Lire un paramètre de settings.PASSWORD_HASHING avec sa valeur par défaut"""
+    return getattr(settings, 'PASSWORD_HASHING', {}).get(name, DEFAULTS[name])
+
+
+def _get_pool():
+    global _executor, _slots
+    with _lock:
+        if _executor is None:
+            workers = get_hashing_setting('WORKERS')
+            _executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix='password-hashing')
+            _slots = threading.BoundedSemaphore(workers + get_hashing_setting('MAX_PENDING'))
+        return _executor, _slots
+
+
+def run_in_pool(func, *args):
+    """
+    Exécuter un calcul de hachage dans le pool. hashlib libère le GIL : au
+    plus WORKERS hachages tournent en parallèle, les autres attendent une
+    place (MAX_PENDING au plus) puis HashingBusy est levée.
+    """
+    executor, slots = _get_pool()
+    if not slots.acquire(timeout=get_hashing_setting('QUEUE_TIMEOUT')):
+        raise HashingBusy()
+    try:
+        return executor.submit(func, *args).result()
+    finally:
+        slots.release()
+
+
+def hash_password(raw_password):
+    """Équivalent de make_password, calculé dans le pool"""
+    return run_in_pool(make_password, raw_password)
+
+
+def hash_passwords(raw_passwords):
+    """
+    Hacher une série de mots de passe dans le pool, sans file d'attente
+    bornée : réservé aux traitements en masse des tâches en arrière-plan.
+    """
+    executor, _ = _get_pool()
+    return list(executor.map(make_password, raw_passwords))
+
+
+def verify_password(user, raw_password):
+    """
+    Vérifier le mot de passe dans le pool. Si le hachage stocké utilise un
+    autre algorithme ou d'autres paramètres que le hacheur préféré, il est
+    recalculé et enregistré (même comportement que User.check_password).
+    """
+    needs_update = []
+    valid = run_in_pool(check_password, raw_password, user.password, needs_update.append)
+    if valid and needs_update:
+        user.password = hash_password(raw_password)
+        user.save(update_fields=['password'])
+    return valid
@@ -0,0 +1,62 @@
+"""
+Commande pour mesurer le débit des connexions (hachage des mots de passe compris)
+"""
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from django.contrib.auth import authenticate
+from django.contrib.auth.hashers import make_password
+from django.core.management.base import BaseCommand
+from django.db import connection
+
+from accounts.hashing import get_hashing_setting
+from accounts.models import User
+
+PASSWORD = 'Benchmark-mot-de-passe-2024'
+
+
+class Command(BaseCommand):
+    help = (
+        "Crée des comptes temporaires, enchaîne des connexions concurrentes via "
+        "authenticate() et affiche le débit en connexions par seconde et par cœur"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--logins', type=int, default=200, help="Nombre total de connexions")
+        parser.add_argument('--concurrency', type=int, default=8, help="Connexions simultanées")
+        parser.add_argument('--users', type=int, default=50, help="Comptes temporaires créés")
+        parser.add_argument(
+            '--hasher',
+            default='default',
+            help="Algorithme des hachages initiaux des comptes (ex. pbkdf2_sha256 pour mesurer la conversion)",
+        )
+
+    def _login(self, email):
+        try:
+            return authenticate(username=email, password=PASSWORD) is not None
+        finally:
+            connection.close()
+
+    def handle(self, *args, **options):
+        encoded = make_password(PASSWORD, hasher=options['hasher'])
+        emails = [f"benchmark-login-{i}@example.invalid" for i in range(options['users'])]
+        User.objects.filter(email__in=emails).delete()
+        User.objects.bulk_create([User(email=email, role='STAGIAIRE', password=encoded) for email in emails])
+        try:
+            targets = [emails[i % len(emails)] for i in range(options['logins'])]
+            cpu_time = time.process_time()
+            start = time.perf_counter()
+            with ThreadPoolExecutor(max_workers=options['concurrency']) as executor:
+                results = list(executor.map(self._login, targets))
+            duration = time.perf_counter() - start
+            cpu_time = time.process_time() - cpu_time
+        finally:
+            User.objects.filter(email__in=emails).delete()
+
+        cores = min(get_hashing_setting('WORKERS'), os.cpu_count() or 1)
+        rate = len(results) / duration
+        self.stdout.write(f"Hachage initial : {encoded.split('$', 1)[0]}")
+        self.stdout.write(f"Connexions réussies : {sum(results)}/{len(results)}")
+        self.stdout.write(f"Durée : {duration:.2f}s (CPU {cpu_time:.2f}s)")
+        self.stdout.write(f"Débit : {rate:.1f} connexions/s, {rate / cores:.1f} connexions/s par cœur ({cores} cœur(s))")
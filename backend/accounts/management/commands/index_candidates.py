@@ -0,0 +1,23 @@
+"""
+Commande pour (ré)indexer les CV et profils des stagiaires pour la recherche de profils
+"""
+from django.core.management.base import BaseCommand
+
+from accounts.models import Stagiaire
+from accounts.talent_search import index_candidates
+
+
+class Command(BaseCommand):
+    help = "Indexe les stagiaires modifiés depuis leur dernière indexation (--all : tous)"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--all', action='store_true', help="Réindexer tous les stagiaires et réextraire les CV")
+
+    def handle(self, *args, **options):
+        if options['all']:
+            Stagiaire.objects.update(search_indexed_at=None, cv_indexed_sha256='')
+        stats = index_candidates()
+        self.stdout.write(
+            f"Stagiaires indexés : {stats['stagiaires']} (CV analysés : {stats['cvs']}) "
+            f"en {stats['duration_seconds']}s"
+        )
@@ -0,0 +1,33 @@
+"""
+Commande pour créer des comptes en masse à partir d'un fichier CSV
+"""
+from django.core.management.base import BaseCommand, CommandError
+
+from accounts.provisioning import PROFILE_COLUMNS, provision_accounts
+
+
+class Command(BaseCommand):
+    help = (
+        "Crée des comptes stagiaires ou entreprises à partir d'un CSV (colonnes : email, "
+        "password facultatif, puis les champs du profil)"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('csv_file', help="Chemin du fichier CSV (UTF-8)")
+        parser.add_argument('--role', choices=list(PROFILE_COLUMNS), default='STAGIAIRE')
+        parser.add_argument('--dry-run', action='store_true', help="Valider le fichier sans rien créer")
+
+    def handle(self, *args, **options):
+        try:
+            stream = open(options['csv_file'], newline='', encoding='utf-8-sig')
+        except OSError as error:
+            raise CommandError(f"Impossible de lire le fichier : {error}")
+        with stream:
+            report = provision_accounts(stream, options['role'], dry_run=options['dry_run'])
+
+        action = "à créer" if options['dry_run'] else "créés"
+        self.stdout.write(f"Comptes {action} : {report['created']}")
+        self.stdout.write(f"Lignes ignorées : {report['skipped']}")
+        for error in report['errors']:
+            self.stdout.write(f"  ligne {error['line']} ({error['email']}) : {', '.join(error['errors'])}")
+        self.stdout.write(f"Durée : {report['duration_seconds']}s")
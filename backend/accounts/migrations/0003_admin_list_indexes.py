@@ -0,0 +1,66 @@
+# Generated by Django 4.2.7 on 2026-10-19 19:14
+
+from django.db import migrations, models
+import django.db.models.functions.text
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounts', '0002_token_revocation'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='entreprise',
+            index=models.Index(django.db.models.functions.text.Lower('nom_entreprise'), name='entreprise_nom_lower_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='entreprise',
+            index=models.Index(django.db.models.functions.text.Lower('contact_nom'), name='entreprise_contact_lower_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='entreprise',
+            index=models.Index(fields=['-date_creation', '-id'], name='entreprise_date_creation_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='entreprise',
+            index=models.Index(fields=['ville', '-date_creation', '-id'], name='entreprise_ville_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='entreprise',
+            index=models.Index(fields=['secteur_activite', '-date_creation', '-id'], name='entreprise_secteur_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='stagiaire',
+            index=models.Index(django.db.models.functions.text.Lower('nom'), name='stagiaire_nom_lower_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='stagiaire',
+            index=models.Index(django.db.models.functions.text.Lower('prenom'), name='stagiaire_prenom_lower_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='stagiaire',
+            index=models.Index(fields=['-date_creation', '-id'], name='stagiaire_date_creation_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='stagiaire',
+            index=models.Index(fields=['ville', '-date_creation', '-id'], name='stagiaire_ville_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='stagiaire',
+            index=models.Index(fields=['domaine', '-date_creation', '-id'], name='stagiaire_domaine_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='user',
+            index=models.Index(django.db.models.functions.text.Lower('email'), name='user_email_lower_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='user',
+            index=models.Index(fields=['-date_joined', '-id'], name='user_date_joined_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='user',
+            index=models.Index(fields=['role', '-date_joined', '-id'], name='user_role_date_joined_idx'),
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 4.2.7 on 2026-10-19 19:21
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounts', '0003_admin_list_indexes'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='stagiaire',
+            name='cv_sha256',
+            field=models.CharField(blank=True, db_index=True, max_length=64, verbose_name='Empreinte SHA-256 du CV'),
+        ),
+    ]
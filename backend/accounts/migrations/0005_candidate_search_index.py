@@ -0,0 +1,43 @@
+# Generated by Django 4.2.7 on 2026-10-19 19:37
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounts', '0004_stagiaire_cv_sha256'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='stagiaire',
+            name='cv_indexed_sha256',
+            field=models.CharField(blank=True, editable=False, max_length=64),
+        ),
+        migrations.AddField(
+            model_name='stagiaire',
+            name='search_indexed_at',
+            field=models.DateTimeField(blank=True, editable=False, null=True),
+        ),
+        migrations.CreateModel(
+            name='CandidateTerm',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('term', models.CharField(max_length=64, verbose_name='Terme')),
+                ('cv_weight', models.PositiveSmallIntegerField(default=0, verbose_name='Poids dans le CV')),
+                ('weight', models.PositiveSmallIntegerField(default=1, verbose_name='Poids')),
+                ('stagiaire', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='search_terms', to='accounts.stagiaire')),
+            ],
+            options={
+                'verbose_name': 'Terme de recherche',
+                'verbose_name_plural': 'Termes de recherche',
+                'indexes': [models.Index(fields=['term', '-weight', 'stagiaire'], name='candidate_term_lookup_idx')],
+            },
+        ),
+        migrations.AddConstraint(
+            model_name='candidateterm',
+            constraint=models.UniqueConstraint(fields=('stagiaire', 'term'), name='candidate_term_unique'),
+        ),
+    ]
@@ -0,0 +1,123 @@
+# Generated by Django 4.2.7 on 2026-10-19 19:57
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounts', '0005_candidate_search_index'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Domaine',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('nom', models.CharField(max_length=100, verbose_name='Nom')),
+                ('cle', models.CharField(editable=False, max_length=100, unique=True, verbose_name='Clé')),
+            ],
+            options={
+                'verbose_name': 'Domaine',
+                'verbose_name_plural': 'Domaines',
+                'ordering': ['nom'],
+                'abstract': False,
+            },
+        ),
+        migrations.CreateModel(
+            name='SecteurActivite',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('nom', models.CharField(max_length=100, verbose_name='Nom')),
+                ('cle', models.CharField(editable=False, max_length=100, unique=True, verbose_name='Clé')),
+            ],
+            options={
+                'verbose_name': "Secteur d'activité",
+                'verbose_name_plural': "Secteurs d'activité",
+                'ordering': ['nom'],
+                'abstract': False,
+            },
+        ),
+        migrations.CreateModel(
+            name='Ville',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('nom', models.CharField(max_length=100, verbose_name='Nom')),
+                ('cle', models.CharField(editable=False, max_length=100, unique=True, verbose_name='Clé')),
+            ],
+            options={
+                'verbose_name': 'Ville',
+                'verbose_name_plural': 'Villes',
+                'ordering': ['nom'],
+                'abstract': False,
+            },
+        ),
+        migrations.RemoveIndex(
+            model_name='entreprise',
+            name='entreprise_ville_idx',
+        ),
+        migrations.RemoveIndex(
+            model_name='entreprise',
+            name='entreprise_secteur_idx',
+        ),
+        migrations.RemoveIndex(
+            model_name='stagiaire',
+            name='stagiaire_ville_idx',
+        ),
+        migrations.RemoveIndex(
+            model_name='stagiaire',
+            name='stagiaire_domaine_idx',
+        ),
+        migrations.AddField(
+            model_name='ville',
+            name='alias_de',
+            field=models.ForeignKey(blank=True, limit_choices_to={'alias_de__isnull': True}, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='alias', to='accounts.ville', verbose_name='Alias de'),
+        ),
+        migrations.AddField(
+            model_name='secteuractivite',
+            name='alias_de',
+            field=models.ForeignKey(blank=True, limit_choices_to={'alias_de__isnull': True}, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='alias', to='accounts.secteuractivite', verbose_name='Alias de'),
+        ),
+        migrations.AddField(
+            model_name='domaine',
+            name='alias_de',
+            field=models.ForeignKey(blank=True, limit_choices_to={'alias_de__isnull': True}, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='alias', to='accounts.domaine', verbose_name='Alias de'),
+        ),
+        migrations.AddField(
+            model_name='entreprise',
+            name='secteur_activite_ref',
+            field=models.ForeignKey(blank=True, db_index=False, editable=False, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='entreprises', to='accounts.secteuractivite'),
+        ),
+        migrations.AddField(
+            model_name='entreprise',
+            name='ville_ref',
+            field=models.ForeignKey(blank=True, db_index=False, editable=False, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='entreprises', to='accounts.ville'),
+        ),
+        migrations.AddField(
+            model_name='stagiaire',
+            name='domaine_ref',
+            field=models.ForeignKey(blank=True, db_index=False, editable=False, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='stagiaires', to='accounts.domaine'),
+        ),
+        migrations.AddField(
+            model_name='stagiaire',
+            name='ville_ref',
+            field=models.ForeignKey(blank=True, db_index=False, editable=False, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='stagiaires', to='accounts.ville'),
+        ),
+        migrations.AddIndex(
+            model_name='entreprise',
+            index=models.Index(fields=['ville_ref', '-date_creation', '-id'], name='entreprise_ville_ref_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='entreprise',
+            index=models.Index(fields=['secteur_activite_ref', '-date_creation', '-id'], name='entreprise_secteur_ref_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='stagiaire',
+            index=models.Index(fields=['ville_ref', '-date_creation', '-id'], name='stagiaire_ville_ref_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='stagiaire',
+            index=models.Index(fields=['domaine_ref', '-date_creation', '-id'], name='stagiaire_domaine_ref_idx'),
+        ),
+    ]
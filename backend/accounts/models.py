@@ -1,10 +1,17 @@
 """
 Modèles pour la gestion des utilisateurs
 """
+import re
+import unicodedata
+
 from django.contrib.auth.models import AbstractBaseUser, BaseUserManager, PermissionsMixin
+from django.core.exceptions import ValidationError
 from django.db import models
+from django.db.models.functions import Lower
 from django.utils import timezone
 
+from .hashing import hash_password
+
 
 class UserManager(BaseUserManager):
     """Manager personnalisé pour le modèle User"""
@@ -16,7 +23,10 @@ class UserManager(BaseUserManager):
         
         email = self.normalize_email(email)
         user = self.model(email=email, **extra_fields)
-        user.set_password(password)
+        if password is None:
+            user.set_unusable_password()
+        else:
+            user.password = hash_password(password)
         user.save(using=self._db)
         return user
     
@@ -48,6 +58,12 @@ class User(AbstractBaseUser, PermissionsMixin):
     is_active = models.BooleanField(default=True)
     is_staff = models.BooleanField(default=False)
     date_joined = models.DateTimeField(default=timezone.now)
+    tokens_revoked_at = models.DateTimeField(
+        null=True,
+        blank=True,
+        verbose_name="Jetons révoqués le",
+        help_text="Les jetons émis avant cette date sont refusés (désactivation du compte)"
+    )
     
     objects = UserManager()
     
@@ -57,11 +73,73 @@ class User(AbstractBaseUser, PermissionsMixin):
     class Meta:
         verbose_name = "Utilisateur"
         verbose_name_plural = "Utilisateurs"
+        indexes = [
+            # Recherche par préfixe d'email et tris de la liste d'administration
+            models.Index(Lower('email'), name='user_email_lower_idx'),
+            models.Index(fields=['-date_joined', '-id'], name='user_date_joined_idx'),
+            models.Index(fields=['role', '-date_joined', '-id'], name='user_role_date_joined_idx'),
+        ]
     
     def __str__(self):
         return f"{self.email} ({self.get_role_display()})"
 
 
+def reference_key(nom):
+    """Clé de comparaison d'une valeur de référence : minuscules, sans accents ni ponctuation"""
+    nom = unicodedata.normalize('NFKD', (nom or '').lower())
+    nom = ''.join(char for char in nom if not unicodedata.combining(char))
+    return re.sub(r'[^a-z0-9]+', ' ', nom).strip()
+
+
+class ReferenceValue(models.Model):
+    """Valeur de référence normalisée (ville, domaine, secteur) ; un alias pointe vers la valeur canonique"""
+    
+    nom = models.CharField(max_length=100, verbose_name="Nom")
+    cle = models.CharField(max_length=100, unique=True, editable=False, verbose_name="Clé")
+    alias_de = models.ForeignKey(
+        'self',
+        on_delete=models.CASCADE,
+        null=True,
+        blank=True,
+        related_name='alias',
+        limit_choices_to={'alias_de__isnull': True},
+        verbose_name="Alias de"
+    )
+    
+    class Meta:
+        abstract = True
+        ordering = ['nom']
+    
+    def __str__(self):
+        return f"{self.nom} → {self.alias_de.nom}" if self.alias_de_id else self.nom
+    
+    def clean(self):
+        if self.alias_de_id and self.alias_de_id == self.pk:
+            raise ValidationError({'alias_de': "Une valeur ne peut pas être son propre alias"})
+    
+    def save(self, *args, **kwargs):
+        self.cle = reference_key(self.nom)
+        super().save(*args, **kwargs)
+
+
+class Ville(ReferenceValue):
+    class Meta(ReferenceValue.Meta):
+        verbose_name = "Ville"
+        verbose_name_plural = "Villes"
+
+
+class Domaine(ReferenceValue):
+    class Meta(ReferenceValue.Meta):
+        verbose_name = "Domaine"
+        verbose_name_plural = "Domaines"
+
+
+class SecteurActivite(ReferenceValue):
+    class Meta(ReferenceValue.Meta):
+        verbose_name = "Secteur d'activité"
+        verbose_name_plural = "Secteurs d'activité"
+
+
 class Stagiaire(models.Model):
     """Profil stagiaire"""
     
@@ -74,13 +152,34 @@ class Stagiaire(models.Model):
     ville = models.CharField(max_length=100, verbose_name="Ville", blank=True)
     niveau_etude = models.CharField(max_length=100, verbose_name="Niveau d'études", blank=True)
     domaine = models.CharField(max_length=100, verbose_name="Domaine d'études", blank=True)
+    # Valeurs de référence de ville et domaine, résolues à l'enregistrement (filtres et jointures)
+    ville_ref = models.ForeignKey(
+        Ville, on_delete=models.SET_NULL, null=True, blank=True, editable=False, db_index=False,
+        related_name='stagiaires'
+    )
+    domaine_ref = models.ForeignKey(
+        Domaine, on_delete=models.SET_NULL, null=True, blank=True, editable=False, db_index=False,
+        related_name='stagiaires'
+    )
     cv_file = models.FileField(upload_to='cvs/', verbose_name="CV (PDF)", null=True, blank=True)
+    cv_sha256 = models.CharField(max_length=64, blank=True, db_index=True, verbose_name="Empreinte SHA-256 du CV")
+    # Recherche de profils : CV dont les termes sont indexés et date de la dernière indexation
+    cv_indexed_sha256 = models.CharField(max_length=64, blank=True, editable=False)
+    search_indexed_at = models.DateTimeField(null=True, blank=True, editable=False)
     date_creation = models.DateTimeField(auto_now_add=True)
     date_modification = models.DateTimeField(auto_now=True)
     
     class Meta:
         verbose_name = "Stagiaire"
         verbose_name_plural = "Stagiaires"
+        indexes = [
+            # Recherche par préfixe, filtres et tris de la liste d'administration
+            models.Index(Lower('nom'), name='stagiaire_nom_lower_idx'),
+            models.Index(Lower('prenom'), name='stagiaire_prenom_lower_idx'),
+            models.Index(fields=['-date_creation', '-id'], name='stagiaire_date_creation_idx'),
+            models.Index(fields=['ville_ref', '-date_creation', '-id'], name='stagiaire_ville_ref_idx'),
+            models.Index(fields=['domaine_ref', '-date_creation', '-id'], name='stagiaire_domaine_ref_idx'),
+        ]
     
     def __str__(self):
         return f"{self.prenom} {self.nom}"
@@ -95,6 +194,14 @@ class Entreprise(models.Model):
     telephone = models.CharField(max_length=20, verbose_name="Téléphone")
     adresse = models.TextField(verbose_name="Adresse")
     ville = models.CharField(max_length=100, verbose_name="Ville")
+    ville_ref = models.ForeignKey(
+        Ville, on_delete=models.SET_NULL, null=True, blank=True, editable=False, db_index=False,
+        related_name='entreprises'
+    )
+    secteur_activite_ref = models.ForeignKey(
+        SecteurActivite, on_delete=models.SET_NULL, null=True, blank=True, editable=False, db_index=False,
+        related_name='entreprises'
+    )
     site_web = models.URLField(verbose_name="Site web", blank=True)
     description = models.TextField(verbose_name="Description de l'entreprise", blank=True)
     contact_nom = models.CharField(max_length=100, verbose_name="Nom du contact")
@@ -106,6 +213,61 @@ class Entreprise(models.Model):
     class Meta:
         verbose_name = "Entreprise"
         verbose_name_plural = "Entreprises"
+        indexes = [
+            # Recherche par préfixe, filtres et tris de la liste d'administration
+            models.Index(Lower('nom_entreprise'), name='entreprise_nom_lower_idx'),
+            models.Index(Lower('contact_nom'), name='entreprise_contact_lower_idx'),
+            models.Index(fields=['-date_creation', '-id'], name='entreprise_date_creation_idx'),
+            models.Index(fields=['ville_ref', '-date_creation', '-id'], name='entreprise_ville_ref_idx'),
+            models.Index(fields=['secteur_activite_ref', '-date_creation', '-id'], name='entreprise_secteur_ref_idx'),
+        ]
     
     def __str__(self):
         return self.nom_entreprise
+
+
+class RevokedToken(models.Model):
+    """Jeton JWT révoqué avant son expiration (déconnexion, rotation du jeton de rafraîchissement)"""
+    
+    jti = models.CharField(max_length=255, unique=True, verbose_name="Identifiant du jeton")
+    user = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        null=True,
+        blank=True,
+        related_name='revoked_tokens',
+        verbose_name="Utilisateur"
+    )
+    expires_at = models.DateTimeField(db_index=True, verbose_name="Expiration du jeton")
+    created_at = models.DateTimeField(auto_now_add=True, db_index=True, verbose_name="Date de révocation")
+    
+    class Meta:
+        verbose_name = "Jeton révoqué"
+        verbose_name_plural = "Jetons révoqués"
+    
+    def __str__(self):
+        return self.jti
+
+
+class CandidateTerm(models.Model):
+    """Terme normalisé du CV et/ou du profil d'un stagiaire (index inversé de la recherche de profils)"""
+    
+    stagiaire = models.ForeignKey(Stagiaire, on_delete=models.CASCADE, related_name='search_terms')
+    term = models.CharField(max_length=64, verbose_name="Terme")
+    # Part du CV, conservée pour réindexer le profil sans relire le PDF
+    cv_weight = models.PositiveSmallIntegerField(default=0, verbose_name="Poids dans le CV")
+    weight = models.PositiveSmallIntegerField(default=1, verbose_name="Poids")
+    
+    class Meta:
+        verbose_name = "Terme de recherche"
+        verbose_name_plural = "Termes de recherche"
+        constraints = [
+            models.UniqueConstraint(fields=['stagiaire', 'term'], name='candidate_term_unique'),
+        ]
+        indexes = [
+            # Index couvrant : la recherche ne lit que l'index (terme -> stagiaires par poids décroissant)
+            models.Index(fields=['term', '-weight', 'stagiaire'], name='candidate_term_lookup_idx'),
+        ]
+    
+    def __str__(self):
+        return self.term
@@ -0,0 +1,241 @@
+"""
+Création de comptes en masse (cohortes de stagiaires, entreprises) à partir d'un CSV
+"""
+import csv
+import io
+import logging
+import os
+import tempfile
+import time
+import uuid
+from collections import Counter
+from itertools import islice
+
+from django.conf import settings
+from django.contrib.auth.hashers import make_password
+from django.core.exceptions import ValidationError
+from django.db import transaction
+from django.db.models.functions import Lower
+
+from jobs.models import Job
+from jobs.queue import enqueue
+from .hashing import hash_passwords
+from .models import User, Stagiaire, Entreprise
+from .references import assign_references
+
+logger = logging.getLogger('accounts')
+
+DEFAULTS = {
+    'CHUNK_SIZE': 1000,
+    'MAX_REPORTED_ERRORS': 100,
+    # CSV en attente de traitement (mots de passe en clair) : hors de MEDIA_ROOT, jamais servi
+    'UPLOAD_DIRECTORY': os.path.join(tempfile.gettempdir(), 'provisioning'),
+    'UPLOAD_RETENTION': 86400,  # secondes avant qu'un CSV dont la tâche n'est plus en attente soit supprimé
+}
+
+# Colonnes du CSV par rôle (en plus de 'email' et de 'password', facultatif)
+PROFILE_COLUMNS = {
+    'STAGIAIRE': (Stagiaire, ['nom', 'prenom', 'telephone', 'date_naissance', 'adresse', 'ville',
+                              'niveau_etude', 'domaine']),
+    'ENTREPRISE': (Entreprise, ['nom_entreprise', 'secteur_activite', 'telephone', 'adresse', 'ville',
+                                'site_web', 'description', 'contact_nom', 'contact_prenom',
+                                'contact_fonction']),
+}
+
+MIN_PASSWORD_LENGTH = 8
+
+
+def get_provisioning_setting(name):
+    """Lire un paramètre de settings.ACCOUNT_PROVISIONING avec sa valeur par défaut"""
+    return getattr(settings, 'ACCOUNT_PROVISIONING', {}).get(name, DEFAULTS[name])
+
+
+def build_accounts(row, role):
+    """Construire (user, profil, mot de passe) à partir d'une ligne, ou lever ValidationError"""
+    model, columns = PROFILE_COLUMNS[role]
+    email = User.objects.normalize_email((row.get('email') or '').strip())
+    password = row.get('password') or ''
+    if password and len(password) < MIN_PASSWORD_LENGTH:
+        raise ValidationError({'password': f"Au moins {MIN_PASSWORD_LENGTH} caractères"})
+
+    user = User(email=email, role=role)
+    user.full_clean(exclude=['password'], validate_unique=False)
+
+    values = {column: (row.get(column) or '').strip() for column in columns}
+    if role == 'STAGIAIRE':
+        values['date_naissance'] = values['date_naissance'] or None
+    profile = model(**values)
+    profile.full_clean(exclude=['user'], validate_unique=False)
+    return user, profile, password
+
+
+def _error_messages(error):
+    if hasattr(error, 'message_dict'):
+        return [f"{field} : {'; '.join(messages)}" for field, messages in error.message_dict.items()]
+    return error.messages
+
+
+def provision_accounts(stream, role, dry_run=False):
+    """
+    Lire le CSV par blocs de CHUNK_SIZE lignes, hacher les mots de passe dans
+    le pool de hachage (hashing.py), insérer utilisateurs et profils avec
+    bulk_create (sans signal par compte), puis mettre en file une seule tâche
+    de notification pour toute la cohorte de stagiaires. Les emails sont
+    comparés sans tenir compte de la casse, dans le fichier comme avec les
+    comptes existants.
+    Retourne un rapport : comptes créés, lignes ignorées et leurs erreurs.
+    """
+    if role not in PROFILE_COLUMNS:
+        raise ValueError(f"Rôle non pris en charge : {role}")
+    start = time.monotonic()
+    chunk_size = get_provisioning_setting('CHUNK_SIZE')
+    max_errors = get_provisioning_setting('MAX_REPORTED_ERRORS')
+    report = {'created': 0, 'skipped': 0, 'errors': []}
+    cohort = Counter()
+    names = {}
+    seen = set()
+
+    def skip(line, email, messages):
+        report['skipped'] += 1
+        if len(report['errors']) < max_errors:
+            report['errors'].append({'line': line, 'email': email, 'errors': messages})
+
+    rows = enumerate(csv.DictReader(stream), start=2)
+    while True:
+        chunk = list(islice(rows, chunk_size))
+        if not chunk:
+            break
+
+        valid = []
+        for line, row in chunk:
+            try:
+                user, profile, password = build_accounts(row, role)
+            except ValidationError as error:
+                skip(line, row.get('email'), _error_messages(error))
+                continue
+            key = user.email.lower()
+            if key in seen:
+                skip(line, user.email, ["Email en double dans le fichier"])
+                continue
+            seen.add(key)
+            valid.append((line, user, profile, password))
+
+        existing = set(
+            User.objects.annotate(email_key=Lower('email')).filter(
+                email_key__in=[user.email.lower() for _, user, _, _ in valid]
+            ).values_list('email_key', flat=True)
+        )
+        accounts = []
+        for line, user, profile, password in valid:
+            if user.email.lower() in existing:
+                skip(line, user.email, ["Un compte existe déjà avec cet email"])
+            else:
+                accounts.append((user, profile, password))
+        if not accounts or dry_run:
+            report['created'] += len(accounts)
+            continue
+
+        # Les mots de passe absents donnent un mot de passe inutilisable (réinitialisation par email)
+        passwords = [password for _, _, password in accounts if password]
+        hashes = iter(hash_passwords(passwords))
+        for user, _, password in accounts:
+            user.password = next(hashes) if password else make_password(None)
+
+        with transaction.atomic():
+            users = User.objects.bulk_create([user for user, _, _ in accounts])
+            for user, (_, profile, _) in zip(users, accounts):
+                profile.user = user
+            # bulk_create() n'envoie pas pre_save : valeurs de référence résolues pour tout le lot
+            assign_references([profile for _, profile, _ in accounts])
+            model = PROFILE_COLUMNS[role][0]
+            model.objects.bulk_create([profile for _, profile, _ in accounts])
+
+        report['created'] += len(accounts)
+        if role == 'STAGIAIRE':
+            for _, profile, _ in accounts:
+                domaine = (profile.domaine_ref_id, profile.domaine)
+                cohort[domaine] += 1
+                names.setdefault(domaine, f"{profile.prenom} {profile.nom}")
+
+    if cohort:
+        enqueue(
+            'notifications.nouveaux_stagiaires',
+            groupes=[
+                {'domaine': domaine, 'domaine_id': domaine_id, 'count': count, 'stagiaire': names[domaine_id, domaine]}
+                for (domaine_id, domaine), count in cohort.items()
+            ],
+            # Clé d'idempotence : la tâche rejouée ne notifie pas deux fois la cohorte
+            cohorte=uuid.uuid4().hex
+        )
+
+    report['duration_seconds'] = round(time.monotonic() - start, 3)
+    logger.info("Création de comptes en masse (%s) : %s créés, %s ignorés en %ss",
+                role, report['created'], report['skipped'], report['duration_seconds'])
+    return report
+
+
+def upload_path(name):
+    """Chemin d'un CSV en attente d'après son nom (sans répertoire)"""
+    return os.path.join(get_provisioning_setting('UPLOAD_DIRECTORY'), os.path.basename(name))
+
+
+def store_upload(uploaded_file):
+    """
+    Enregistrer le CSV téléversé pour la tâche de création, lisible par le
+    seul utilisateur du serveur (0600, dans un répertoire 0700) ; retourne son nom
+    """
+    directory = get_provisioning_setting('UPLOAD_DIRECTORY')
+    os.makedirs(directory, mode=0o700, exist_ok=True)
+    name = f"{uuid.uuid4().hex}.csv"
+    fd = os.open(upload_path(name), os.O_WRONLY | os.O_CREAT | os.O_EXCL, 0o600)
+    with os.fdopen(fd, 'wb') as file:
+        for chunk in uploaded_file.chunks():
+            file.write(chunk)
+    return name
+
+
+def discard_upload(name):
+    """Supprimer un CSV en attente (traité, ou dont la tâche n'a pas pu être créée)"""
+    try:
+        os.remove(upload_path(name))
+    except FileNotFoundError:
+        pass
+
+
+def provision_stored_file(name, role, dry_run=False):
+    """Traiter un CSV enregistré par store_upload, puis le supprimer"""
+    try:
+        with open(upload_path(name), 'rb') as file:
+            stream = io.TextIOWrapper(file, encoding='utf-8-sig', newline='')
+            return provision_accounts(stream, role, dry_run=dry_run)
+    finally:
+        discard_upload(name)
+
+
+def sweep_uploads(now=None):
+    """
+    Supprimer les CSV abandonnés (worker arrêté pendant le traitement, tâche
+    supprimée) : ceux dont aucune tâche n'est en attente ou en cours, plus
+    anciens que UPLOAD_RETENTION. Retourne le nombre de fichiers supprimés.
+    """
+    now = now or time.time()
+    directory = get_provisioning_setting('UPLOAD_DIRECTORY')
+    if not os.path.isdir(directory):
+        return 0
+    pending = set(Job.objects.filter(
+        name='accounts.provision_accounts', status__in=['PENDING', 'RUNNING']
+    ).values_list('payload__path', flat=True))
+    deleted = 0
+    for entry in os.scandir(directory):
+        if entry.name in pending or not entry.is_file(follow_symlinks=False):
+            continue
+        try:
+            if now - entry.stat().st_mtime < get_provisioning_setting('UPLOAD_RETENTION'):
+                continue
+            os.remove(entry.path)
+        except FileNotFoundError:
+            continue
+        deleted += 1
+    if deleted:
+        logger.info("CSV de création de comptes abandonnés supprimés : %s", deleted)
+    return deleted
@@ -0,0 +1,95 @@
+"""
+Valeurs de référence (villes, domaines, secteurs d'activité) : résolution
+du texte saisi à l'enregistrement, alias, et filtres sur les clés entières
+"""
+from django.db import transaction
+from django.utils import timezone
+
+from .models import Domaine, SecteurActivite, Ville, reference_key
+
+# Champs texte doublés d'une clé étrangère <champ>_ref, par modèle
+REFERENCE_FIELDS = {
+    'accounts.Stagiaire': {'ville': Ville, 'domaine': Domaine},
+    'accounts.Entreprise': {'ville': Ville, 'secteur_activite': SecteurActivite},
+    'stages.OffreStage': {'ville': Ville, 'domaine': Domaine},
+}
+
+
+def _canonical(value):
+    return value.alias_de if value.alias_de_id else value
+
+
+def find_reference(model, nom):
+    """Valeur canonique correspondant au texte (alias compris), ou None si elle n'existe pas"""
+    key = reference_key(nom)
+    if not key:
+        return None
+    value = model.objects.select_related('alias_de').filter(cle=key).first()
+    return _canonical(value) if value is not None else None
+
+
+def resolve_references(model, noms):
+    """{texte: valeur canonique} pour des textes saisis ; les valeurs inconnues sont créées"""
+    keys = {nom: reference_key(nom) for nom in set(noms)}
+    keys = {nom: key for nom, key in keys.items() if key}
+    values = {
+        value.cle: _canonical(value)
+        for value in model.objects.select_related('alias_de').filter(cle__in=set(keys.values()))
+    }
+    for nom, key in keys.items():
+        if key not in values:
+            value, _ = model.objects.select_related('alias_de').get_or_create(
+                cle=key, defaults={'nom': ' '.join(nom.split())[:100]}
+            )
+            values[key] = _canonical(value)
+    return {nom: values[key] for nom, key in keys.items()}
+
+
+def assign_references(instances):
+    """
+    Renseigner les clés <champ>_ref d'instances d'un même modèle (avant
+    save() ou bulk_create()) et remplacer le texte par le nom canonique
+    """
+    if not instances:
+        return
+    for field, model in REFERENCE_FIELDS[instances[0]._meta.label].items():
+        resolved = resolve_references(model, [getattr(instance, field) or '' for instance in instances])
+        for instance in instances:
+            value = resolved.get(getattr(instance, field) or '')
+            setattr(instance, f'{field}_ref', value)
+            if value is not None:
+                setattr(instance, field, value.nom)
+
+
+def propagate_reference(value):
+    """
+    Valeur devenue alias, ou valeur canonique renommée : reporter la valeur
+    canonique et son nom sur les profils et offres qui la référencent
+    """
+    target = _canonical(value)
+    with transaction.atomic():
+        for relation in value._meta.related_objects:
+            field = relation.field.name
+            if not field.endswith('_ref'):
+                continue
+            text_field = field[:-len('_ref')]
+            queryset = relation.related_model.objects.filter(**{field: value})
+            if target == value:
+                queryset = queryset.exclude(**{text_field: target.nom})
+            changes = {field: target, text_field: target.nom}
+            if any(model_field.name == 'date_modification' for model_field in relation.related_model._meta.fields):
+                # update() ne touche pas aux champs auto_now : les index qui en dépendent doivent voir le changement
+                changes['date_modification'] = timezone.now()
+            queryset.update(**changes)
+        if target != value:
+            # Pas de chaîne d'alias : les alias de l'alias pointent vers la valeur canonique
+            type(value).objects.filter(alias_de=value).update(alias_de=target)
+
+
+def filter_reference(queryset, field, nom):
+    """Filtrer sur la clé <field>_ref d'après un texte (alias compris) ; aucun résultat si la valeur est inconnue"""
+    model = queryset.model._meta.get_field(f'{field}_ref').related_model
+    value = find_reference(model, nom)
+    if value is None:
+        return queryset.none()
+    return queryset.filter(**{f'{field}_ref': value})
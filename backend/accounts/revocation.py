@@ -0,0 +1,173 @@
+"""
+Révocation des jetons JWT : stockage par jti et filtre de Bloom en mémoire
+pour que la vérification courante (« non révoqué ») ne coûte aucune requête
+"""
+import hashlib
+import math
+import threading
+import time
+from datetime import datetime, timedelta, timezone as dt_timezone
+
+from django.conf import settings
+from django.utils import timezone
+from rest_framework_simplejwt.settings import api_settings
+
+from .models import RevokedToken
+
+DEFAULTS = {
+    'SYNC_INTERVAL': 5,  # secondes entre deux lectures des révocations faites par les autres processus
+    'SYNC_OVERLAP': 10,  # secondes relues à chaque lecture (révocations validées en retard)
+    'REBUILD_INTERVAL': 3600,  # secondes avant de reconstruire le filtre (oublier les jetons expirés)
+    'CAPACITY': 100000,
+    'ERROR_RATE': 0.001,
+}
+
+
+def get_revocation_setting(name):
+    """Lire un paramètre de settings.TOKEN_REVOCATION avec sa valeur par défaut"""
+    return getattr(settings, 'TOKEN_REVOCATION', {}).get(name, DEFAULTS[name])
+
+
+class BloomFilter:
+    """Filtre de Bloom : aucun faux négatif, faux positifs au taux error_rate pour capacity éléments"""
+
+    def __init__(self, capacity, error_rate):
+        self.capacity = capacity
+        self.size = max(8, int(-capacity * math.log(error_rate) / (math.log(2) ** 2)))
+        self.hash_count = max(1, round(self.size / capacity * math.log(2)))
+        self.bits = bytearray((self.size + 7) // 8)
+        self.count = 0
+
+    def _positions(self, key):
+        digest = hashlib.blake2b(key.encode(), digest_size=16).digest()
+        h1 = int.from_bytes(digest[:8], 'little')
+        h2 = int.from_bytes(digest[8:], 'little') | 1
+        return [(h1 + i * h2) % self.size for i in range(self.hash_count)]
+
+    def add(self, key):
+        positions = self._positions(key)
+        # Idempotent : une clé déjà présente n'est pas recomptée
+        if all(self.bits[position >> 3] & (1 << (position & 7)) for position in positions):
+            return
+        for position in positions:
+            self.bits[position >> 3] |= 1 << (position & 7)
+        self.count += 1
+
+    def __contains__(self, key):
+        return all(self.bits[position >> 3] & (1 << (position & 7)) for position in self._positions(key))
+
+
+class RevocationStore:
+    """
+    Jetons révoqués : la table RevokedToken fait foi, le filtre de Bloom
+    écarte sans requête les jetons qui n'y figurent pas. Les révocations
+    faites dans ce processus sont visibles immédiatement, celles des autres
+    processus au plus tard après SYNC_INTERVAL secondes.
+
+    La lecture incrémentale porte sur created_at et relit SYNC_OVERLAP
+    secondes : une révocation validée après une autre plus récente (id ou
+    date antérieurs) n'est pas manquée, et add() ignore celles déjà lues.
+    Les requêtes se font hors du verrou ; la reconstruction prépare un
+    nouveau filtre pendant que l'ancien continue de répondre.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._bloom = None
+        self._synced_since = None
+        self._synced_at = 0
+        self._built_at = 0
+        self._rebuilding = False
+        self._pending = []
+
+    def _rebuild(self, now):
+        since = timezone.now()
+        active = RevokedToken.objects.filter(expires_at__gt=since)
+        capacity = max(get_revocation_setting('CAPACITY'), 2 * active.count())
+        bloom = BloomFilter(capacity, get_revocation_setting('ERROR_RATE'))
+        for jti in active.values_list('jti', flat=True).iterator(chunk_size=10000):
+            bloom.add(jti)
+        with self._lock:
+            # Révocations faites dans ce processus pendant la construction
+            for jti in self._pending:
+                bloom.add(jti)
+            self._bloom = bloom
+            self._synced_since = since
+            self._synced_at = self._built_at = now
+            self._rebuilding = False
+            self._pending = []
+
+    def _sync(self, since):
+        overlap = timedelta(seconds=get_revocation_setting('SYNC_OVERLAP'))
+        jtis = list(RevokedToken.objects.filter(created_at__gte=since - overlap).values_list('jti', flat=True))
+        with self._lock:
+            for jti in jtis:
+                self._bloom.add(jti)
+            return self._bloom.count > self._bloom.capacity
+
+    def _refresh(self):
+        """Mettre le filtre à jour si nécessaire ; une seule mise à jour à la fois par processus"""
+        now = time.monotonic()
+        with self._lock:
+            if self._rebuilding:
+                return
+            rebuild = self._bloom is None or now - self._built_at >= get_revocation_setting('REBUILD_INTERVAL')
+            if not rebuild:
+                if now - self._synced_at < get_revocation_setting('SYNC_INTERVAL'):
+                    return
+                since, self._synced_since = self._synced_since, timezone.now()
+                self._synced_at = now
+            self._rebuilding = rebuild
+        if not rebuild and self._sync(since):
+            with self._lock:
+                if self._rebuilding:
+                    return
+                self._rebuilding = rebuild = True
+        if rebuild:
+            try:
+                self._rebuild(now)
+            except Exception:
+                with self._lock:
+                    self._rebuilding = False
+                    self._pending = []
+                raise
+
+    def is_revoked(self, jti):
+        self._refresh()
+        with self._lock:
+            maybe_revoked = self._bloom is None or jti in self._bloom
+        if not maybe_revoked:
+            return False
+        # Présent dans le filtre (faux positif possible) ou filtre en construction : confirmer en base
+        return RevokedToken.objects.filter(jti=jti).exists()
+
+    def revoke(self, token, user_id=None):
+        """Révoquer un jeton simplejwt (accès ou rafraîchissement) jusqu'à son expiration"""
+        jti = token[api_settings.JTI_CLAIM]
+        expires_at = datetime.fromtimestamp(token['exp'], tz=dt_timezone.utc)
+        RevokedToken.objects.get_or_create(jti=jti, defaults={'user_id': user_id, 'expires_at': expires_at})
+        with self._lock:
+            if self._bloom is not None:
+                self._bloom.add(jti)
+            if self._rebuilding:
+                self._pending.append(jti)
+
+
+revocation_store = RevocationStore()
+
+
+def issued_before_revocation(token, user):
+    """
+    Le jeton a été émis avant la révocation de tous les jetons de l'utilisateur.
+    iat est en secondes entières : la révocation est tronquée à la seconde pour
+    qu'un jeton émis juste après, dans la même seconde, reste valide.
+    """
+    if user.tokens_revoked_at is None:
+        return False
+    return token.get('iat', 0) < int(user.tokens_revoked_at.timestamp())
+
+
+def purge_expired_tokens():
+    """Supprimer les révocations dont le jeton a de toute façon expiré"""
+    deleted, _ = RevokedToken.objects.filter(expires_at__lte=timezone.now()).delete()
+    return deleted
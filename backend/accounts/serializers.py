@@ -2,8 +2,15 @@
 Serializers pour la gestion des utilisateurs
 """
 from rest_framework import serializers
+from rest_framework_simplejwt.exceptions import InvalidToken
+from rest_framework_simplejwt.serializers import TokenRefreshSerializer
+from rest_framework_simplejwt.settings import api_settings
 from django.contrib.auth import get_user_model
+from django.utils import timezone
+from .cache import get_cached_user
+from .cv_delivery import signed_cv_url
 from .models import Stagiaire, Entreprise
+from .revocation import issued_before_revocation, revocation_store
 
 User = get_user_model()
 
@@ -20,7 +27,8 @@ class StagiaireSerializer(serializers.ModelSerializer):
             'adresse', 'ville', 'niveau_etude', 'domaine', 'cv_file', 'cv_file_url',
             'date_creation', 'date_modification', 'user'
         ]
-        read_only_fields = ['id', 'date_creation', 'date_modification', 'user', 'cv_file_url']
+        # Le CV se dépose par /api/auth/cv/ (validation et stockage adressé par le contenu)
+        read_only_fields = ['id', 'date_creation', 'date_modification', 'user', 'cv_file', 'cv_file_url']
     
     def get_user(self, obj):
         """Récupérer l'email de l'utilisateur"""
@@ -30,12 +38,18 @@ class StagiaireSerializer(serializers.ModelSerializer):
     
     def get_cv_file_url(self, obj):
         """Récupérer l'URL du CV"""
-        if obj.cv_file:
-            request = self.context.get('request')
-            if request:
-                return request.build_absolute_uri(obj.cv_file.url)
-            return obj.cv_file.url
-        return None
+        # Lien signé temporaire : le fichier n'est pas exposé sous /media/
+        return signed_cv_url(obj, self.context.get('request'))
+
+
+class TalentSerializer(serializers.ModelSerializer):
+    """Serializer pour un résultat de la recherche de profils (sans coordonnées)"""
+    score = serializers.IntegerField(read_only=True)
+    
+    class Meta:
+        model = Stagiaire
+        fields = ['id', 'nom', 'prenom', 'ville', 'niveau_etude', 'domaine', 'score']
+        read_only_fields = fields
 
 
 class StagiaireAdminSerializer(serializers.ModelSerializer):
@@ -53,7 +67,7 @@ class StagiaireAdminSerializer(serializers.ModelSerializer):
             'adresse', 'ville', 'niveau_etude', 'domaine', 'cv_file', 'cv_file_url',
             'date_creation', 'date_modification', 'user', 'user_id', 'user_email', 'user_is_active'
         ]
-        read_only_fields = ['id', 'date_creation', 'date_modification', 'cv_file_url']
+        read_only_fields = ['id', 'date_creation', 'date_modification', 'cv_file', 'cv_file_url']
     
     def get_user(self, obj):
         """Récupérer l'email de l'utilisateur"""
@@ -63,12 +77,8 @@ class StagiaireAdminSerializer(serializers.ModelSerializer):
     
     def get_cv_file_url(self, obj):
         """Récupérer l'URL du CV"""
-        if obj.cv_file:
-            request = self.context.get('request')
-            if request:
-                return request.build_absolute_uri(obj.cv_file.url)
-            return obj.cv_file.url
-        return None
+        # Lien signé temporaire : le fichier n'est pas exposé sous /media/
+        return signed_cv_url(obj, self.context.get('request'))
     
     def update(self, instance, validated_data):
         """Mettre à jour le stagiaire et éventuellement l'utilisateur associé"""
@@ -85,6 +95,9 @@ class StagiaireAdminSerializer(serializers.ModelSerializer):
                 instance.user.email = user_email
             if user_is_active is not None:
                 instance.user.is_active = user_is_active
+                if not user_is_active:
+                    # Désactivation : tous les jetons déjà émis deviennent invalides
+                    instance.user.tokens_revoked_at = timezone.now()
             if user_id is not None and user_id != instance.user.id:
                 # Changer l'utilisateur associé (rare mais possible pour admin)
                 instance.user = User.objects.get(id=user_id)
@@ -152,6 +165,9 @@ class EntrepriseAdminSerializer(serializers.ModelSerializer):
                 instance.user.email = user_email
             if user_is_active is not None:
                 instance.user.is_active = user_is_active
+                if not user_is_active:
+                    # Désactivation : tous les jetons déjà émis deviennent invalides
+                    instance.user.tokens_revoked_at = timezone.now()
             if user_id is not None and user_id != instance.user.id:
                 # Changer l'utilisateur associé (rare mais possible pour admin)
                 instance.user = User.objects.get(id=user_id)
@@ -291,3 +307,34 @@ class LoginSerializer(serializers.Serializer):
     """Serializer pour la connexion"""
     email = serializers.EmailField()
     password = serializers.CharField(write_only=True)
+
+
+class RevocationAwareTokenRefreshSerializer(TokenRefreshSerializer):
+    """
+    Rafraîchissement refusé si le jeton a été révoqué (déconnexion, rotation)
+    ou si le compte a été désactivé depuis son émission
+    """
+    
+    def validate(self, attrs):
+        refresh = self.token_class(attrs['refresh'])
+        
+        if revocation_store.is_revoked(refresh[api_settings.JTI_CLAIM]):
+            raise InvalidToken("Ce jeton a été révoqué")
+        try:
+            user = get_cached_user(refresh[api_settings.USER_ID_CLAIM])
+        except User.DoesNotExist:
+            raise InvalidToken("Utilisateur introuvable")
+        if not user.is_active or issued_before_revocation(refresh, user):
+            raise InvalidToken("Ce jeton a été révoqué")
+        
+        data = {'access': str(refresh.access_token)}
+        
+        if api_settings.ROTATE_REFRESH_TOKENS:
+            if api_settings.BLACKLIST_AFTER_ROTATION:
+                revocation_store.revoke(refresh, user_id=user.id)
+            refresh.set_jti()
+            refresh.set_exp()
+            refresh.set_iat()
+            data['refresh'] = str(refresh)
+        
+        return data
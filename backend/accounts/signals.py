@@ -0,0 +1,46 @@
+"""
+Signaux pour invalider le cache des utilisateurs authentifiés et
+normaliser les valeurs de référence
+"""
+from django.db.models.signals import post_delete, post_save, pre_save
+from django.dispatch import receiver
+from .cache import user_cache
+from .models import User, Stagiaire, Entreprise, Ville, Domaine, SecteurActivite
+from .references import assign_references, propagate_reference
+
+
+@receiver([post_save, post_delete], sender=User)
+def invalidate_user(sender, instance, **kwargs):
+    """Désactivation, changement de rôle ou de mot de passe : oublier l'utilisateur en cache"""
+    user_cache.invalidate(instance.pk)
+
+
+@receiver([post_save, post_delete], sender=Stagiaire)
+@receiver([post_save, post_delete], sender=Entreprise)
+def invalidate_profile_user(sender, instance, **kwargs):
+    """Le profil est mis en cache avec l'utilisateur"""
+    user_cache.invalidate(instance.user_id)
+
+
+@receiver(post_save, sender=User)
+def reindex_stagiaire(sender, instance, update_fields=None, **kwargs):
+    """Activation ou désactivation : le stagiaire entre dans l'index de recherche ou en sort"""
+    if instance.role != 'STAGIAIRE' or update_fields == frozenset({'last_login'}):
+        return
+    Stagiaire.objects.filter(user_id=instance.pk).update(search_indexed_at=None)
+
+
+@receiver(pre_save, sender=Stagiaire)
+@receiver(pre_save, sender=Entreprise)
+def resolve_profile_references(sender, instance, **kwargs):
+    """Ville, domaine, secteur : clé de la valeur de référence et nom canonique"""
+    assign_references([instance])
+
+
+@receiver(post_save, sender=Ville)
+@receiver(post_save, sender=Domaine)
+@receiver(post_save, sender=SecteurActivite)
+def update_reference_users(sender, instance, created, **kwargs):
+    """Alias déclaré ou nom modifié : reporter la valeur canonique sur les profils et offres"""
+    if not created:
+        propagate_reference(instance)
@@ -0,0 +1,209 @@
+"""
+Recherche de profils : indexation incrémentale des CV et des profils
+stagiaires dans CandidateTerm, et requêtes par mots-clés
+"""
+import logging
+import multiprocessing
+import time
+from collections import defaultdict
+from concurrent.futures import ProcessPoolExecutor
+from itertools import islice
+
+from django.conf import settings
+from django.core.files.storage import default_storage
+from django.db import transaction
+from django.db.models import Count, F, Q, Sum
+from django.utils import timezone
+
+from . import cv_text
+from .cv_text import analyze_cv, normalize_terms
+from .models import CandidateTerm, Stagiaire
+from .references import filter_reference
+
+logger = logging.getLogger('accounts')
+
+DEFAULTS = {
+    'BATCH_SIZE': 500,  # stagiaires indexés par transaction
+    'PROCESSES': None,  # processus d'extraction (None : un par cœur)
+    'MAX_CV_WEIGHT': 5,  # plafond des occurrences d'un terme dans un CV
+    'PROFILE_WEIGHT': 5,  # poids d'un terme du domaine, du niveau d'études ou de la ville
+    'MAX_QUERY_TERMS': 10,
+}
+
+PROFILE_FIELDS = ('domaine', 'niveau_etude', 'ville')
+
+
+def get_search_setting(name):
+    """Lire un paramètre de settings.TALENT_SEARCH avec sa valeur par défaut"""
+    return getattr(settings, 'TALENT_SEARCH', {}).get(name, DEFAULTS[name])
+
+
+def stale_candidates():
+    """Stagiaires jamais indexés ou modifiés depuis leur dernière indexation"""
+    return Stagiaire.objects.filter(
+        Q(search_indexed_at__isnull=True) | Q(date_modification__gt=F('search_indexed_at'))
+    )
+
+
+def _profile_terms(stagiaire):
+    text = ' '.join(getattr(stagiaire, field) or '' for field in PROFILE_FIELDS)
+    return normalize_terms(text)
+
+
+def _cv_changed(stagiaire):
+    if not stagiaire.cv_file:
+        return bool(stagiaire.cv_indexed_sha256)
+    # CV sans empreinte : déposé avant le stockage adressé par le contenu
+    return not stagiaire.cv_sha256 or stagiaire.cv_sha256 != stagiaire.cv_indexed_sha256
+
+
+def _analyze(paths, executor):
+    if executor is None or len(paths) < 2:
+        return [analyze_cv(path) for path in paths]
+    return list(executor.map(analyze_cv, paths, chunksize=max(1, len(paths) // 16)))
+
+
+def _index_batch(stagiaires, started, executor):
+    """
+    Réindexer un lot : termes du profil toujours, termes du CV relus
+    seulement si le fichier a changé. Un compte désactivé n'a plus aucun
+    terme indexé.
+    """
+    max_cv_weight = get_search_setting('MAX_CV_WEIGHT')
+    profile_weight = get_search_setting('PROFILE_WEIGHT')
+    active = [stagiaire for stagiaire in stagiaires if stagiaire.user.is_active]
+
+    # Un même fichier (même contenu) n'est analysé qu'une fois par lot
+    changed = [stagiaire for stagiaire in active if _cv_changed(stagiaire)]
+    names = sorted({stagiaire.cv_file.name for stagiaire in changed if stagiaire.cv_file})
+    analyses = dict(zip(names, _analyze([default_storage.path(name) for name in names], executor)))
+
+    cv_weights = defaultdict(dict)
+    for stagiaire in changed:
+        sha256, counts = analyses.get(stagiaire.cv_file.name, (None, {})) if stagiaire.cv_file else (None, {})
+        if stagiaire.cv_file and sha256 is None:
+            logger.warning("CV introuvable pour le stagiaire %s : %s", stagiaire.id, stagiaire.cv_file.name)
+        stagiaire.cv_indexed_sha256 = sha256 or ''
+        cv_weights[stagiaire.id] = {term: min(count, max_cv_weight) for term, count in counts.items()}
+    changed_ids = {stagiaire.id for stagiaire in changed}
+    unchanged = [stagiaire.id for stagiaire in active if stagiaire.id not in changed_ids]
+    for stagiaire_id, term, cv_weight in CandidateTerm.objects.filter(
+        stagiaire_id__in=unchanged, cv_weight__gt=0
+    ).values_list('stagiaire_id', 'term', 'cv_weight'):
+        cv_weights[stagiaire_id][term] = cv_weight
+
+    # Une ligne par terme : le CV et le profil s'additionnent
+    terms = []
+    for stagiaire in active:
+        weights = cv_weights[stagiaire.id]
+        profile = _profile_terms(stagiaire)
+        for term in weights.keys() | profile.keys():
+            cv_weight = weights.get(term, 0)
+            terms.append(CandidateTerm(
+                stagiaire_id=stagiaire.id, term=term, cv_weight=cv_weight,
+                weight=cv_weight + (profile_weight if term in profile else 0)
+            ))
+
+    # Compte désactivé : le CV sera relu s'il est réactivé
+    inactive = [stagiaire.id for stagiaire in stagiaires if not stagiaire.user.is_active]
+
+    ids = [stagiaire.id for stagiaire in stagiaires]
+    with transaction.atomic():
+        CandidateTerm.objects.filter(stagiaire_id__in=ids).delete()
+        CandidateTerm.objects.bulk_create(terms, batch_size=5000)
+        # update() : date_modification reste inchangée, le stagiaire n'est plus à réindexer
+        Stagiaire.objects.filter(id__in=ids).update(search_indexed_at=started)
+        Stagiaire.objects.filter(id__in=inactive).update(cv_indexed_sha256='')
+        # cv_file et cv_sha256 ne sont jamais écrits ici : l'empreinte indexée n'est enregistrée que si
+        # le CV est toujours celui qui a été lu (un dépôt pendant le lot sera indexé au prochain passage)
+        for stagiaire in changed:
+            if stagiaire.cv_file:
+                same_file = Q(cv_file=stagiaire.cv_file.name)
+            else:
+                same_file = Q(cv_file='') | Q(cv_file__isnull=True)
+            Stagiaire.objects.filter(same_file, id=stagiaire.id, cv_sha256=stagiaire.cv_sha256).update(
+                cv_indexed_sha256=stagiaire.cv_indexed_sha256
+            )
+    return len(changed)
+
+
+def index_candidates(stagiaire_ids=None, limit=None):
+    """
+    Indexer les stagiaires donnés, ou ceux qui ont changé depuis leur
+    dernière indexation. Le texte des CV est extrait dans un pool de
+    processus. Retourne des statistiques.
+    """
+    if cv_text.pypdf is None:
+        logger.error("pypdf n'est pas installé : le texte des CV n'est pas indexé (pip install -r requirements.txt)")
+    start = time.monotonic()
+    # Date lue avant les stagiaires : une modification pendant l'indexation sera reprise au prochain passage
+    started = timezone.now()
+    queryset = Stagiaire.objects.filter(id__in=stagiaire_ids) if stagiaire_ids is not None else stale_candidates()
+    ids = iter(list(queryset.order_by('id').values_list('id', flat=True)[:limit]))
+    batch_size = get_search_setting('BATCH_SIZE')
+    stats = {'stagiaires': 0, 'cvs': 0}
+
+    executor = None
+    try:
+        while True:
+            batch_ids = list(islice(ids, batch_size))
+            if not batch_ids:
+                break
+            stagiaires = list(Stagiaire.objects.filter(id__in=batch_ids).select_related('user').only(
+                'id', 'cv_file', 'cv_sha256', 'cv_indexed_sha256', 'user__is_active', *PROFILE_FIELDS
+            ))
+            if executor is None and len(stagiaires) > 1:
+                # 'spawn' : un enfant forké depuis le worker de tâches hériterait de ses connexions et verrous
+                executor = ProcessPoolExecutor(
+                    max_workers=get_search_setting('PROCESSES'),
+                    mp_context=multiprocessing.get_context('spawn')
+                )
+            stats['cvs'] += _index_batch(stagiaires, started, executor)
+            stats['stagiaires'] += len(stagiaires)
+    finally:
+        if executor is not None:
+            executor.shutdown()
+
+    stats['duration_seconds'] = round(time.monotonic() - start, 3)
+    if stats['stagiaires']:
+        logger.info("Indexation des profils : %s", stats)
+    return stats
+
+
+def parse_query(query):
+    """Mots-clés normalisés comme les termes indexés, sans doublon"""
+    return list(normalize_terms(query or ''))[:get_search_setting('MAX_QUERY_TERMS')]
+
+
+def search_candidates(terms, ville=None, domaine=None, niveau_etude=None):
+    """
+    Stagiaires dont le CV ou le profil contient tous les termes, triés par
+    score (somme des poids). Retourne un queryset de dicts {stagiaire_id, score}.
+    Les comptes désactivés ne sont pas indexés : aucune jointure sur les
+    utilisateurs n'est nécessaire.
+    """
+    queryset = CandidateTerm.objects.all()
+    if ville or domaine or niveau_etude:
+        stagiaires = Stagiaire.objects.all()
+        if ville:
+            stagiaires = filter_reference(stagiaires, 'ville', ville)
+        if domaine:
+            stagiaires = filter_reference(stagiaires, 'domaine', domaine)
+        if niveau_etude:
+            stagiaires = stagiaires.filter(niveau_etude=niveau_etude)
+        queryset = queryset.filter(stagiaire_id__in=stagiaires.values('id'))
+    if len(terms) == 1:
+        # Un seul terme : lecture de l'index dans l'ordre, sans regroupement ni tri
+        return (
+            queryset.filter(term=terms[0])
+            .annotate(score=F('weight'))
+            .values('stagiaire_id', 'score')
+            .order_by('-weight', 'stagiaire_id')
+        )
+    return (
+        queryset.filter(term__in=terms)
+        .values('stagiaire_id')
+        .annotate(matched=Count('stagiaire_id'), score=Sum('weight'))
+        .filter(matched=len(terms))
+        .order_by('-score', 'stagiaire_id')
+    )
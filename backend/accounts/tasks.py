@@ -0,0 +1,34 @@
+"""
+Tâches en arrière-plan des comptes utilisateurs
+"""
+from jobs.queue import job
+from .cv_storage import sweep_cv_files
+from .provisioning import provision_stored_file, sweep_uploads
+from .revocation import purge_expired_tokens
+from .talent_search import index_candidates
+
+
+@job('accounts.purge_revoked_tokens')
+def purger_jetons_revoques():
+    """Supprimer les révocations de jetons expirés"""
+    purge_expired_tokens()
+
+
+@job('accounts.sweep_cv_files')
+def nettoyer_fichiers_cv():
+    """Supprimer les CV remplacés ou orphelins, les envois abandonnés et les CSV de création de comptes"""
+    sweep_cv_files()
+    sweep_uploads()
+
+
+@job('accounts.index_candidates')
+def indexer_candidats(stagiaire_ids=None):
+    """Indexer pour la recherche de profils les stagiaires donnés, ou tous ceux modifiés"""
+    index_candidates(stagiaire_ids)
+
+
+# Pas de nouvelle tentative : le fichier déposé est supprimé après traitement
+@job('accounts.provision_accounts', max_attempts=1)
+def creer_comptes(path, role, dry_run=False):
+    """Créer les comptes d'un CSV déposé par un admin ; le rapport devient le résultat de la tâche"""
+    return provision_stored_file(path, role, dry_run=dry_run)
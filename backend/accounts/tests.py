@@ -0,0 +1,436 @@
+"""
+Tests des comptes utilisateurs
+"""
+import importlib
+import io
+import os
+import tempfile
+import threading
+from datetime import datetime, timedelta, timezone
+from unittest import mock
+
+from django.apps import apps
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.test import TestCase
+from django.urls import reverse
+from rest_framework.test import APIClient
+from rest_framework_simplejwt.tokens import AccessToken
+
+from jobs.models import Job
+from . import revocation, throttling
+from .cache import get_cached_user, user_cache
+from .cv_delivery import signed_cv_url
+from .models import Domaine, Entreprise, RevokedToken, Stagiaire, User, Ville
+from .provisioning import provision_accounts, store_upload, sweep_uploads
+from .references import filter_reference, find_reference
+from .revocation import RevocationStore, issued_before_revocation
+from .talent_search import analyze_cv, index_candidates, search_candidates
+from .throttling import CacheBucketBackend, LocalBucketBackend
+
+CSV_ENTETE = "email,password,nom,prenom,telephone,date_naissance,adresse,ville,niveau_etude,domaine\n"
+
+
+def ligne(email):
+    return f"{email},motdepasse1,Nom,Prénom,0600000000,,,Lyon,Master,Informatique\n"
+
+
+def pdf(texte):
+    """PDF d'une page contenant le texte (police Helvetica standard)"""
+    content = f"BT /F1 12 Tf 72 720 Td ({texte}) Tj ET".encode()
+    objects = [
+        b"<< /Type /Catalog /Pages 2 0 R >>",
+        b"<< /Type /Pages /Kids [3 0 R] /Count 1 >>",
+        b"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 612 792] /Contents 4 0 R "
+        b"/Resources << /Font << /F1 5 0 R >> >> >>",
+        b"<< /Length %d >>\nstream\n%s\nendstream" % (len(content), content),
+        b"<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica >>",
+    ]
+    data = b"%PDF-1.4\n"
+    offsets = []
+    for number, obj in enumerate(objects, start=1):
+        offsets.append(len(data))
+        data += b"%d 0 obj\n%s\nendobj\n" % (number, obj)
+    xref = len(data)
+    data += b"xref\n0 %d\n0000000000 65535 f \n" % (len(objects) + 1)
+    data += b"".join(b"%010d 00000 n \n" % offset for offset in offsets)
+    data += b"trailer\n<< /Size %d /Root 1 0 R >>\nstartxref\n%d\n%%%%EOF\n" % (len(objects) + 1, xref)
+    return data
+
+
+class CreationComptesTests(TestCase):
+    def test_emails_dedoublonnes_sans_tenir_compte_de_la_casse(self):
+        User.objects.create_user(email='Existant@exemple.fr', role='STAGIAIRE')
+        stream = io.StringIO(
+            CSV_ENTETE + ligne('existant@exemple.fr') + ligne('Nouveau@exemple.fr') + ligne('nouveau@Exemple.fr')
+        )
+
+        report = provision_accounts(stream, 'STAGIAIRE')
+
+        self.assertEqual((report['created'], report['skipped']), (1, 2))
+        self.assertEqual(
+            {error['line']: error['errors'] for error in report['errors']},
+            {2: ["Un compte existe déjà avec cet email"], 4: ["Email en double dans le fichier"]}
+        )
+        self.assertTrue(User.objects.get(email='Nouveau@exemple.fr').check_password('motdepasse1'))
+
+    def test_creation_confiee_a_un_worker(self):
+        admin = User.objects.create_user(email='admin@exemple.fr', role='ADMIN')
+        client = APIClient()
+        client.force_authenticate(admin)
+        upload = SimpleUploadedFile('cohorte.csv', (CSV_ENTETE + ligne('s@exemple.fr')).encode())
+
+        with tempfile.TemporaryDirectory() as media, tempfile.TemporaryDirectory() as private, \
+                self.settings(MEDIA_ROOT=media, ACCOUNT_PROVISIONING={'UPLOAD_DIRECTORY': private},
+                              JOBS={'EAGER': True}):
+            response = client.post(reverse('admin-provision-accounts'), {'file': upload, 'role': 'STAGIAIRE'})
+            # Fichier supprimé une fois la tâche terminée, rien sous MEDIA_ROOT
+            self.assertEqual((os.listdir(private), os.listdir(media)), ([], []))
+
+        self.assertEqual(response.status_code, 202)
+        job = Job.objects.get(id=response.json()['job_id'])
+        self.assertEqual((job.status, job.result['created']), ('SUCCEEDED', 1))
+        status_response = client.get(response.json()['status_url'])
+        self.assertEqual(status_response.json()['result']['created'], 1)
+        self.assertTrue(User.objects.filter(email='s@exemple.fr', stagiaire_profile__isnull=False).exists())
+
+
+    def test_csv_prive_et_nettoye(self):
+        with tempfile.TemporaryDirectory() as private, \
+                self.settings(ACCOUNT_PROVISIONING={'UPLOAD_DIRECTORY': os.path.join(private, 'provisioning')}):
+            directory = os.path.join(private, 'provisioning')
+            abandonne = store_upload(SimpleUploadedFile('a.csv', CSV_ENTETE.encode()))
+            en_attente = store_upload(SimpleUploadedFile('b.csv', CSV_ENTETE.encode()))
+            recent = store_upload(SimpleUploadedFile('c.csv', CSV_ENTETE.encode()))
+            self.assertEqual(os.stat(directory).st_mode & 0o777, 0o700)
+            self.assertEqual(os.stat(os.path.join(directory, abandonne)).st_mode & 0o777, 0o600)
+            Job.objects.create(name='accounts.provision_accounts', payload={'path': en_attente, 'role': 'STAGIAIRE'})
+            old = os.stat(os.path.join(directory, abandonne)).st_mtime - 2 * 86400
+            for name in (abandonne, en_attente):
+                os.utime(os.path.join(directory, name), (old, old))
+
+            self.assertEqual(sweep_uploads(), 1)
+            self.assertEqual(sorted(os.listdir(directory)), sorted([en_attente, recent]))
+
+
+class ListesAdministrationTests(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.client.force_authenticate(User.objects.create_user(email='admin@exemple.fr', role='ADMIN'))
+        self.dupont = self.stagiaire('alice@exemple.fr', 'Dupont', 'Alice', 'Lyon', 'Informatique', 'Master')
+        self.dupuis = self.stagiaire('bob@exemple.fr', 'dupuis', 'Bob', 'Paris', 'Gestion', 'Licence', is_active=False)
+        self.martin = self.stagiaire('dupre@exemple.fr', 'Martin', 'Claire', 'lyon', 'Informatique', 'Licence')
+
+    def stagiaire(self, email, nom, prenom, ville, domaine, niveau_etude, is_active=True):
+        return Stagiaire.objects.create(
+            user=User.objects.create_user(email=email, role='STAGIAIRE', is_active=is_active),
+            nom=nom, prenom=prenom, telephone='0600000000', ville=ville, domaine=domaine, niveau_etude=niveau_etude
+        )
+
+    def lister(self, name, **params):
+        response = self.client.get(reverse(name), params)
+        self.assertEqual(response.status_code, 200)
+        return [row['id'] for row in response.json()['results']]
+
+    def test_recherche_par_debut_de_nom_ou_d_email(self):
+        self.assertEqual(
+            set(self.lister('admin-stagiaire-list', search='DUP')), {self.dupont.id, self.dupuis.id, self.martin.id}
+        )
+        self.assertEqual(self.lister('admin-stagiaire-list', search='dupo'), [self.dupont.id])
+        self.assertEqual(self.lister('admin-stagiaire-list', search='claire'), [self.martin.id])
+        # Début uniquement : pas de recherche au milieu du nom
+        self.assertEqual(self.lister('admin-stagiaire-list', search='pont'), [])
+
+    def test_filtres(self):
+        self.assertEqual(set(self.lister('admin-stagiaire-list', ville='LYON')), {self.dupont.id, self.martin.id})
+        self.assertEqual(self.lister('admin-stagiaire-list', domaine='gestion'), [self.dupuis.id])
+        self.assertEqual(set(self.lister('admin-stagiaire-list', niveau_etude='Licence')), {self.dupuis.id, self.martin.id})
+        self.assertEqual(self.lister('admin-stagiaire-list', is_active='false'), [self.dupuis.id])
+        self.assertEqual(self.lister('admin-stagiaire-list', ville='Lyon', niveau_etude='Master'), [self.dupont.id])
+        # Valeur inconnue des tables de référence : aucun résultat
+        self.assertEqual(self.lister('admin-stagiaire-list', ville='Atlantis'), [])
+
+    def test_tri_limite_a_la_liste_blanche(self):
+        par_nom = [self.dupont.id, self.dupuis.id, self.martin.id]
+        self.assertEqual(self.lister('admin-stagiaire-list', ordering='nom'), par_nom)
+        self.assertEqual(self.lister('admin-stagiaire-list', ordering='-nom'), par_nom[::-1])
+        # Champ hors liste blanche ou inconnu : tri par défaut, plus récents d'abord
+        plus_recents = [self.martin.id, self.dupuis.id, self.dupont.id]
+        for ordering in ('user__password', 'inconnu', '-', ''):
+            self.assertEqual(self.lister('admin-stagiaire-list', ordering=ordering), plus_recents)
+
+    def test_listes_des_utilisateurs_et_des_entreprises(self):
+        entreprise = Entreprise.objects.create(
+            user=User.objects.create_user(email='rh@acme.fr', role='ENTREPRISE'), nom_entreprise='Acme',
+            secteur_activite='Informatique', telephone='0600000000', adresse='1 rue', ville='Lyon',
+            contact_nom='Durand', contact_prenom='Paul'
+        )
+        self.assertEqual(self.lister('admin-entreprise-list', search='dur'), [entreprise.id])
+        self.assertEqual(self.lister('admin-entreprise-list', search='rh@'), [entreprise.id])
+        self.assertEqual(self.lister('admin-entreprise-list', secteur_activite='Gestion'), [])
+        self.assertEqual(self.lister('admin-entreprise-list', ville='lyon', ordering='-nom_entreprise'), [entreprise.id])
+
+        self.assertEqual(self.lister('admin-user-list', role='ENTREPRISE'), [entreprise.user_id])
+        self.assertEqual(self.lister('admin-user-list', search='DUP'), [self.martin.user_id])
+        stagiaires = [self.dupont.user_id, self.dupuis.user_id, self.martin.user_id]
+        self.assertEqual(self.lister('admin-user-list', role='STAGIAIRE', ordering='email'), stagiaires)
+        self.assertEqual(self.lister('admin-user-list', role='STAGIAIRE', ordering='password'), stagiaires[::-1])
+        self.assertEqual(self.lister('admin-user-list', is_active='false'), [self.dupuis.user_id])
+
+    def test_reserve_aux_admins(self):
+        self.client.force_authenticate(self.dupont.user)
+        self.assertEqual(self.lister('admin-stagiaire-list'), [])
+
+
+class ValeursReferenceTests(TestCase):
+    def stagiaire(self, email, ville, domaine=''):
+        return Stagiaire.objects.create(
+            user=User.objects.create_user(email=email, role='STAGIAIRE'),
+            nom='Nom', prenom='Prénom', telephone='0600000000', ville=ville, domaine=domaine
+        )
+
+    def villes(self, ville):
+        return set(filter_reference(Stagiaire.objects.all(), 'ville', ville).values_list('id', flat=True))
+
+    def test_alias_reporte_sur_les_profils(self):
+        canonique = self.stagiaire('a@exemple.fr', 'Saint-Étienne')
+        abrege = self.stagiaire('b@exemple.fr', 'St Etienne')
+        modifie_le = abrege.date_modification
+        saint_etienne = Ville.objects.get(nom='Saint-Étienne')
+        st_etienne = Ville.objects.get(nom='St Etienne')
+        Ville.objects.create(nom='St-Et', alias_de=st_etienne)
+
+        st_etienne.alias_de = saint_etienne
+        st_etienne.save()
+
+        abrege.refresh_from_db()
+        self.assertEqual((abrege.ville, abrege.ville_ref), ('Saint-Étienne', saint_etienne))
+        self.assertGreater(abrege.date_modification, modifie_le)
+        # Pas de chaîne d'alias : l'alias de l'alias pointe vers la valeur canonique
+        self.assertEqual(Ville.objects.get(nom='St-Et').alias_de, saint_etienne)
+        self.assertEqual(find_reference(Ville, 'st et'), saint_etienne)
+        self.assertEqual(self.villes('ST ETIENNE'), {canonique.id, abrege.id})
+        self.assertEqual(self.stagiaire('c@exemple.fr', 'st  etienne').ville, 'Saint-Étienne')
+
+    def test_renommage_reporte_sur_les_profils(self):
+        stagiaire = self.stagiaire('a@exemple.fr', 'lyon', domaine='informatique')
+        ville = Ville.objects.get(cle='lyon')
+
+        ville.nom = 'Lyon'
+        ville.save()
+
+        stagiaire.refresh_from_db()
+        self.assertEqual((stagiaire.ville, stagiaire.ville_ref), ('Lyon', ville))
+        self.assertEqual(stagiaire.domaine, 'informatique')
+
+    def test_valeur_inconnue(self):
+        self.stagiaire('a@exemple.fr', 'Lyon')
+        villes = Ville.objects.count()
+
+        self.assertEqual(self.villes('Atlantis'), set())
+        self.assertEqual(self.villes(''), set())
+        # Le filtre ne crée pas de valeur de référence
+        self.assertEqual(Ville.objects.count(), villes)
+
+    def test_migration_dedoublonnage(self):
+        migration = importlib.import_module('stages.migrations.0008_dedupe_references')
+        lyon = Ville.objects.create(nom='Lyon')
+        stagiaires = [self.stagiaire(f's{i}@exemple.fr', '') for i in range(5)]
+        # Textes saisis avant les valeurs de référence (pre_save contourné)
+        for stagiaire, ville in zip(stagiaires, ['Paris', 'PARIS', 'Paris', '  paris ', 'LYON']):
+            Stagiaire.objects.filter(id=stagiaire.id).update(ville=ville, ville_ref=None, domaine='Gestion')
+        Domaine.objects.filter(cle='gestion').delete()
+
+        migration.dedupe(apps, None)
+
+        paris = Ville.objects.get(cle='paris')
+        self.assertEqual(paris.nom, 'Paris')
+        self.assertEqual(
+            list(Stagiaire.objects.order_by('id').values_list('ville', 'ville_ref')),
+            [('Paris', paris.id)] * 4 + [('Lyon', lyon.id)]
+        )
+        self.assertEqual(Stagiaire.objects.filter(domaine_ref__nom='Gestion').count(), 5)
+
+
+class RevocationJetonsTests(TestCase):
+    def jeton(self, user, emis_le):
+        token = AccessToken.for_user(user)
+        token.set_iat(at_time=emis_le)
+        return token
+
+    def test_jeton_emis_dans_la_seconde_de_la_revocation(self):
+        revocation = datetime(2026, 10, 19, 12, 0, 0, 700000, tzinfo=timezone.utc)
+        user = User.objects.create_user(email='s@exemple.fr', role='STAGIAIRE', tokens_revoked_at=revocation)
+
+        # iat est tronqué à la seconde : un jeton émis juste après la révocation reste valide
+        self.assertFalse(issued_before_revocation(self.jeton(user, revocation + timedelta(milliseconds=200)), user))
+        self.assertTrue(issued_before_revocation(self.jeton(user, revocation - timedelta(seconds=1)), user))
+
+    def revoquer(self, jti, **fields):
+        return RevokedToken.objects.create(jti=jti, expires_at=datetime.now(timezone.utc) + timedelta(days=1), **fields)
+
+    def test_revocation_validee_en_retard_vue(self):
+        self.revoquer('a', id=10)
+        store = RevocationStore()
+        with self.settings(TOKEN_REVOCATION={'SYNC_INTERVAL': 0}):
+            self.assertTrue(store.is_revoked('a'))
+            # Insérée par un autre processus avec un id antérieur, validée après la synchronisation
+            self.revoquer('b', id=5)
+            self.assertTrue(store.is_revoked('b'))
+            self.assertEqual(store._bloom.count, 2)
+
+    def test_filtre_reconstruit_hors_du_verrou(self):
+        self.revoquer('a')
+        store = RevocationStore()
+        self.assertFalse(store.is_revoked('b'))
+        pendant = {}
+
+        def construction(*args):
+            # Autre requête pendant la lecture de la table : l'ancien filtre répond sans attendre
+            thread = threading.Thread(target=lambda: pendant.update(revoque=store.is_revoked('b')))
+            thread.start()
+            thread.join(timeout=5)
+            pendant['bloque'] = thread.is_alive()
+            if not pendant['bloque']:
+                store.revoke({'jti': 'b', 'exp': int(datetime.now(timezone.utc).timestamp()) + 60})
+            return bloom_filter(*args)
+
+        bloom_filter = revocation.BloomFilter
+        with self.settings(TOKEN_REVOCATION={'REBUILD_INTERVAL': 0}), \
+                mock.patch('accounts.revocation.BloomFilter', side_effect=construction):
+            self.assertTrue(store.is_revoked('a'))
+
+        self.assertEqual(pendant, {'revoque': False, 'bloque': False})
+        # Révoqué pendant la construction : reporté dans le nouveau filtre
+        self.assertIn('b', store._bloom)
+
+
+class DiffusionCVTests(TestCase):
+    CONTENU = b'%PDF-1.4\n' + os.urandom(200 * 1024)
+
+    def setUp(self):
+        media = tempfile.TemporaryDirectory()
+        self.addCleanup(media.cleanup)
+        override = self.settings(MEDIA_ROOT=media.name, CV_DELIVERY={'MODE': 'python', 'CHUNK_SIZE': 64 * 1024})
+        override.enable()
+        self.addCleanup(override.disable)
+        os.makedirs(os.path.join(media.name, 'cvs'))
+        with open(os.path.join(media.name, 'cvs', 'cv.pdf'), 'wb') as file:
+            file.write(self.CONTENU)
+        self.url = signed_cv_url(Stagiaire(nom='Nom', prenom='Prénom', cv_file='cvs/cv.pdf'))
+
+    async def test_fichier_lu_par_morceaux_sous_asgi(self):
+        response = await self.async_client.get(self.url)
+        self.assertTrue(response.is_async)
+        chunks = [chunk async for chunk in response.streaming_content]
+        self.assertEqual(len(chunks), 4)
+        self.assertEqual(b''.join(chunks), self.CONTENU)
+        self.assertEqual(response['Content-Length'], str(len(self.CONTENU)))
+
+        response = await self.async_client.get(self.url, headers={'Range': 'bytes=10-19'})
+        self.assertEqual(response.status_code, 206)
+        self.assertEqual(b''.join([chunk async for chunk in response.streaming_content]), self.CONTENU[10:20])
+
+
+class ModificationProfilTests(TestCase):
+    def test_profil_relu_en_base_avant_modification(self):
+        user = User.objects.create_user(email='s@exemple.fr', role='STAGIAIRE')
+        stagiaire = Stagiaire.objects.create(user=user, nom='Nom', prenom='Prénom', telephone='0600000000')
+        user_cache.clear()
+        cached = get_cached_user(user.id)
+        # CV déposé depuis un autre processus : l'utilisateur en cache ne le voit pas
+        Stagiaire.objects.filter(id=stagiaire.id).update(cv_file='cvs/cv.pdf', cv_sha256='a' * 64)
+
+        client = APIClient()
+        client.force_authenticate(cached)
+        response = client.patch(reverse('update-stagiaire-profile'), {'ville': 'Paris'}, format='json')
+
+        self.assertEqual(response.status_code, 200)
+        stagiaire.refresh_from_db()
+        self.assertEqual((stagiaire.ville, stagiaire.cv_file.name, stagiaire.cv_sha256), ('Paris', 'cvs/cv.pdf', 'a' * 64))
+
+
+class IndexationCVTests(TestCase):
+    def setUp(self):
+        media = tempfile.TemporaryDirectory()
+        self.addCleanup(media.cleanup)
+        self.media = media.name
+        override = self.settings(MEDIA_ROOT=media.name)
+        override.enable()
+        self.addCleanup(override.disable)
+        os.makedirs(os.path.join(media.name, 'cvs'))
+
+    def stagiaire(self, email, texte):
+        name = f"cvs/{email.split('@')[0]}.pdf"
+        with open(os.path.join(self.media, name), 'wb') as file:
+            file.write(pdf(texte))
+        return Stagiaire.objects.create(
+            user=User.objects.create_user(email=email, role='STAGIAIRE'),
+            nom='Nom', prenom='Prénom', telephone='0600000000', cv_file=name, cv_sha256='a' * 64
+        )
+
+    def test_texte_des_cv_indexe(self):
+        # Deux CV : extraction dans le pool de processus
+        premier = self.stagiaire('s1@exemple.fr', 'Python Django Kubernetes')
+        self.stagiaire('s2@exemple.fr', 'Comptabilite analytique')
+
+        index_candidates()
+
+        self.assertEqual([match['stagiaire_id'] for match in search_candidates(['kubernetes'])], [premier.id])
+
+    def test_cv_depose_pendant_l_indexation_conserve(self):
+        stagiaire = self.stagiaire('s@exemple.fr', 'Python')
+
+        def depot_concurrent(path):
+            # Nouveau CV enregistré par la vue de dépôt pendant l'analyse de l'ancien
+            Stagiaire.objects.filter(id=stagiaire.id).update(cv_file='cvs/nouveau.pdf', cv_sha256='b' * 64)
+            return analyze_cv(path)
+
+        with mock.patch('accounts.talent_search.analyze_cv', side_effect=depot_concurrent):
+            index_candidates([stagiaire.id])
+
+        stagiaire.refresh_from_db()
+        self.assertEqual((stagiaire.cv_file.name, stagiaire.cv_sha256), ('cvs/nouveau.pdf', 'b' * 64))
+        # L'ancien CV n'est pas noté comme indexé : le nouveau sera lu au prochain passage
+        self.assertEqual(stagiaire.cv_indexed_sha256, '')
+
+
+class LimitationDebitTests(TestCase):
+    def setUp(self):
+        patch = mock.patch.dict(throttling._backends, {'local': LocalBucketBackend()})
+        patch.start()
+        self.addCleanup(patch.stop)
+
+    def connexion(self, ip, forwarded_for):
+        return self.client.post(
+            reverse('login'), {'email': 'x@exemple.fr', 'password': 'faux'},
+            REMOTE_ADDR=ip, HTTP_X_FORWARDED_FOR=forwarded_for
+        )
+
+    def test_visiteur_limite_par_adresse_ip(self):
+        # Rafale de 5 (settings.THROTTLING['SCOPES']['login']) ; X-Forwarded-For forgé ignoré
+        for i in range(5):
+            self.assertEqual(self.connexion('203.0.113.1', f'198.51.100.{i}').status_code, 401)
+        response = self.connexion('203.0.113.1', '198.51.100.99')
+
+        self.assertEqual(response.status_code, 429)
+        # 10/min : un jeton toutes les 6 secondes
+        self.assertEqual(response['Retry-After'], '6')
+        self.assertEqual(self.connexion('203.0.113.2', '198.51.100.0').status_code, 401)
+
+    def test_compteurs_du_cache_partage(self):
+        backend = CacheBucketBackend()
+        with self.settings(CACHES={'throttle': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'}},
+                           THROTTLING={'CACHE_ALIAS': 'throttle'}), \
+                mock.patch('accounts.throttling.time.time', return_value=6000.0):
+            # 3 requêtes par fenêtre de 60 secondes
+            self.assertEqual([backend.consume('k', 3, 0.05)[0] for _ in range(4)], [True, True, True, False])
+            self.assertEqual(backend.consume('k', 3, 0.05), (False, 60))
+            self.assertTrue(backend.consume('autre', 3, 0.05)[0])
+            self.assertEqual(throttling.caches['throttle'].get('throttle:k:100'), 3)
+
+            # Fenêtre suivante, à mi-parcours : la précédente compte pour moitié (1,5 requête)
+            throttling.time.time.return_value = 6090.0
+            self.assertEqual(backend.consume('k', 3, 0.05), (True, 0))
+            allowed, wait = backend.consume('k', 3, 0.05)
+            self.assertFalse(allowed)
+            self.assertAlmostEqual(wait, 10)
@@ -0,0 +1,175 @@
+"""
+Limitation de débit par seau à jetons, configurable par endpoint (scope) et par rôle
+"""
+import logging
+import threading
+import time
+from collections import Counter, OrderedDict
+
+from django.conf import settings
+from django.core.cache import caches
+from rest_framework.throttling import BaseThrottle
+
+logger = logging.getLogger('throttling')
+
+DEFAULTS = {
+    'BACKEND': 'local',  # 'local' (mémoire du processus) ou 'cache' (cache Django partagé)
+    'CACHE_ALIAS': 'default',
+    'MAX_KEYS': 100000,  # seaux conservés par le backend local
+    'SCOPES': {},
+}
+
+PERIODS = {'s': 1, 'sec': 1, 'm': 60, 'min': 60, 'h': 3600, 'hour': 3600, 'd': 86400, 'day': 86400}
+
+
+def get_throttling_setting(name):
+    """Lire un paramètre de settings.THROTTLING avec sa valeur par défaut"""
+    return getattr(settings, 'THROTTLING', {}).get(name, DEFAULTS[name])
+
+
+def parse_rate(rate):
+    """
+    '10/min' -> (capacité 10, 10/60 jetons par seconde). Une capacité de
+    rafale différente peut être donnée par un dict {'rate': '10/min', 'burst': 20}.
+    """
+    burst = None
+    if isinstance(rate, dict):
+        burst = rate.get('burst')
+        rate = rate['rate']
+    count, period = rate.split('/')
+    count = int(count)
+    return (burst or count), count / PERIODS[period]
+
+
+def refill(tokens, last, capacity, refill_rate, now):
+    """Consommer un jeton si possible ; retourne (autorisé, jetons restants, attente en secondes)"""
+    tokens = min(capacity, tokens + (now - last) * refill_rate)
+    if tokens >= 1:
+        return True, tokens - 1, 0
+    return False, tokens, (1 - tokens) / refill_rate
+
+
+class LocalBucketBackend:
+    """Seaux en mémoire du processus (déploiement sur un seul processus)"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._buckets = OrderedDict()
+
+    def consume(self, key, capacity, refill_rate):
+        now = time.monotonic()
+        with self._lock:
+            tokens, last = self._buckets.get(key, (capacity, now))
+            allowed, tokens, wait = refill(tokens, last, capacity, refill_rate, now)
+            self._buckets[key] = (tokens, now)
+            self._buckets.move_to_end(key)
+            if len(self._buckets) > get_throttling_setting('MAX_KEYS'):
+                self._buckets.popitem(last=False)
+        return allowed, wait
+
+
+class CacheBucketBackend:
+    """
+    Compteurs dans le cache Django (Redis, Memcached...) partagé par les workers.
+    Le seau y est approché par une fenêtre glissante de capacity / refill_rate
+    secondes (le temps de remplir le seau) : capacity requêtes par fenêtre, la
+    fenêtre précédente comptant au prorata du temps qui lui reste. Seules des
+    opérations atomiques du cache sont utilisées (add, incr, decr) : deux
+    workers ne peuvent pas consommer le même jeton.
+    """
+
+    def consume(self, key, capacity, refill_rate):
+        cache = caches[get_throttling_setting('CACHE_ALIAS')]
+        window = capacity / refill_rate
+        index, offset = divmod(time.time(), window)
+        current = f"throttle:{key}:{int(index)}"
+        # Gardée pendant la fenêtre suivante, où elle sert de fenêtre précédente
+        if cache.add(current, 1, timeout=int(2 * window) + 1):
+            count = 1
+        else:
+            count = cache.incr(current)
+        previous = cache.get(f"throttle:{key}:{int(index) - 1}", 0)
+        used = previous * (1 - offset / window) + count
+        if used <= capacity:
+            return True, 0
+        # Requête refusée : elle ne compte pas dans la fenêtre
+        cache.decr(current)
+        if previous:
+            return False, min(window - offset, (used - capacity) / previous * window)
+        return False, window - offset
+
+
+class ThrottleMetrics:
+    """Compteurs de requêtes acceptées et refusées par scope et par rôle, pour ce processus"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.allowed = Counter()
+        self.rejected = Counter()
+
+    def record(self, scope, role, allowed):
+        with self._lock:
+            (self.allowed if allowed else self.rejected)[(scope, role)] += 1
+
+    def snapshot(self):
+        with self._lock:
+            keys = set(self.allowed) | set(self.rejected)
+            return [
+                {
+                    'scope': scope,
+                    'role': role,
+                    'allowed': self.allowed[(scope, role)],
+                    'rejected': self.rejected[(scope, role)],
+                }
+                for scope, role in sorted(keys)
+            ]
+
+
+_backends = {'local': LocalBucketBackend(), 'cache': CacheBucketBackend()}
+metrics = ThrottleMetrics()
+
+
+def get_backend():
+    return _backends[get_throttling_setting('BACKEND')]
+
+
+class TokenBucketThrottle(BaseThrottle):
+    """
+    Throttle DRF. La vue déclare `throttle_scope` (un nom de scope, ou un
+    dict {méthode HTTP: scope}) ; la limite est lue dans
+    THROTTLING['SCOPES'][scope][rôle], avec 'ANON' pour les visiteurs et
+    'default' pour les rôles non listés. Sans limite applicable, rien n'est compté.
+    """
+
+    def get_scope(self, request, view):
+        scope = getattr(view, 'throttle_scope', None)
+        if isinstance(scope, dict):
+            scope = scope.get(request.method)
+        return scope
+
+    def allow_request(self, request, view):
+        self.wait_seconds = None
+        scope = self.get_scope(request, view)
+        if scope is None:
+            return True
+        limits = get_throttling_setting('SCOPES').get(scope)
+        if not limits:
+            return True
+
+        user = request.user
+        role = user.role if user and user.is_authenticated else 'ANON'
+        rate = limits.get(role, limits.get('default'))
+        if rate is None:
+            return True
+
+        ident = f"user:{user.pk}" if role != 'ANON' else f"ip:{self.get_ident(request)}"
+        capacity, refill_rate = parse_rate(rate)
+        allowed, wait = get_backend().consume(f"{scope}:{ident}", capacity, refill_rate)
+        metrics.record(scope, role, allowed)
+        if not allowed:
+            self.wait_seconds = wait
+            logger.info("Requête limitée : scope=%s %s (réessayer dans %.1fs)", scope, ident, wait)
+        return allowed
+
+    def wait(self):
+        return self.wait_seconds
@@ -17,6 +17,12 @@ from .views import (
     EntrepriseDetailAdminView,
     UserListAdminView,
     UserDetailAdminView,
+    ThrottleStatsView,
+    ProvisionAccountsAdminView,
+    TalentSearchView,
+    CVUploadView,
+    CVLinkView,
+    SignedCVFileView,
     CVViewView,
 )
 
@@ -35,13 +41,22 @@ urlpatterns = [
     path('profile/stagiaire/update/', UpdateStagiaireProfileView.as_view(), name='update-stagiaire-profile'),
     path('profile/entreprise/update/', UpdateEntrepriseProfileView.as_view(), name='update-entreprise-profile'),
     
+    # Recherche de profils (entreprises, admins)
+    path('talents/', TalentSearchView.as_view(), name='talent-search'),
+    
     # CV
+    path('cv/', CVUploadView.as_view(), name='cv-upload'),
     path('cv/view/', CVViewView.as_view(), name='view-cv'),
     path('cv/view/<int:stagiaire_id>/', CVViewView.as_view(), name='view-cv-admin'),
+    path('cv/link/', CVLinkView.as_view(), name='cv-link'),
+    path('cv/link/<int:stagiaire_id>/', CVLinkView.as_view(), name='cv-link-stagiaire'),
+    path('cv/file/<str:token>/', SignedCVFileView.as_view(), name='cv-file'),
     
     # Admin - Gestion des utilisateurs
     path('admin/users/', UserListAdminView.as_view(), name='admin-user-list'),
     path('admin/users/<int:pk>/', UserDetailAdminView.as_view(), name='admin-user-detail'),
+    path('admin/provision/', ProvisionAccountsAdminView.as_view(), name='admin-provision-accounts'),
+    path('admin/throttle-stats/', ThrottleStatsView.as_view(), name='admin-throttle-stats'),
     
     # Admin - Gestion des stagiaires
     path('admin/stagiaires/', StagiaireListAdminView.as_view(), name='admin-stagiaire-list'),
@@ -4,13 +4,21 @@ Vues pour la gestion de l'authentification
 from rest_framework import status, generics, permissions
 from rest_framework.response import Response
 from rest_framework.views import APIView
+from rest_framework_simplejwt.exceptions import TokenError
+from rest_framework_simplejwt.settings import api_settings as jwt_settings
 from rest_framework_simplejwt.tokens import RefreshToken
 from django.contrib.auth import authenticate
 from django.contrib.auth import get_user_model
-from django.http import FileResponse, Http404
+from django.http import Http404
+from django.shortcuts import get_object_or_404
 from django.conf import settings
-import os
+from django.core import signing
+from django.db.models import Q
+from django.db.models.functions import Lower
+from django.urls import reverse
+from django.utils import timezone
 
+from jobs.queue import enqueue, submit
 from .serializers import (
     RegisterStagiaireSerializer,
     RegisterEntrepriseSerializer,
@@ -19,9 +27,18 @@ from .serializers import (
     StagiaireSerializer,
     EntrepriseSerializer,
     StagiaireAdminSerializer,
-    EntrepriseAdminSerializer
+    EntrepriseAdminSerializer,
+    TalentSerializer
 )
 from .models import Stagiaire, Entreprise
+from .filters import apply_ordering, prefix_search, users_by_email_prefix
+from .references import filter_reference
+from .revocation import revocation_store
+from .talent_search import parse_query, search_candidates
+from .cv_storage import StreamingCVUploadHandler, store_cv
+from .cv_delivery import download_name, get_delivery_setting, read_cv_token, serve_cv, signed_cv_url
+from .provisioning import PROFILE_COLUMNS, discard_upload, store_upload
+from .throttling import metrics as throttle_metrics, get_throttling_setting
 
 User = get_user_model()
 
@@ -30,6 +47,7 @@ class RegisterStagiaireView(generics.CreateAPIView):
     """Vue pour l'inscription des stagiaires"""
     serializer_class = RegisterStagiaireSerializer
     permission_classes = [permissions.AllowAny]
+    throttle_scope = 'register'
     
     def create(self, request, *args, **kwargs):
         serializer = self.get_serializer(data=request.data)
@@ -53,6 +71,7 @@ class RegisterEntrepriseView(generics.CreateAPIView):
     """Vue pour l'inscription des entreprises"""
     serializer_class = RegisterEntrepriseSerializer
     permission_classes = [permissions.AllowAny]
+    throttle_scope = 'register'
     
     def create(self, request, *args, **kwargs):
         serializer = self.get_serializer(data=request.data)
@@ -75,6 +94,7 @@ class RegisterEntrepriseView(generics.CreateAPIView):
 class LoginView(APIView):
     """Vue pour la connexion"""
     permission_classes = [permissions.AllowAny]
+    throttle_scope = 'login'
     
     def post(self, request):
         serializer = LoginSerializer(data=request.data)
@@ -117,11 +137,16 @@ class LogoutView(APIView):
             refresh_token = request.data.get('refresh_token')
             if refresh_token:
                 token = RefreshToken(refresh_token)
-                token.blacklist()
+                if token[jwt_settings.USER_ID_CLAIM] != request.user.id:
+                    raise TokenError("Jeton d'un autre utilisateur")
+                revocation_store.revoke(token, user_id=request.user.id)
+            # Le jeton d'accès utilisé pour cette requête est révoqué lui aussi
+            if request.auth is not None:
+                revocation_store.revoke(request.auth, user_id=request.user.id)
             return Response({
                 'message': 'Déconnexion réussie'
             }, status=status.HTTP_200_OK)
-        except Exception as e:
+        except TokenError:
             return Response({
                 'error': 'Token invalide'
             }, status=status.HTTP_400_BAD_REQUEST)
@@ -143,7 +168,9 @@ class UpdateStagiaireProfileView(generics.UpdateAPIView):
     permission_classes = [permissions.IsAuthenticated]
     
     def get_object(self):
-        return self.request.user.stagiaire_profile
+        # Relu en base : le profil de request.user vient du cache (jusqu'à TTL secondes) et save()
+        # réécrirait toutes ses colonnes, y compris celles modifiées depuis par un autre processus
+        return get_object_or_404(Stagiaire.objects.select_related('user'), user=self.request.user)
     
     def update(self, request, *args, **kwargs):
         if request.user.role != 'STAGIAIRE':
@@ -160,7 +187,8 @@ class UpdateEntrepriseProfileView(generics.UpdateAPIView):
     permission_classes = [permissions.IsAuthenticated]
     
     def get_object(self):
-        return self.request.user.entreprise_profile
+        # Relu en base, comme pour le profil stagiaire
+        return get_object_or_404(Entreprise.objects.select_related('user'), user=self.request.user)
     
     def update(self, request, *args, **kwargs):
         if request.user.role != 'ENTREPRISE':
@@ -174,15 +202,48 @@ class UpdateEntrepriseProfileView(generics.UpdateAPIView):
 # ===== VUES ADMIN POUR GESTION DES ENTREPRISES ET STAGIAIRES =====
 
 class StagiaireListAdminView(generics.ListAPIView):
-    """Vue admin pour lister tous les stagiaires"""
+    """
+    Vue admin pour lister les stagiaires.
+    ?search= (début du nom, du prénom ou de l'email), ?ville=, ?domaine=,
+    ?niveau_etude=, ?is_active=, ?ordering= (champs de ordering_fields, '-' pour décroissant)
+    """
     serializer_class = StagiaireSerializer
     permission_classes = [permissions.IsAuthenticated]
     queryset = Stagiaire.objects.all()
+    ordering_fields = {
+        'date_creation': 'date_creation',
+        'nom': Lower('nom'),
+        'prenom': Lower('prenom'),
+    }
     
     def get_queryset(self):
         if self.request.user.role != 'ADMIN':
             return Stagiaire.objects.none()
-        return Stagiaire.objects.all().select_related('user').order_by('-date_creation')
+        queryset = Stagiaire.objects.select_related('user')
+        
+        # Filtres
+        params = self.request.query_params
+        search = params.get('search', None)
+        ville = params.get('ville', None)
+        domaine = params.get('domaine', None)
+        niveau_etude = params.get('niveau_etude', None)
+        is_active = params.get('is_active', None)
+        
+        if search:
+            queryset = prefix_search(
+                queryset, search, ['nom', 'prenom'],
+                extra=Q(user_id__in=users_by_email_prefix(User, search))
+            )
+        if ville:
+            queryset = filter_reference(queryset, 'ville', ville)
+        if domaine:
+            queryset = filter_reference(queryset, 'domaine', domaine)
+        if niveau_etude:
+            queryset = queryset.filter(niveau_etude=niveau_etude)
+        if is_active is not None:
+            queryset = queryset.filter(user__is_active=is_active.lower() == 'true')
+        
+        return apply_ordering(queryset, params.get('ordering'), self.ordering_fields, ['-date_creation', '-id'])
     
     def get_serializer_context(self):
         context = super().get_serializer_context()
@@ -211,15 +272,44 @@ class StagiaireDetailAdminView(generics.RetrieveUpdateDestroyAPIView):
 
 
 class EntrepriseListAdminView(generics.ListAPIView):
-    """Vue admin pour lister toutes les entreprises"""
+    """
+    Vue admin pour lister les entreprises.
+    ?search= (début du nom de l'entreprise, du nom du contact ou de l'email),
+    ?ville=, ?secteur_activite=, ?is_active=, ?ordering=
+    """
     serializer_class = EntrepriseSerializer
     permission_classes = [permissions.IsAuthenticated]
     queryset = Entreprise.objects.all()
+    ordering_fields = {
+        'date_creation': 'date_creation',
+        'nom_entreprise': Lower('nom_entreprise'),
+    }
     
     def get_queryset(self):
         if self.request.user.role != 'ADMIN':
             return Entreprise.objects.none()
-        return Entreprise.objects.all().select_related('user').order_by('-date_creation')
+        queryset = Entreprise.objects.select_related('user')
+        
+        # Filtres
+        params = self.request.query_params
+        search = params.get('search', None)
+        ville = params.get('ville', None)
+        secteur_activite = params.get('secteur_activite', None)
+        is_active = params.get('is_active', None)
+        
+        if search:
+            queryset = prefix_search(
+                queryset, search, ['nom_entreprise', 'contact_nom'],
+                extra=Q(user_id__in=users_by_email_prefix(User, search))
+            )
+        if ville:
+            queryset = filter_reference(queryset, 'ville', ville)
+        if secteur_activite:
+            queryset = filter_reference(queryset, 'secteur_activite', secteur_activite)
+        if is_active is not None:
+            queryset = queryset.filter(user__is_active=is_active.lower() == 'true')
+        
+        return apply_ordering(queryset, params.get('ordering'), self.ordering_fields, ['-date_creation', '-id'])
     
     def get_serializer_context(self):
         context = super().get_serializer_context()
@@ -248,14 +338,38 @@ class EntrepriseDetailAdminView(generics.RetrieveUpdateDestroyAPIView):
 
 
 class UserListAdminView(generics.ListAPIView):
-    """Vue admin pour lister tous les utilisateurs"""
+    """
+    Vue admin pour lister les utilisateurs.
+    ?search= (début de l'email), ?role=, ?is_active=, ?ordering=
+    Les filtres par ville ou domaine se font sur les listes de stagiaires et d'entreprises.
+    """
     serializer_class = UserSerializer
     permission_classes = [permissions.IsAuthenticated]
+    ordering_fields = {
+        'date_joined': 'date_joined',
+        'email': Lower('email'),
+    }
     
     def get_queryset(self):
         if self.request.user.role != 'ADMIN':
             return User.objects.none()
-        return User.objects.all().prefetch_related('stagiaire_profile', 'entreprise_profile').order_by('-date_joined')
+        # Profils chargés par jointure dans la même requête (les profils sont des one-to-one)
+        queryset = User.objects.select_related('stagiaire_profile', 'entreprise_profile')
+        
+        # Filtres
+        params = self.request.query_params
+        search = params.get('search', None)
+        role = params.get('role', None)
+        is_active = params.get('is_active', None)
+        
+        if search:
+            queryset = prefix_search(queryset, search, ['email'])
+        if role:
+            queryset = queryset.filter(role=role)
+        if is_active is not None:
+            queryset = queryset.filter(is_active=is_active.lower() == 'true')
+        
+        return apply_ordering(queryset, params.get('ordering'), self.ordering_fields, ['-date_joined', '-id'])
 
 
 class UserDetailAdminView(generics.RetrieveUpdateDestroyAPIView):
@@ -266,7 +380,208 @@ class UserDetailAdminView(generics.RetrieveUpdateDestroyAPIView):
     def get_queryset(self):
         if self.request.user.role != 'ADMIN':
             return User.objects.none()
-        return User.objects.all().prefetch_related('stagiaire_profile', 'entreprise_profile')
+        return User.objects.select_related('stagiaire_profile', 'entreprise_profile')
+    
+    def perform_update(self, serializer):
+        if serializer.validated_data.get('is_active') is False:
+            # Désactivation : tous les jetons déjà émis deviennent invalides
+            serializer.save(tokens_revoked_at=timezone.now())
+        else:
+            serializer.save()
+
+
+class ProvisionAccountsAdminView(APIView):
+    """Vue admin pour créer des comptes en masse à partir d'un fichier CSV"""
+    permission_classes = [permissions.IsAuthenticated]
+    
+    def post(self, request):
+        if request.user.role != 'ADMIN':
+            return Response({
+                'error': 'Permission refusée'
+            }, status=status.HTTP_403_FORBIDDEN)
+        
+        csv_file = request.FILES.get('file')
+        role = request.data.get('role', 'STAGIAIRE')
+        if csv_file is None:
+            return Response({'error': 'Fichier CSV requis (champ file)'}, status=status.HTTP_400_BAD_REQUEST)
+        if role not in PROFILE_COLUMNS:
+            return Response({'error': 'Rôle invalide'}, status=status.HTTP_400_BAD_REQUEST)
+        
+        dry_run = str(request.data.get('dry_run', '')).lower() == 'true'
+        # Traitement par un worker : hachage et insertions ne bloquent pas la requête
+        name = store_upload(csv_file)
+        try:
+            job = submit('accounts.provision_accounts', path=name, role=role, dry_run=dry_run)
+        except Exception:
+            discard_upload(name)
+            raise
+        return Response({
+            'job_id': job.id,
+            'status': job.status,
+            'status_url': reverse('job-detail', args=[job.id]),
+        }, status=status.HTTP_202_ACCEPTED)
+
+
+class ThrottleStatsView(APIView):
+    """Vue admin pour consulter les requêtes acceptées et refusées par la limitation de débit"""
+    permission_classes = [permissions.IsAuthenticated]
+    
+    def get(self, request):
+        if request.user.role != 'ADMIN':
+            return Response({
+                'error': 'Permission refusée'
+            }, status=status.HTTP_403_FORBIDDEN)
+        return Response({
+            'backend': get_throttling_setting('BACKEND'),
+            'scopes': throttle_metrics.snapshot(),
+        }, status=status.HTTP_200_OK)
+
+
+class CVUploadView(APIView):
+    """
+    Vue pour déposer (POST multipart, champ cv_file) ou supprimer (DELETE) le
+    CV du stagiaire connecté. Le fichier est écrit sur le disque au fil de la
+    réception, validé (en-tête PDF, taille) et stocké d'après son contenu.
+    """
+    permission_classes = [permissions.IsAuthenticated]
+    
+    def post(self, request):
+        if request.user.role != 'STAGIAIRE':
+            return Response({
+                'error': 'Vous devez être un stagiaire'
+            }, status=status.HTTP_403_FORBIDDEN)
+        
+        # Doit être installé avant toute lecture de request.data
+        handler = StreamingCVUploadHandler(request._request)
+        request._request.upload_handlers = [handler]
+        uploaded = request.FILES.get('cv_file')
+        if handler.error:
+            return Response({'error': handler.error}, status=handler.error_status)
+        if uploaded is None:
+            return Response({'error': 'Fichier PDF requis (champ cv_file)'}, status=status.HTTP_400_BAD_REQUEST)
+        
+        stagiaire = get_object_or_404(Stagiaire, user=request.user)
+        stagiaire.cv_file.name = store_cv(uploaded)
+        stagiaire.cv_sha256 = uploaded.sha256
+        stagiaire.save(update_fields=['cv_file', 'cv_sha256', 'date_modification'])
+        # Extraction du texte et indexation en arrière-plan
+        enqueue('accounts.index_candidates', stagiaire_ids=[stagiaire.id])
+        serializer = StagiaireSerializer(stagiaire, context={'request': request})
+        return Response(serializer.data, status=status.HTTP_201_CREATED)
+    
+    def delete(self, request):
+        if request.user.role != 'STAGIAIRE':
+            return Response({
+                'error': 'Vous devez être un stagiaire'
+            }, status=status.HTTP_403_FORBIDDEN)
+        
+        # Le fichier peut être partagé avec d'autres stagiaires : il est supprimé par le nettoyage périodique
+        stagiaire = get_object_or_404(Stagiaire, user=request.user)
+        stagiaire.cv_file = None
+        stagiaire.cv_sha256 = ''
+        stagiaire.save(update_fields=['cv_file', 'cv_sha256', 'date_modification'])
+        return Response(status=status.HTTP_204_NO_CONTENT)
+
+
+class TalentSearchView(generics.GenericAPIView):
+    """
+    Vue de recherche de profils pour les entreprises et les admins :
+    ?q= mots-clés (tous requis) cherchés dans le texte des CV, le domaine,
+    le niveau d'études et la ville ; filtres ?ville=, ?domaine=, ?niveau_etude=
+    """
+    permission_classes = [permissions.IsAuthenticated]
+    serializer_class = TalentSerializer
+    throttle_scope = 'talent_search'
+    
+    def get(self, request):
+        if request.user.role not in ('ENTREPRISE', 'ADMIN'):
+            return Response({
+                'error': 'Permission refusée'
+            }, status=status.HTTP_403_FORBIDDEN)
+        
+        terms = parse_query(request.query_params.get('q'))
+        if not terms:
+            return Response({'error': 'Paramètre q requis'}, status=status.HTTP_400_BAD_REQUEST)
+        
+        matches = search_candidates(
+            terms,
+            ville=request.query_params.get('ville'),
+            domaine=request.query_params.get('domaine'),
+            niveau_etude=request.query_params.get('niveau_etude'),
+        )
+        page = self.paginate_queryset(matches)
+        stagiaires = Stagiaire.objects.in_bulk([match['stagiaire_id'] for match in page])
+        results = []
+        for match in page:
+            stagiaire = stagiaires[match['stagiaire_id']]
+            stagiaire.score = match['score']
+            results.append(stagiaire)
+        serializer = self.get_serializer(results, many=True)
+        return self.get_paginated_response(serializer.data)
+
+
+def get_viewable_stagiaire(user, stagiaire_id=None):
+    """
+    Stagiaire dont l'utilisateur peut consulter le CV : le sien, n'importe
+    lequel pour un admin, ou un candidat à l'une de ses offres pour une entreprise.
+    Lève Http404 sinon.
+    """
+    if user.role == 'STAGIAIRE':
+        try:
+            stagiaire = user.stagiaire_profile
+        except Stagiaire.DoesNotExist:
+            raise Http404("Profil stagiaire non trouvé")
+        if stagiaire_id is not None and stagiaire_id != stagiaire.id:
+            raise Http404("Stagiaire non trouvé")
+        return stagiaire
+    if stagiaire_id is None:
+        raise Http404("Profil stagiaire non trouvé")
+    
+    queryset = Stagiaire.objects.only('id', 'nom', 'prenom', 'cv_file')
+    if user.role == 'ENTREPRISE':
+        queryset = queryset.filter(candidatures__offre__entreprise__user=user).distinct()
+    elif user.role != 'ADMIN':
+        raise Http404("Stagiaire non trouvé")
+    try:
+        return queryset.get(id=stagiaire_id)
+    except Stagiaire.DoesNotExist:
+        raise Http404("Stagiaire non trouvé")
+
+
+class CVLinkView(APIView):
+    """
+    Vue pour obtenir un lien temporaire vers un CV (le sien, celui d'un
+    candidat pour une entreprise, n'importe lequel pour un admin). Le lien
+    ne demande pas d'en-tête Authorization et peut être ouvert dans le navigateur.
+    """
+    permission_classes = [permissions.IsAuthenticated]
+    
+    def get(self, request, stagiaire_id=None):
+        stagiaire = get_viewable_stagiaire(request.user, stagiaire_id)
+        if not stagiaire.cv_file:
+            raise Http404("CV non trouvé")
+        return Response({
+            'url': signed_cv_url(stagiaire, request),
+            'expires_in': get_delivery_setting('URL_TTL'),
+        }, status=status.HTTP_200_OK)
+
+
+class SignedCVFileView(APIView):
+    """Vue servant un CV à partir d'un lien signé (sans authentification ni requête SQL)"""
+    authentication_classes = []
+    permission_classes = [permissions.AllowAny]
+    
+    def get(self, request, token):
+        try:
+            name, filename, remaining = read_cv_token(token)
+        except signing.BadSignature:
+            return Response({
+                'error': 'Lien invalide ou expiré'
+            }, status=status.HTTP_403_FORBIDDEN)
+        response = serve_cv(request, name, filename, max_age=remaining)
+        if response is None:
+            raise Http404("Fichier CV non trouvé")
+        return response
 
 
 class CVViewView(APIView):
@@ -274,36 +589,17 @@ class CVViewView(APIView):
     permission_classes = [permissions.IsAuthenticated]
     
     def get(self, request, stagiaire_id=None):
-        """Récupérer le CV du stagiaire connecté ou d'un stagiaire spécifique (admin)"""
-        # Si un ID est fourni et que l'utilisateur est admin, permettre de voir le CV d'un autre stagiaire
-        if stagiaire_id and request.user.role == 'ADMIN':
-            try:
-                stagiaire = Stagiaire.objects.get(id=stagiaire_id)
-            except Stagiaire.DoesNotExist:
-                raise Http404("Stagiaire non trouvé")
-        else:
-            # Sinon, récupérer le CV du stagiaire connecté
-            if request.user.role != 'STAGIAIRE':
-                return Response({
-                    'error': 'Vous devez être un stagiaire pour voir votre CV'
-                }, status=status.HTTP_403_FORBIDDEN)
-            
-            try:
-                stagiaire = request.user.stagiaire_profile
-            except Stagiaire.DoesNotExist:
-                raise Http404("Profil stagiaire non trouvé")
+        """Récupérer le CV du stagiaire connecté ou d'un stagiaire spécifique (admin, entreprise)"""
+        if stagiaire_id is None and request.user.role != 'STAGIAIRE':
+            return Response({
+                'error': 'Vous devez être un stagiaire pour voir votre CV'
+            }, status=status.HTTP_403_FORBIDDEN)
+        stagiaire = get_viewable_stagiaire(request.user, stagiaire_id)
         
         if not stagiaire.cv_file:
             raise Http404("CV non trouvé")
         
-        # Vérifier que le fichier existe
-        file_path = stagiaire.cv_file.path
-        if not os.path.exists(file_path):
+        response = serve_cv(request, stagiaire.cv_file.name, download_name(stagiaire))
+        if response is None:
             raise Http404("Fichier CV non trouvé")
-        
-        # Retourner le fichier PDF
-        return FileResponse(
-            open(file_path, 'rb'),
-            content_type='application/pdf',
-            filename=os.path.basename(file_path)
-        )
\ No newline at end of file
+        return response
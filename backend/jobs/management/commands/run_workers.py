@@ -0,0 +1,56 @@
+"""
+Commande pour lancer les workers de la file de tâches
+"""
+import json
+import signal
+
+from django.core.management.base import BaseCommand
+
+from jobs.queue import get_setting, queue_stats
+from jobs.worker import WorkerPool
+
+
+class Command(BaseCommand):
+    help = "Exécute les tâches en arrière-plan avec un pool de threads ou de processus"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--mode',
+            choices=['thread', 'process'],
+            default=None,
+            help="Type de pool (par défaut : JOBS['MODE'])",
+        )
+        parser.add_argument(
+            '--concurrency',
+            type=int,
+            default=None,
+            help="Nombre de tâches exécutées en parallèle (par défaut : JOBS['CONCURRENCY'])",
+        )
+        parser.add_argument(
+            '--once',
+            action='store_true',
+            help="S'arrêter lorsque la file est vide",
+        )
+        parser.add_argument(
+            '--stats',
+            action='store_true',
+            help="Afficher l'état de la file et quitter",
+        )
+
+    def handle(self, *args, **options):
+        if options['stats']:
+            self.stdout.write(json.dumps(queue_stats(), indent=2))
+            return
+
+        pool = WorkerPool(mode=options['mode'], concurrency=options['concurrency'])
+        signal.signal(signal.SIGTERM, lambda *_: pool.stop())
+
+        self.stdout.write(
+            f"Workers démarrés ({pool.mode}, concurrence {pool.concurrency}, "
+            f"{get_setting('MAX_ATTEMPTS')} tentatives max)"
+        )
+        try:
+            pool.run(once=options['once'])
+        except KeyboardInterrupt:
+            pool.stop()
+        self.stdout.write("Workers arrêtés")
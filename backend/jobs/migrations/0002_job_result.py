@@ -0,0 +1,19 @@
+# Generated by Django 4.2.7 on 2026-10-19 20:16
+
+import django.core.serializers.json
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('jobs', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='job',
+            name='result',
+            field=models.JSONField(blank=True, encoder=django.core.serializers.json.DjangoJSONEncoder, help_text="Valeur retournée par le handler (rapport d'exécution)", null=True, verbose_name='Résultat'),
+        ),
+    ]
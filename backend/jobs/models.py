@@ -0,0 +1,53 @@
+"""
+Modèles pour la file de tâches en arrière-plan
+"""
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import models
+from django.utils import timezone
+
+
+class Job(models.Model):
+    """Tâche à exécuter par un worker (voir la commande run_workers)"""
+    
+    STATUS_CHOICES = [
+        ('PENDING', 'En attente'),
+        ('RUNNING', 'En cours'),
+        ('SUCCEEDED', 'Terminée'),
+        ('DEAD', 'Abandonnée'),
+    ]
+    
+    name = models.CharField(max_length=100, verbose_name="Nom de la tâche")
+    payload = models.JSONField(default=dict, blank=True, verbose_name="Paramètres")
+    status = models.CharField(
+        max_length=20,
+        choices=STATUS_CHOICES,
+        default='PENDING',
+        verbose_name="Statut"
+    )
+    attempts = models.PositiveIntegerField(default=0, verbose_name="Tentatives")
+    max_attempts = models.PositiveIntegerField(default=5, verbose_name="Tentatives maximum")
+    run_at = models.DateTimeField(default=timezone.now, verbose_name="Exécuter à partir de")
+    locked_by = models.CharField(max_length=100, blank=True, verbose_name="Worker")
+    locked_at = models.DateTimeField(null=True, blank=True)
+    last_error = models.TextField(blank=True, verbose_name="Dernière erreur")
+    result = models.JSONField(
+        null=True,
+        blank=True,
+        encoder=DjangoJSONEncoder,
+        verbose_name="Résultat",
+        help_text="Valeur retournée par le handler (rapport d'exécution)"
+    )
+    created_at = models.DateTimeField(auto_now_add=True, verbose_name="Date de création")
+    started_at = models.DateTimeField(null=True, blank=True, verbose_name="Début d'exécution")
+    finished_at = models.DateTimeField(null=True, blank=True, verbose_name="Fin d'exécution")
+    
+    class Meta:
+        verbose_name = "Tâche"
+        verbose_name_plural = "Tâches"
+        ordering = ['run_at']
+        indexes = [
+            models.Index(fields=['status', 'run_at'], name='job_status_run_at_idx'),
+        ]
+    
+    def __str__(self):
+        return f"{self.name} #{self.id} ({self.get_status_display()})"
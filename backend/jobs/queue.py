@@ -0,0 +1,138 @@
+"""
+File de tâches en base de données : enregistrement des handlers et mise en file
+"""
+import logging
+from datetime import timedelta
+from functools import partial
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Avg, Count, F, Min
+from django.utils import timezone
+
+from .models import Job
+
+logger = logging.getLogger('jobs')
+
+DEFAULTS = {
+    'MODE': 'thread',
+    'CONCURRENCY': 4,
+    'POLL_INTERVAL': 1.0,
+    'MAX_ATTEMPTS': 5,
+    'BACKOFF_BASE': 5,
+    'BACKOFF_MAX': 3600,
+    'LOCK_TIMEOUT': 600,
+    'SUCCEEDED_RETENTION': timedelta(days=7),
+    'EAGER': False,
+    'PERIODIC': {},
+}
+
+_registry = {}
+
+
+def get_setting(name):
+    """Lire un paramètre de settings.JOBS avec sa valeur par défaut"""
+    return getattr(settings, 'JOBS', {}).get(name, DEFAULTS[name])
+
+
+def job(name, max_attempts=None):
+    """Décorateur pour enregistrer un handler de tâche sous un nom"""
+    def decorator(func):
+        _registry[name] = (func, max_attempts)
+        func.job_name = name
+        return func
+    return decorator
+
+
+def get_handler(name):
+    """Récupérer le handler enregistré pour une tâche"""
+    try:
+        return _registry[name][0]
+    except KeyError:
+        raise LookupError(f"Aucun handler enregistré pour la tâche '{name}'")
+
+
+def _create_job(name, payload, run_at, max_attempts):
+    if get_setting('EAGER'):
+        get_handler(name)(**payload)
+        return None
+    return Job.objects.create(
+        name=name,
+        payload=payload,
+        run_at=run_at,
+        max_attempts=max_attempts,
+    )
+
+
+def enqueue(name, delay=None, **payload):
+    """
+    Mettre une tâche en file après le commit de la transaction courante.
+    Le payload doit être sérialisable en JSON.
+    """
+    if name not in _registry:
+        raise LookupError(f"Aucun handler enregistré pour la tâche '{name}'")
+    max_attempts = get_max_attempts(name)
+    run_at = timezone.now() + delay if delay else timezone.now()
+    transaction.on_commit(partial(_create_job, name, payload, run_at, max_attempts))
+
+
+def submit(name, **payload):
+    """
+    Créer immédiatement une tâche et la retourner, pour en suivre l'exécution
+    et lire son résultat (/api/jobs/<id>/). À appeler hors transaction : la
+    tâche peut être réservée dès sa création. En mode EAGER elle est exécutée
+    sur place.
+    """
+    handler = get_handler(name)
+    max_attempts = get_max_attempts(name)
+    if get_setting('EAGER'):
+        started_at = timezone.now()
+        result = handler(**payload)
+        return Job.objects.create(
+            name=name,
+            payload=payload,
+            max_attempts=max_attempts,
+            status='SUCCEEDED',
+            attempts=1,
+            started_at=started_at,
+            finished_at=timezone.now(),
+            result=result,
+        )
+    return Job.objects.create(name=name, payload=payload, max_attempts=max_attempts)
+
+
+def get_max_attempts(name):
+    """Nombre maximum de tentatives pour une tâche enregistrée"""
+    return _registry[name][1] or get_setting('MAX_ATTEMPTS')
+
+
+def backoff_delay(attempts):
+    """Délai exponentiel avant la prochaine tentative, plafonné"""
+    delay = get_setting('BACKOFF_BASE') * (2 ** max(attempts - 1, 0))
+    return timedelta(seconds=min(delay, get_setting('BACKOFF_MAX')))
+
+
+def queue_stats():
+    """Profondeur de la file et latences, pour le suivi"""
+    now = timezone.now()
+    depth = dict(Job.objects.values_list('status').annotate(total=Count('id')).order_by())
+    oldest_pending = Job.objects.filter(status='PENDING', run_at__lte=now).aggregate(
+        oldest=Min('run_at')
+    )['oldest']
+    recent = Job.objects.filter(
+        status='SUCCEEDED',
+        finished_at__gte=now - timedelta(hours=1)
+    ).aggregate(
+        latency=Avg(F('started_at') - F('created_at')),
+        duration=Avg(F('finished_at') - F('started_at')),
+        total=Count('id'),
+    )
+    return {
+        'depth': {status: depth.get(status, 0) for status, _ in Job.STATUS_CHOICES},
+        'oldest_pending_age_seconds': (now - oldest_pending).total_seconds() if oldest_pending else 0,
+        'last_hour': {
+            'succeeded': recent['total'],
+            'avg_latency_seconds': recent['latency'].total_seconds() if recent['latency'] else None,
+            'avg_duration_seconds': recent['duration'].total_seconds() if recent['duration'] else None,
+        },
+    }
@@ -0,0 +1,10 @@
+"""
+URLs pour la file de tâches
+"""
+from django.urls import path
+from .views import JobDetailView, JobStatsView
+
+urlpatterns = [
+    path('stats/', JobStatsView.as_view(), name='job-stats'),
+    path('<int:pk>/', JobDetailView.as_view(), name='job-detail'),
+]
@@ -0,0 +1,45 @@
+"""
+Vues pour le suivi de la file de tâches
+"""
+from django.shortcuts import get_object_or_404
+from rest_framework import permissions, status
+from rest_framework.response import Response
+from rest_framework.views import APIView
+
+from .models import Job
+from .queue import queue_stats
+
+
+class JobStatsView(APIView):
+    """Vue admin pour consulter la profondeur de la file et les latences"""
+    permission_classes = [permissions.IsAuthenticated]
+    
+    def get(self, request):
+        if request.user.role != 'ADMIN':
+            return Response({
+                'error': 'Permission refusée'
+            }, status=status.HTTP_403_FORBIDDEN)
+        return Response(queue_stats(), status=status.HTTP_200_OK)
+
+
+class JobDetailView(APIView):
+    """Vue admin pour suivre une tâche et lire son résultat"""
+    permission_classes = [permissions.IsAuthenticated]
+    
+    def get(self, request, pk):
+        if request.user.role != 'ADMIN':
+            return Response({
+                'error': 'Permission refusée'
+            }, status=status.HTTP_403_FORBIDDEN)
+        job = get_object_or_404(Job, pk=pk)
+        return Response({
+            'id': job.id,
+            'name': job.name,
+            'status': job.status,
+            'attempts': job.attempts,
+            'result': job.result,
+            'last_error': job.last_error,
+            'created_at': job.created_at,
+            'started_at': job.started_at,
+            'finished_at': job.finished_at,
+        }, status=status.HTTP_200_OK)
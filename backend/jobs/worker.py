@@ -0,0 +1,179 @@
+"""
+Exécution des tâches : réservation, exécution, nouvelles tentatives et abandon
+"""
+import logging
+import multiprocessing
+import os
+import socket
+import time
+import traceback
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor, wait, FIRST_COMPLETED
+from datetime import timedelta
+
+import django
+from django.db import close_old_connections
+from django.db.models import F, Q
+from django.utils import timezone
+
+from .models import Job
+from .queue import backoff_delay, get_handler, get_max_attempts, get_setting
+
+logger = logging.getLogger('jobs')
+
+
+def claim_jobs(worker_id, limit):
+    """
+    Réserver jusqu'à `limit` tâches prêtes. Chaque réservation est un UPDATE
+    conditionnel sur le statut, ce qui fonctionne sans SELECT FOR UPDATE.
+    """
+    now = timezone.now()
+    candidates = list(
+        Job.objects.filter(status='PENDING', run_at__lte=now)
+        .order_by('run_at')
+        .values_list('id', flat=True)[:limit]
+    )
+    claimed = []
+    for job_id in candidates:
+        updated = Job.objects.filter(id=job_id, status='PENDING').update(
+            status='RUNNING',
+            locked_by=worker_id,
+            locked_at=now,
+            started_at=now,
+            attempts=F('attempts') + 1,
+        )
+        if updated:
+            claimed.append(job_id)
+    return claimed
+
+
+def requeue_stale_jobs():
+    """Remettre en file les tâches dont le worker a disparu"""
+    limit = timezone.now() - timedelta(seconds=get_setting('LOCK_TIMEOUT'))
+    return Job.objects.filter(status='RUNNING', locked_at__lt=limit).update(
+        status='PENDING',
+        locked_by='',
+        locked_at=None,
+    )
+
+
+def purge_succeeded_jobs():
+    """Supprimer les tâches terminées au-delà de la durée de rétention"""
+    limit = timezone.now() - get_setting('SUCCEEDED_RETENTION')
+    deleted, _ = Job.objects.filter(status='SUCCEEDED', finished_at__lt=limit).delete()
+    return deleted
+
+
+def schedule_periodic_jobs():
+    """
+    Mettre en file les tâches périodiques de JOBS['PERIODIC'] ({nom: intervalle en secondes})
+    si aucune n'est en attente et si la dernière a été créée il y a plus d'un intervalle.
+    """
+    now = timezone.now()
+    scheduled = []
+    for name, interval in get_setting('PERIODIC').items():
+        recent = Job.objects.filter(name=name).filter(
+            Q(status__in=['PENDING', 'RUNNING']) | Q(created_at__gte=now - timedelta(seconds=interval))
+        )
+        if not recent.exists():
+            Job.objects.create(name=name, max_attempts=get_max_attempts(name))
+            scheduled.append(name)
+    return scheduled
+
+
+def _init_process_worker():
+    # Processus lancés avec 'spawn' : Django est initialisé dans l'enfant, qui ouvre ses propres connexions
+    django.setup()
+
+
+def run_job(job_id):
+    """Exécuter une tâche réservée et enregistrer son résultat"""
+    close_old_connections()
+    try:
+        job = Job.objects.get(id=job_id)
+        try:
+            result = get_handler(job.name)(**job.payload)
+        except Exception:
+            error = traceback.format_exc()
+            if job.attempts >= job.max_attempts:
+                Job.objects.filter(id=job.id).update(
+                    status='DEAD',
+                    last_error=error,
+                    finished_at=timezone.now(),
+                )
+                logger.error("Tâche %s #%s abandonnée après %s tentatives", job.name, job.id, job.attempts)
+            else:
+                Job.objects.filter(id=job.id).update(
+                    status='PENDING',
+                    last_error=error,
+                    locked_by='',
+                    locked_at=None,
+                    run_at=timezone.now() + backoff_delay(job.attempts),
+                )
+                logger.warning("Tâche %s #%s en échec (tentative %s)", job.name, job.id, job.attempts)
+            return False
+
+        finished_at = timezone.now()
+        Job.objects.filter(id=job.id).update(status='SUCCEEDED', finished_at=finished_at, result=result)
+        logger.info(
+            "Tâche %s #%s terminée (attente %.3fs, durée %.3fs)",
+            job.name, job.id,
+            (job.started_at - job.created_at).total_seconds(),
+            (finished_at - job.started_at).total_seconds(),
+        )
+        return True
+    finally:
+        close_old_connections()
+
+
+class WorkerPool:
+    """Boucle de distribution des tâches vers un pool de threads ou de processus"""
+
+    def __init__(self, mode=None, concurrency=None, poll_interval=None):
+        self.mode = mode or get_setting('MODE')
+        self.concurrency = concurrency or get_setting('CONCURRENCY')
+        self.poll_interval = poll_interval or get_setting('POLL_INTERVAL')
+        self.worker_id = f"{socket.gethostname()}:{os.getpid()}"
+        self.running = False
+
+    def _make_executor(self):
+        if self.mode == 'process':
+            # 'spawn' plutôt que fork : les processus ne sont créés qu'au premier submit(), alors que
+            # claim_jobs a déjà rouvert une connexion qu'un enfant forké hériterait
+            return ProcessPoolExecutor(
+                max_workers=self.concurrency,
+                mp_context=multiprocessing.get_context('spawn'),
+                initializer=_init_process_worker
+            )
+        return ThreadPoolExecutor(max_workers=self.concurrency, thread_name_prefix='job-worker')
+
+    def run(self, once=False):
+        """Distribuer les tâches jusqu'à l'arrêt (ou jusqu'à épuisement de la file si once)"""
+        self.running = True
+        in_flight = set()
+        last_maintenance = None
+        with self._make_executor() as executor:
+            while self.running:
+                if last_maintenance is None or time.monotonic() - last_maintenance > 60:
+                    requeue_stale_jobs()
+                    purge_succeeded_jobs()
+                    schedule_periodic_jobs()
+                    last_maintenance = time.monotonic()
+
+                free_slots = self.concurrency - len(in_flight)
+                claimed = claim_jobs(self.worker_id, free_slots) if free_slots > 0 else []
+                for job_id in claimed:
+                    in_flight.add(executor.submit(run_job, job_id))
+
+                if once and not claimed and not in_flight:
+                    break
+                if in_flight:
+                    done, in_flight = wait(in_flight, timeout=self.poll_interval, return_when=FIRST_COMPLETED)
+                    for future in done:
+                        if future.exception():
+                            logger.error("Erreur du worker : %s", future.exception())
+                elif not claimed:
+                    time.sleep(self.poll_interval)
+        self.running = False
+
+    def stop(self):
+        self.running = False
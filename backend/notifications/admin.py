@@ -6,6 +6,6 @@ from .models import Notification
 class NotificationAdmin(admin.ModelAdmin):
     list_display = ['user', 'type', 'title', 'is_read', 'created_at']
     list_filter = ['type', 'is_read', 'created_at']
-    search_fields = ['user__email', 'title', 'message']
+    search_fields = ['user__email']
     readonly_fields = ['created_at']
 
@@ -0,0 +1,66 @@
+"""
+Regroupement des notifications similaires reçues dans une courte période
+"""
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.db import connection, transaction
+from django.db.models import F
+from django.utils import timezone
+
+from .models import Notification
+
+User = get_user_model()
+
+
+def get_coalesce_window(type_notification):
+    """Fenêtre de regroupement configurée pour un type (None si pas de regroupement)"""
+    return getattr(settings, 'NOTIFICATIONS_COALESCE_WINDOWS', {}).get(type_notification)
+
+
+def coalesce_notification(user_id, type_notification, related_object_type, related_object_id, params):
+    """
+    Fusionner un nouvel événement dans la dernière notification non lue de même
+    type et de même objet lié dont la première occurrence (created_at) est dans
+    la fenêtre configurée, sinon créer la notification. La fenêtre ne glisse
+    pas : un flux continu d'événements ouvre une nouvelle notification à chaque
+    fenêtre. La fusion est un seul UPDATE qui incrémente le compteur en base et
+    date l'événement dans updated_at ; le message agrégé est rendu à la lecture.
+
+    Recherche et création se font dans une transaction qui verrouille d'abord
+    le destinataire (SELECT FOR UPDATE) : deux événements simultanés sont
+    sérialisés et ne créent pas chacun une notification. Sous SQLite, sans
+    FOR UPDATE, l'UPDATE est la première requête de la transaction : il prend
+    le verrou d'écriture de la base avant l'INSERT.
+
+    Retourne True si l'événement a été fusionné, False si une notification a été créée.
+    """
+    window = get_coalesce_window(type_notification)
+    with transaction.atomic():
+        if window:
+            if connection.features.has_select_for_update:
+                list(User.objects.select_for_update().filter(pk=user_id).values_list('pk', flat=True))
+            now = timezone.now()
+            target = Notification.objects.filter(
+                user_id=user_id,
+                type=type_notification,
+                related_object_type=related_object_type,
+                related_object_id=related_object_id,
+                is_read=False,
+                created_at__gte=now - window
+            ).order_by('-created_at').values('pk')[:1]
+            # emailed_at remis à zéro : les nouvelles occurrences partent dans le prochain digest
+            updated = Notification.objects.filter(pk__in=target).update(
+                occurrences=F('occurrences') + 1,
+                updated_at=now,
+                emailed_at=None
+            )
+            if updated:
+                return True
+        Notification.objects.create(
+            user_id=user_id,
+            type=type_notification,
+            params=params,
+            related_object_type=related_object_type,
+            related_object_id=related_object_id
+        )
+    return False
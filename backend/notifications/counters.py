@@ -0,0 +1,73 @@
+"""
+Compteur de notifications non lues maintenu de façon incrémentale
+"""
+from collections import defaultdict
+
+from django.db.models import Count, F
+
+from .models import Notification, UnreadCounter
+
+
+def count_unread(user_id):
+    """Compter les notifications non lues directement dans la table"""
+    return Notification.objects.filter(user_id=user_id, is_read=False).count()
+
+
+def get_unread_count(user_id):
+    """
+    Lire le compteur de l'utilisateur. S'il n'existe pas encore, il est
+    calculé avec un COUNT puis enregistré.
+    """
+    count = UnreadCounter.objects.filter(user_id=user_id).values_list('count', flat=True).first()
+    if count is None:
+        count = count_unread(user_id)
+        UnreadCounter.objects.bulk_create(
+            [UnreadCounter(user_id=user_id, count=count)],
+            ignore_conflicts=True
+        )
+    return max(count, 0)
+
+
+def adjust_unread_count(user_id, delta):
+    """Ajouter delta au compteur (sans effet si le compteur n'a pas encore été calculé)"""
+    if delta:
+        UnreadCounter.objects.filter(user_id=user_id).update(count=F('count') + delta)
+
+
+def adjust_unread_counts(deltas):
+    """Appliquer des variations {user_id: delta} avec une requête par valeur de delta"""
+    by_delta = defaultdict(list)
+    for user_id, delta in deltas.items():
+        if delta:
+            by_delta[delta].append(user_id)
+    for delta, user_ids in by_delta.items():
+        UnreadCounter.objects.filter(user_id__in=user_ids).update(count=F('count') + delta)
+
+
+def reconcile_unread_counts(batch_size=1000):
+    """
+    Recalculer les compteurs existants à partir de la table des notifications
+    et corriger les écarts. Retourne le nombre de compteurs corrigés.
+    """
+    fixed = 0
+    last_user_id = 0
+    while True:
+        counters = list(
+            UnreadCounter.objects.filter(user_id__gt=last_user_id)
+            .order_by('user_id')
+            .values_list('user_id', 'count')[:batch_size]
+        )
+        if not counters:
+            return fixed
+        last_user_id = counters[-1][0]
+        actual = dict(
+            Notification.objects.filter(
+                user_id__in=[user_id for user_id, _ in counters],
+                is_read=False
+            ).values_list('user_id').annotate(total=Count('id')).order_by()
+        )
+        for user_id, count in counters:
+            expected = actual.get(user_id, 0)
+            if count != expected:
+                UnreadCounter.objects.filter(user_id=user_id).update(count=expected)
+                fixed += 1
@@ -0,0 +1,115 @@
+"""
+Envoi des notifications par email, regroupées en un digest par utilisateur
+"""
+import logging
+import time
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.mail import EmailMessage, get_connection
+from django.utils import timezone
+
+from .models import Notification
+
+logger = logging.getLogger('notifications')
+
+DEFAULTS = {
+    'ENABLED': True,
+    'DELAY': timedelta(minutes=15),
+    'BATCH_SIZE': 100,
+    'MAX_PER_DIGEST': 20,
+    'SUBJECT': "Vos notifications sur la plateforme de stages",
+}
+
+
+def get_email_setting(name):
+    """Lire un paramètre de settings.NOTIFICATIONS_EMAIL avec sa valeur par défaut"""
+    return getattr(settings, 'NOTIFICATIONS_EMAIL', {}).get(name, DEFAULTS[name])
+
+
+def build_digest(user, notifications):
+    """Construire le message regroupant les notifications non lues d'un utilisateur"""
+    max_per_digest = get_email_setting('MAX_PER_DIGEST')
+    lines = ["Bonjour,", "", "Vous avez de nouvelles notifications :", ""]
+    for notification in notifications[:max_per_digest]:
+        lines.append(f"- {notification.title} : {notification.message}")
+    remaining = len(notifications) - max_per_digest
+    if remaining > 0:
+        lines.append(f"... et {remaining} autre(s) notification(s).")
+    lines += ["", "Connectez-vous à la plateforme pour les consulter."]
+
+    subject = get_email_setting('SUBJECT')
+    if len(notifications) > 1:
+        subject = f"{subject} ({len(notifications)})"
+    return EmailMessage(subject=subject, body="\n".join(lines), to=[user.email])
+
+
+def pending_notifications(now=None):
+    """
+    Notifications pas encore traitées dont le dernier événement date de plus
+    que le délai de grâce : celles créées ou regroupées pendant le délai
+    attendent le passage suivant (elles ont pu être lues entre-temps).
+    Une notification regroupée après l'envoi de son digest redevient en
+    attente (voir coalesce_notification).
+    """
+    now = now or timezone.now()
+    return Notification.objects.filter(
+        emailed_at__isnull=True,
+        updated_at__lte=now - get_email_setting('DELAY')
+    )
+
+
+def send_digests(batch_size=None, connection=None, now=None):
+    """
+    Envoyer un digest par utilisateur ayant des notifications en attente.
+    Les utilisateurs sont traités par lots ; chaque lot part sur une seule
+    connexion SMTP ouverte une fois (send_messages). Les notifications déjà
+    lues dans l'application sont marquées sans être envoyées. Une notification
+    n'est marquée qu'après l'envoi : en cas d'échec, le lot sera renvoyé.
+    Le marquage ne porte que sur celles encore en attente à la date lue : une
+    notification regroupée pendant l'envoi (updated_at plus récent, emailed_at
+    remis à zéro) reste en attente pour le digest suivant.
+    """
+    batch_size = batch_size or get_email_setting('BATCH_SIZE')
+    now = now or timezone.now()
+    start = time.monotonic()
+    stats = {'users': 0, 'notifications': 0, 'messages': 0}
+
+    pending = pending_notifications(now)
+    last_user_id = 0
+    while True:
+        user_ids = list(
+            pending.filter(user_id__gt=last_user_id)
+            .order_by('user_id')
+            .values_list('user_id', flat=True)
+            .distinct()[:batch_size]
+        )
+        if not user_ids:
+            break
+        last_user_id = user_ids[-1]
+
+        by_user = {}
+        notification_ids = []
+        for notification in (
+            pending.filter(user_id__in=user_ids)
+            .select_related('user')
+            .order_by('user_id', '-id')
+        ):
+            notification_ids.append(notification.id)
+            if not notification.is_read and notification.user.is_active:
+                by_user.setdefault(notification.user, []).append(notification)
+
+        messages = [build_digest(user, notifications) for user, notifications in by_user.items()]
+        if messages:
+            sent = (connection or get_connection()).send_messages(messages)
+            stats['messages'] += sent or 0
+        marked = pending.filter(id__in=notification_ids).update(emailed_at=now)
+
+        stats['users'] += len(user_ids)
+        stats['notifications'] += marked
+
+    duration = time.monotonic() - start
+    stats['duration_seconds'] = round(duration, 3)
+    stats['messages_per_second'] = round(stats['messages'] / duration, 1) if duration and stats['messages'] else 0
+    logger.info("Digests email : %s", stats)
+    return stats
@@ -0,0 +1,224 @@
+"""
+Diffusion en temps réel des notifications vers les connexions SSE du processus
+"""
+import asyncio
+import logging
+import threading
+import time
+from collections import OrderedDict
+from datetime import datetime, timedelta, timezone as dt_timezone
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.core import signing
+from django.db.models import Q
+from django.utils import timezone
+
+logger = logging.getLogger('notifications')
+
+DEFAULTS = {
+    'HEARTBEAT': 20,
+    'MAX_DURATION': 300,
+    'POLL_INTERVAL': 2,
+    'QUEUE_SIZE': 100,
+    'TICKET_TTL': 60,
+    'POLL_OVERLAP': 10,
+}
+
+# Nombre maximum de notifications lues par requête de récupération
+POLL_BATCH_SIZE = 1000
+# Nombre de versions (id, occurrences) de notifications déjà diffusées gardées pour le dédoublonnage :
+# plus que les lignes relues à chaque passage dans la fenêtre de chevauchement
+PUBLISHED_IDS_SIZE = 10 * POLL_BATCH_SIZE
+
+
+SALT = 'notifications.stream'
+EPOCH = datetime(1970, 1, 1, tzinfo=dt_timezone.utc)
+
+
+def get_stream_setting(name):
+    """Lire un paramètre de settings.NOTIFICATIONS_STREAM avec sa valeur par défaut"""
+    return getattr(settings, 'NOTIFICATIONS_STREAM', {}).get(name, DEFAULTS[name])
+
+
+def sign_stream_ticket(user):
+    """
+    Ticket d'ouverture du flux, à passer dans ?ticket= (EventSource ne permet
+    pas d'envoyer d'en-tête) : signé, limité au flux et valable TICKET_TTL
+    secondes, il remplace le jeton d'accès dans l'URL et les journaux
+    """
+    return signing.Signer(salt=SALT).sign_object({
+        'u': user.id,
+        'e': int(time.time()) + get_stream_setting('TICKET_TTL'),
+    })
+
+
+def read_stream_ticket(ticket):
+    """Identifiant de l'utilisateur du ticket ; BadSignature si invalide ou expiré"""
+    data = signing.Signer(salt=SALT).unsign_object(ticket)
+    if data['e'] <= int(time.time()):
+        raise signing.SignatureExpired("Ticket expiré")
+    return data['u']
+
+
+def event_cursor(notification):
+    """
+    Identifiant d'événement SSE : date de dernière mise à jour en microsecondes.
+    Une notification regroupée est rediffusée avec un nouvel identifiant.
+    """
+    return (notification.updated_at - EPOCH) // timedelta(microseconds=1)
+
+
+def parse_cursor(value):
+    """Date correspondant à un identifiant d'événement, ou None s'il est absent ou invalide"""
+    try:
+        return EPOCH + timedelta(microseconds=int(value))
+    except (TypeError, ValueError, OverflowError):
+        return None
+
+
+class Subscription:
+    """Connexion d'un client : une file d'événements liée à la boucle asyncio du flux"""
+
+    def __init__(self, user_id):
+        self.user_id = user_id
+        self.loop = asyncio.get_running_loop()
+        self.queue = asyncio.Queue(maxsize=get_stream_setting('QUEUE_SIZE'))
+
+    def _put(self, event):
+        try:
+            self.queue.put_nowait(event)
+        except asyncio.QueueFull:
+            # Client trop lent : il se resynchronisera via Last-Event-ID à la reconnexion
+            logger.warning("File SSE pleine pour l'utilisateur %s, événement ignoré", self.user_id)
+
+    def push(self, event):
+        """Ajouter un événement depuis n'importe quel thread"""
+        self.loop.call_soon_threadsafe(self._put, event)
+
+
+class NotificationHub:
+    """
+    Répartit les événements de notification entre les abonnés du processus.
+    Les notifications créées ou regroupées dans un autre processus (workers)
+    sont récupérées d'après updated_at par une seule requête périodique par
+    processus, limitée aux utilisateurs connectés.
+
+    updated_at est fixé avant le commit : une ligne validée juste après une
+    lecture peut être datée d'avant celle-ci. Chaque lecture reprend donc
+    POLL_OVERLAP secondes avant le début de la précédente (durée maximale
+    supposée d'une transaction, décalage d'horloge compris) ; les versions
+    déjà diffusées sont écartées par (id, occurrences).
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._subscribers = {}
+        self._poller = None
+        self._last_polled = None
+        self._published_ids = OrderedDict()
+
+    def subscribe(self, user_id):
+        subscription = Subscription(user_id)
+        with self._lock:
+            self._subscribers.setdefault(user_id, set()).add(subscription)
+        if self._poller is None or self._poller.done():
+            # Reprise après une période sans connexion : rien à relire avant cet instant
+            self._last_polled = timezone.now()
+            self._poller = asyncio.get_running_loop().create_task(self._poll_database())
+        return subscription
+
+    def unsubscribe(self, subscription):
+        with self._lock:
+            subscribers = self._subscribers.get(subscription.user_id)
+            if subscribers:
+                subscribers.discard(subscription)
+                if not subscribers:
+                    del self._subscribers[subscription.user_id]
+
+    def connection_count(self):
+        with self._lock:
+            return sum(len(subscribers) for subscribers in self._subscribers.values())
+
+    def publish(self, user_id, event, data, event_id=None):
+        """Envoyer un événement à toutes les connexions d'un utilisateur"""
+        with self._lock:
+            subscribers = list(self._subscribers.get(user_id, ()))
+        for subscription in subscribers:
+            subscription.push({'event': event, 'data': data, 'id': event_id})
+
+    def _not_published(self, key):
+        with self._lock:
+            return key not in self._published_ids
+
+    def _mark_published(self, key):
+        """Retourne False si cette version de la notification a déjà été diffusée par ce processus"""
+        with self._lock:
+            if key in self._published_ids:
+                return False
+            self._published_ids[key] = True
+            if len(self._published_ids) > PUBLISHED_IDS_SIZE:
+                self._published_ids.popitem(last=False)
+            return True
+
+    def publish_notification(self, notification):
+        """Diffuser une notification créée ou regroupée ainsi que le nouveau compteur de non lues"""
+        from .serializers import NotificationSerializer
+        with self._lock:
+            if notification.user_id not in self._subscribers:
+                return
+        if not self._mark_published((notification.id, notification.occurrences)):
+            return
+        self.publish(
+            notification.user_id,
+            'notification',
+            NotificationSerializer(notification).data,
+            event_id=event_cursor(notification),
+        )
+        self.publish_unread_count(notification.user_id)
+
+    def publish_unread_count(self, user_id):
+        from .counters import get_unread_count
+        with self._lock:
+            if user_id not in self._subscribers:
+                return
+        count = get_unread_count(user_id)
+        self.publish(user_id, 'unread_count', {'unread_count': count})
+
+    def _fetch_new_notifications(self):
+        from .models import Notification
+        since, self._last_polled = self._last_polled, timezone.now()
+        with self._lock:
+            user_ids = list(self._subscribers)
+        if since is None or not user_ids:
+            return []
+        queryset = Notification.objects.filter(user_id__in=user_ids).order_by('updated_at', 'id')
+        # Pagination (updated_at, id) à l'intérieur de la fenêtre, pour ne pas relire le même lot
+        position = (since - timedelta(seconds=get_stream_setting('POLL_OVERLAP')), 0)
+        notifications = []
+        while True:
+            updated_at, notification_id = position
+            batch = list(queryset.filter(
+                Q(updated_at__gt=updated_at) | Q(updated_at=updated_at, id__gt=notification_id)
+            )[:POLL_BATCH_SIZE])
+            notifications.extend(batch)
+            if len(batch) < POLL_BATCH_SIZE:
+                break
+            position = (batch[-1].updated_at, batch[-1].id)
+        return [
+            notification for notification in notifications
+            if self._not_published((notification.id, notification.occurrences))
+        ]
+
+    async def _poll_database(self):
+        while self.connection_count():
+            try:
+                notifications = await sync_to_async(self._fetch_new_notifications)()
+                for notification in notifications:
+                    await sync_to_async(self.publish_notification)(notification)
+            except Exception:
+                logger.exception("Erreur lors de la récupération des nouvelles notifications")
+            await asyncio.sleep(get_stream_setting('POLL_INTERVAL'))
+
+
+hub = NotificationHub()
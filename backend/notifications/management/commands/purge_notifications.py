@@ -0,0 +1,41 @@
+"""
+Commande pour appliquer la politique de rétention des notifications
+"""
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from notifications.retention import purge_notifications
+
+
+class Command(BaseCommand):
+    help = (
+        "Supprime (et archive éventuellement en JSONL compressé) les notifications lues "
+        "au-delà de leur durée de rétention ainsi que les notifications orphelines"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=500, help="Lignes supprimées par transaction")
+        parser.add_argument(
+            '--archive-dir',
+            default=getattr(settings, 'NOTIFICATIONS_ARCHIVE_DIR', None),
+            help="Dossier des archives .jsonl.gz (par défaut : NOTIFICATIONS_ARCHIVE_DIR, sinon pas d'archive)",
+        )
+        parser.add_argument('--pause', type=float, default=0, help="Pause en secondes entre deux lots")
+        parser.add_argument('--no-orphans', action='store_true', help="Ne pas supprimer les notifications orphelines")
+        parser.add_argument('--dry-run', action='store_true', help="Compter les lignes concernées sans rien supprimer")
+
+    def handle(self, *args, **options):
+        stats = purge_notifications(
+            batch_size=options['batch_size'],
+            archive_dir=options['archive_dir'],
+            pause=options['pause'],
+            orphans=not options['no_orphans'],
+            dry_run=options['dry_run'],
+        )
+        action = "à supprimer" if options['dry_run'] else "supprimée(s)"
+        self.stdout.write(f"Expirées {action} : {stats['expired']}")
+        if 'orphans' in stats:
+            self.stdout.write(f"Orphelines {action} : {stats['orphans']}")
+        if 'archive' in stats:
+            self.stdout.write(f"Archive : {stats['archive']}")
+        self.stdout.write(f"Durée : {stats['duration_seconds']}s")
@@ -0,0 +1,20 @@
+"""
+Commande pour recalculer les compteurs de notifications non lues
+"""
+import time
+
+from django.core.management.base import BaseCommand
+
+from notifications.counters import reconcile_unread_counts
+
+
+class Command(BaseCommand):
+    help = "Corrige les compteurs de notifications non lues à partir de la table des notifications"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=1000)
+
+    def handle(self, *args, **options):
+        start = time.monotonic()
+        fixed = reconcile_unread_counts(batch_size=options['batch_size'])
+        self.stdout.write(f"{fixed} compteur(s) corrigé(s) en {time.monotonic() - start:.2f}s")
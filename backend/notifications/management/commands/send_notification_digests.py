@@ -0,0 +1,20 @@
+"""
+Commande pour envoyer les notifications en attente par email
+"""
+from django.core.management.base import BaseCommand
+
+from notifications.emails import send_digests
+
+
+class Command(BaseCommand):
+    help = "Envoie un digest email par utilisateur ayant des notifications en attente"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=None, help="Utilisateurs par lot (une connexion SMTP par lot)")
+
+    def handle(self, *args, **options):
+        stats = send_digests(batch_size=options['batch_size'])
+        self.stdout.write(f"Utilisateurs traités : {stats['users']}")
+        self.stdout.write(f"Notifications traitées : {stats['notifications']}")
+        self.stdout.write(f"Emails envoyés : {stats['messages']}")
+        self.stdout.write(f"Durée : {stats['duration_seconds']}s ({stats['messages_per_second']} emails/s)")
@@ -0,0 +1,37 @@
+# Generated by Django 4.2.7 on 2026-10-19 18:44
+
+from django.db import migrations, models
+from django.db.models import Count, Min
+
+
+def supprimer_doublons(apps, schema_editor):
+    """Garder la plus ancienne notification NOUVEAU_STAGIAIRE par utilisateur et stagiaire"""
+    Notification = apps.get_model('notifications', 'Notification')
+    doublons = (
+        Notification.objects.filter(type='NOUVEAU_STAGIAIRE')
+        .values('user', 'related_object_type', 'related_object_id')
+        .annotate(premier_id=Min('id'), nombre=Count('id'))
+        .filter(nombre__gt=1)
+    )
+    for doublon in doublons:
+        Notification.objects.filter(
+            type='NOUVEAU_STAGIAIRE',
+            user=doublon['user'],
+            related_object_type=doublon['related_object_type'],
+            related_object_id=doublon['related_object_id'],
+        ).exclude(id=doublon['premier_id']).delete()
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('notifications', '0002_alter_notification_type'),
+    ]
+
+    operations = [
+        migrations.RunPython(supprimer_doublons, migrations.RunPython.noop),
+        migrations.AddConstraint(
+            model_name='notification',
+            constraint=models.UniqueConstraint(condition=models.Q(('type', 'NOUVEAU_STAGIAIRE')), fields=('user', 'type', 'related_object_type', 'related_object_id'), name='unique_nouveau_stagiaire_notification'),
+        ),
+    ]
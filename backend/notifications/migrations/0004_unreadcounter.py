@@ -0,0 +1,27 @@
+# Generated by Django 4.2.7 on 2026-10-19 18:49
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounts', '0001_initial'),
+        ('notifications', '0003_notification_unique_nouveau_stagiaire'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='UnreadCounter',
+            fields=[
+                ('user', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='unread_notification_counter', serialize=False, to=settings.AUTH_USER_MODEL, verbose_name='Utilisateur')),
+                ('count', models.IntegerField(default=0, verbose_name='Non lues')),
+            ],
+            options={
+                'verbose_name': 'Compteur de notifications non lues',
+                'verbose_name_plural': 'Compteurs de notifications non lues',
+            },
+        ),
+    ]
@@ -0,0 +1,139 @@
+# Generated by Django 4.2.7 on 2026-10-19 18:53
+
+import re
+
+from django.db import migrations, models
+
+BATCH_SIZE = 1000
+
+# Titre attendu et format du message généré pour chaque type
+FORMATS = {
+    'NOUVELLE_CANDIDATURE': [
+        ('Nouvelle candidature', re.compile(r"^Une nouvelle candidature a été reçue pour l'offre '(?P<offre>.*)'$", re.S)),
+        ('Nouvelles candidatures', re.compile(r"^\d+ nouvelles candidatures ont été reçues pour l'offre '(?P<offre>.*)'$", re.S)),
+    ],
+    'CANDIDATURE_ACCEPTEE': [
+        ('Candidature acceptée', re.compile(r"^Votre candidature pour l'offre '(?P<offre>.*)' a été acceptée$", re.S)),
+    ],
+    'CANDIDATURE_REFUSEE': [
+        ('Candidature refusée', re.compile(r"^Votre candidature pour l'offre '(?P<offre>.*)' a été refusée$", re.S)),
+    ],
+    'NOUVEAU_STAGIAIRE': [
+        ('Nouveau stagiaire inscrit', re.compile(
+            r"^Un nouveau stagiaire (?P<stagiaire>.*?)(?: dans le domaine (?P<domaine>.*))? "
+            r"vient de s'inscrire sur la plateforme\.$",
+            re.S
+        )),
+    ],
+}
+
+
+def extraire_params(type_notification, title, message):
+    """Retrouver les paramètres d'une notification ; sinon conserver le texte tel quel"""
+    for expected_title, pattern in FORMATS.get(type_notification, []):
+        match = pattern.match(message)
+        if match and title == expected_title:
+            return {key: value for key, value in match.groupdict().items() if value is not None}
+    return {'title': title, 'message': message}
+
+
+def convertir_notifications(apps, schema_editor):
+    Notification = apps.get_model('notifications', 'Notification')
+    batch = []
+    for notification in Notification.objects.only('id', 'type', 'title', 'message').iterator(chunk_size=BATCH_SIZE):
+        notification.params = extraire_params(notification.type, notification.title, notification.message)
+        batch.append(notification)
+        if len(batch) >= BATCH_SIZE:
+            Notification.objects.bulk_update(batch, ['params'])
+            batch = []
+    if batch:
+        Notification.objects.bulk_update(batch, ['params'])
+
+
+# Gabarits en vigueur lors de cette migration, figés ici : le retour arrière ne dépend pas du code de l'application
+# {type: (titre, message, titre regroupé, message regroupé)}
+GABARITS = {
+    'NOUVELLE_CANDIDATURE': (
+        "Nouvelle candidature",
+        "Une nouvelle candidature a été reçue pour l'offre '{offre}'",
+        "Nouvelles candidatures",
+        "{count} nouvelles candidatures ont été reçues pour l'offre '{offre}'",
+    ),
+    'CANDIDATURE_ACCEPTEE': ("Candidature acceptée", "Votre candidature pour l'offre '{offre}' a été acceptée", None, None),
+    'CANDIDATURE_REFUSEE': ("Candidature refusée", "Votre candidature pour l'offre '{offre}' a été refusée", None, None),
+    'OFFRE_VALIDEE': ("Offre validée", "Votre offre '{offre}' a été validée", None, None),
+    'OFFRE_REFUSEE': ("Offre refusée", "Votre offre '{offre}' a été refusée", None, None),
+    'NOUVEAU_STAGIAIRE': (
+        "Nouveau stagiaire inscrit",
+        "Un nouveau stagiaire {stagiaire}{domaine_info} vient de s'inscrire sur la plateforme.",
+        "Nouveaux stagiaires inscrits",
+        "{count} nouveaux stagiaires{domaine_info} viennent de s'inscrire sur la plateforme.",
+    ),
+}
+
+
+class ParamsParDefaut(dict):
+    def __missing__(self, key):
+        return ''
+
+
+def rendre_textes(type_notification, params, occurrences):
+    """(titre, message) d'une notification, comme les colonnes title et message d'avant cette migration"""
+    if type_notification not in GABARITS:
+        return params.get('title', ''), params.get('message', '')
+    title, message, title_many, message_many = GABARITS[type_notification]
+    if occurrences > 1 and title_many:
+        title, message = title_many, message_many
+    domaine = params.get('domaine')
+    context = ParamsParDefaut(params, count=occurrences, domaine_info=f" dans le domaine {domaine}" if domaine else "")
+    return params.get('title', title.format_map(context)), params.get('message', message.format_map(context))
+
+
+def restaurer_textes(apps, schema_editor):
+    Notification = apps.get_model('notifications', 'Notification')
+    batch = []
+    for notification in Notification.objects.only('id', 'type', 'params', 'occurrences').iterator(chunk_size=BATCH_SIZE):
+        notification.title, notification.message = rendre_textes(
+            notification.type, notification.params, notification.occurrences
+        )
+        batch.append(notification)
+        if len(batch) >= BATCH_SIZE:
+            Notification.objects.bulk_update(batch, ['title', 'message'])
+            batch = []
+    if batch:
+        Notification.objects.bulk_update(batch, ['title', 'message'])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('notifications', '0005_notification_occurrences'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='notification',
+            name='params',
+            field=models.JSONField(blank=True, default=dict, help_text='Valeurs utilisées pour rendre le titre et le message (voir rendering.py)', verbose_name='Paramètres'),
+        ),
+        migrations.RunPython(convertir_notifications, restaurer_textes),
+        # Valeurs par défaut pour que le retour arrière puisse recréer les colonnes
+        migrations.AlterField(
+            model_name='notification',
+            name='title',
+            field=models.CharField(default='', max_length=200, verbose_name='Titre'),
+        ),
+        migrations.AlterField(
+            model_name='notification',
+            name='message',
+            field=models.TextField(default='', verbose_name='Message'),
+        ),
+        migrations.RemoveField(
+            model_name='notification',
+            name='message',
+        ),
+        migrations.RemoveField(
+            model_name='notification',
+            name='title',
+        ),
+    ]
@@ -0,0 +1,30 @@
+# Generated by Django 4.2.7 on 2026-10-19 18:57
+
+from django.db import migrations, models
+from django.db.models import F
+
+
+def marquer_existantes(apps, schema_editor):
+    """Les notifications existantes ne doivent pas partir dans le premier digest"""
+    Notification = apps.get_model('notifications', 'Notification')
+    Notification.objects.filter(emailed_at__isnull=True).update(emailed_at=F('created_at'))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('notifications', '0006_notification_params'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='notification',
+            name='emailed_at',
+            field=models.DateTimeField(blank=True, help_text="Vide tant que la notification n'a pas été traitée par le digest email", null=True, verbose_name="Date d'envoi par email"),
+        ),
+        migrations.RunPython(marquer_existantes, migrations.RunPython.noop),
+        migrations.AddIndex(
+            model_name='notification',
+            index=models.Index(condition=models.Q(('emailed_at__isnull', True)), fields=['user', 'id'], name='notification_email_pending'),
+        ),
+    ]
@@ -0,0 +1,31 @@
+# Generated by Django 4.2.7 on 2026-10-19 20:08
+
+from django.db import migrations, models
+from django.db.models import F
+import django.utils.timezone
+
+
+def initialiser_updated_at(apps, schema_editor):
+    """Notifications existantes : dernière mise à jour à la date de création"""
+    Notification = apps.get_model('notifications', 'Notification')
+    Notification.objects.update(updated_at=F('created_at'))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('notifications', '0007_notification_emailed_at'),
+    ]
+
+    operations = [
+        migrations.AlterModelOptions(
+            name='notification',
+            options={'ordering': ['-updated_at'], 'verbose_name': 'Notification', 'verbose_name_plural': 'Notifications'},
+        ),
+        migrations.AddField(
+            model_name='notification',
+            name='updated_at',
+            field=models.DateTimeField(default=django.utils.timezone.now, help_text='Date du dernier événement regroupé dans la notification', verbose_name='Date de mise à jour'),
+        ),
+        migrations.RunPython(initialiser_updated_at, migrations.RunPython.noop),
+    ]
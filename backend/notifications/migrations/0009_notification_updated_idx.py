@@ -0,0 +1,17 @@
+# Generated by Django 4.2.7 on 2026-10-19 20:10
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('notifications', '0008_notification_updated_at'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='notification',
+            index=models.Index(fields=['updated_at', 'id'], name='notification_updated_idx'),
+        ),
+    ]
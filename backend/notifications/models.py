@@ -4,6 +4,7 @@ Modèles pour les notifications
 from django.db import models
 from django.contrib.auth import get_user_model
 from django.utils import timezone
+from django.utils.functional import cached_property
 
 User = get_user_model()
 
@@ -31,8 +32,12 @@ class Notification(models.Model):
         choices=TYPE_CHOICES,
         verbose_name="Type de notification"
     )
-    title = models.CharField(max_length=200, verbose_name="Titre")
-    message = models.TextField(verbose_name="Message")
+    params = models.JSONField(
+        default=dict,
+        blank=True,
+        verbose_name="Paramètres",
+        help_text="Valeurs utilisées pour rendre le titre et le message (voir rendering.py)"
+    )
     is_read = models.BooleanField(default=False, verbose_name="Lu")
     related_object_type = models.CharField(
         max_length=50,
@@ -45,13 +50,80 @@ class Notification(models.Model):
         blank=True,
         verbose_name="ID de l'objet lié"
     )
+    occurrences = models.PositiveIntegerField(
+        default=1,
+        verbose_name="Nombre d'événements regroupés"
+    )
     created_at = models.DateTimeField(auto_now_add=True, verbose_name="Date de création")
+    updated_at = models.DateTimeField(
+        default=timezone.now,
+        verbose_name="Date de mise à jour",
+        help_text="Date du dernier événement regroupé dans la notification"
+    )
+    emailed_at = models.DateTimeField(
+        null=True,
+        blank=True,
+        verbose_name="Date d'envoi par email",
+        help_text="Vide tant que la notification n'a pas été traitée par le digest email"
+    )
     
     class Meta:
         verbose_name = "Notification"
         verbose_name_plural = "Notifications"
-        ordering = ['-created_at']
+        ordering = ['-updated_at']
+        constraints = [
+            # Un stagiaire n'est annoncé qu'une seule fois à chaque utilisateur
+            models.UniqueConstraint(
+                fields=['user', 'type', 'related_object_type', 'related_object_id'],
+                condition=models.Q(type='NOUVEAU_STAGIAIRE'),
+                name='unique_nouveau_stagiaire_notification',
+            ),
+        ]
+        indexes = [
+            # Index partiel : seules les notifications en attente de digest email
+            models.Index(
+                fields=['user', 'id'],
+                condition=models.Q(emailed_at__isnull=True),
+                name='notification_email_pending',
+            ),
+            # Lecture périodique des notifications créées ou regroupées pour le flux SSE
+            models.Index(fields=['updated_at', 'id'], name='notification_updated_idx'),
+        ]
     
     def __str__(self):
         return f"{self.user.email} - {self.title}"
+    
+    @cached_property
+    def rendered(self):
+        """(titre, message) rendus une seule fois à partir du type et des paramètres"""
+        from .rendering import render_notification
+        return render_notification(self.type, self.params, self.occurrences)
+    
+    @property
+    def title(self):
+        return self.rendered[0]
+    
+    @property
+    def message(self):
+        return self.rendered[1]
+
 
+
+class UnreadCounter(models.Model):
+    """Nombre de notifications non lues par utilisateur, maintenu de façon incrémentale"""
+    
+    user = models.OneToOneField(
+        User,
+        on_delete=models.CASCADE,
+        primary_key=True,
+        related_name='unread_notification_counter',
+        verbose_name="Utilisateur"
+    )
+    count = models.IntegerField(default=0, verbose_name="Non lues")
+    
+    class Meta:
+        verbose_name = "Compteur de notifications non lues"
+        verbose_name_plural = "Compteurs de notifications non lues"
+    
+    def __str__(self):
+        return f"{self.user_id} - {self.count}"
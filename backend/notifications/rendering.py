@@ -0,0 +1,97 @@
+"""
+Rendu des notifications à partir de leur type et de leurs paramètres
+"""
+from functools import lru_cache
+from string import Formatter
+from typing import NamedTuple
+
+
+class NotificationTemplate(NamedTuple):
+    """Gabarits d'une notification ; les variantes *_many servent aux notifications regroupées"""
+    title: str
+    message: str
+    title_many: str = None
+    message_many: str = None
+
+
+TEMPLATES = {
+    'NOUVELLE_CANDIDATURE': NotificationTemplate(
+        title="Nouvelle candidature",
+        message="Une nouvelle candidature a été reçue pour l'offre '{offre}'",
+        title_many="Nouvelles candidatures",
+        message_many="{count} nouvelles candidatures ont été reçues pour l'offre '{offre}'",
+    ),
+    'CANDIDATURE_ACCEPTEE': NotificationTemplate(
+        title="Candidature acceptée",
+        message="Votre candidature pour l'offre '{offre}' a été acceptée",
+    ),
+    'CANDIDATURE_REFUSEE': NotificationTemplate(
+        title="Candidature refusée",
+        message="Votre candidature pour l'offre '{offre}' a été refusée",
+    ),
+    'OFFRE_VALIDEE': NotificationTemplate(
+        title="Offre validée",
+        message="Votre offre '{offre}' a été validée",
+    ),
+    'OFFRE_REFUSEE': NotificationTemplate(
+        title="Offre refusée",
+        message="Votre offre '{offre}' a été refusée",
+    ),
+    'NOUVEAU_STAGIAIRE': NotificationTemplate(
+        title="Nouveau stagiaire inscrit",
+        message="Un nouveau stagiaire {stagiaire}{domaine_info} vient de s'inscrire sur la plateforme.",
+        title_many="Nouveaux stagiaires inscrits",
+        message_many="{count} nouveaux stagiaires{domaine_info} viennent de s'inscrire sur la plateforme.",
+    ),
+}
+
+
+def _domaine_info(params):
+    domaine = params.get('domaine')
+    return f" dans le domaine {domaine}" if domaine else ""
+
+
+# Valeurs dérivées des paramètres, calculées au rendu
+DERIVED_PARAMS = {
+    'domaine_info': _domaine_info,
+}
+
+
+@lru_cache(maxsize=None)
+def compile_template(template):
+    """Découper un gabarit en (texte, nom de paramètre) une seule fois par gabarit"""
+    return tuple((literal, field) for literal, field, _, _ in Formatter().parse(template))
+
+
+def render_template(template, params):
+    parts = []
+    for literal, field in compile_template(template):
+        parts.append(literal)
+        if field is not None:
+            if field in params:
+                value = params[field]
+            elif field in DERIVED_PARAMS:
+                value = DERIVED_PARAMS[field](params)
+            else:
+                value = ''
+            parts.append(str(value))
+    return ''.join(parts)
+
+
+def render_notification(type_notification, params, occurrences=1):
+    """
+    Retourne (titre, message) pour une notification. Les paramètres 'title'
+    et 'message', s'ils sont présents, remplacent le gabarit (anciennes
+    notifications qui n'ont pas pu être converties).
+    """
+    template = TEMPLATES.get(type_notification)
+    if template is None:
+        return params.get('title', ''), params.get('message', '')
+
+    context = dict(params, count=occurrences)
+    many = occurrences > 1
+    title_template = template.title_many if many and template.title_many else template.title
+    message_template = template.message_many if many and template.message_many else template.message
+    title = params['title'] if 'title' in params else render_template(title_template, context)
+    message = params['message'] if 'message' in params else render_template(message_template, context)
+    return title, message
@@ -0,0 +1,131 @@
+"""
+Politique de rétention des notifications : purge par lots et archivage
+"""
+import gzip
+import json
+import logging
+import os
+import time
+
+from django.conf import settings
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import transaction
+from django.db.models import Exists, OuterRef, Q
+from django.utils import timezone
+
+from .models import Notification
+from stages.models import OffreStage
+from accounts.models import Stagiaire
+
+logger = logging.getLogger('notifications')
+
+# Modèle référencé par chaque valeur de related_object_type
+RELATED_MODELS = {
+    'offre': OffreStage,
+    'stagiaire': Stagiaire,
+}
+
+
+def get_retention_policy():
+    """Durées de rétention des notifications lues, par type ('default' pour les autres types)"""
+    return getattr(settings, 'NOTIFICATIONS_RETENTION', {})
+
+
+def expired_notifications(now=None):
+    """Notifications lues plus anciennes que la durée de rétention de leur type"""
+    now = now or timezone.now()
+    policy = dict(get_retention_policy())
+    default = policy.pop('default', None)
+
+    condition = Q()
+    for type_notification, retention in policy.items():
+        condition |= Q(type=type_notification, created_at__lt=now - retention)
+    if default is not None:
+        condition |= Q(created_at__lt=now - default) & ~Q(type__in=list(policy))
+    if not condition:
+        return Notification.objects.none()
+    return Notification.objects.filter(condition, is_read=True)
+
+
+def orphan_notifications():
+    """
+    Notifications dont l'objet lié (offre, stagiaire) a été supprimé. Celles
+    sans identifiant d'objet (cohorte de stagiaires) ne sont jamais orphelines.
+    """
+    condition = Q()
+    for related_object_type, model in RELATED_MODELS.items():
+        exists = Exists(model.objects.filter(pk=OuterRef('related_object_id')))
+        condition |= Q(related_object_type=related_object_type) & ~exists
+    return Notification.objects.filter(condition, related_object_id__isnull=False)
+
+
+class JsonlArchive:
+    """Archive compressée au format JSON Lines (une notification par ligne)"""
+
+    def __init__(self, directory):
+        os.makedirs(directory, exist_ok=True)
+        filename = f"notifications-{timezone.now():%Y%m%d-%H%M%S}.jsonl.gz"
+        self.path = os.path.join(directory, filename)
+        self._file = gzip.open(self.path, 'at', encoding='utf-8')
+
+    def write(self, rows):
+        for row in rows:
+            self._file.write(json.dumps(row, cls=DjangoJSONEncoder, ensure_ascii=False))
+            self._file.write('\n')
+        self._file.flush()
+
+    def close(self):
+        self._file.close()
+
+
+def purge(queryset, batch_size=500, archive=None, pause=0):
+    """
+    Supprimer les lignes du queryset par petits lots, chacun dans sa propre
+    transaction, afin de ne jamais garder de verrou d'écriture longtemps.
+    Retourne le nombre de lignes supprimées.
+    """
+    removed = 0
+    last_id = 0
+    while True:
+        ids = list(
+            queryset.filter(pk__gt=last_id).order_by('pk').values_list('pk', flat=True)[:batch_size]
+        )
+        if not ids:
+            return removed
+        last_id = ids[-1]
+        with transaction.atomic():
+            batch = Notification.objects.filter(pk__in=ids)
+            if archive is not None:
+                archive.write(batch.values())
+            # delete() déclenche post_delete, qui tient à jour les compteurs de non lues
+            batch.delete()
+        removed += len(ids)
+        if pause:
+            time.sleep(pause)
+
+
+def purge_notifications(batch_size=500, archive_dir=None, pause=0, orphans=True, dry_run=False):
+    """Appliquer la politique de rétention et supprimer les notifications orphelines"""
+    start = time.monotonic()
+    querysets = {'expired': expired_notifications()}
+    if orphans:
+        querysets['orphans'] = orphan_notifications()
+
+    if dry_run:
+        stats = {name: queryset.count() for name, queryset in querysets.items()}
+    else:
+        archive = JsonlArchive(archive_dir) if archive_dir else None
+        try:
+            stats = {
+                name: purge(queryset, batch_size=batch_size, archive=archive, pause=pause)
+                for name, queryset in querysets.items()
+            }
+        finally:
+            if archive is not None:
+                archive.close()
+        if archive is not None:
+            stats['archive'] = archive.path
+
+    stats['duration_seconds'] = round(time.monotonic() - start, 3)
+    logger.info("Purge des notifications : %s", stats)
+    return stats
@@ -6,13 +6,32 @@ from .models import Notification
 
 
 class NotificationSerializer(serializers.ModelSerializer):
-    """Serializer pour les notifications"""
+    """Serializer pour les notifications (titre et message rendus à la lecture)"""
+    title = serializers.CharField(read_only=True)
+    message = serializers.CharField(read_only=True)
     
     class Meta:
         model = Notification
         fields = [
             'id', 'type', 'title', 'message', 'is_read',
-            'related_object_type', 'related_object_id', 'created_at'
+            'related_object_type', 'related_object_id', 'occurrences', 'created_at', 'updated_at'
         ]
-        read_only_fields = ['id', 'created_at']
+        read_only_fields = ['id', 'occurrences', 'created_at', 'updated_at']
 
+
+
+class NotificationBulkReadSerializer(serializers.Serializer):
+    """Serializer pour marquer plusieurs notifications comme lues"""
+    ids = serializers.ListField(
+        child=serializers.IntegerField(min_value=1),
+        required=False,
+        allow_empty=False,
+        max_length=1000
+    )
+    up_to_id = serializers.IntegerField(required=False, min_value=1)
+    
+    def validate(self, data):
+        """Exactement un des deux critères doit être fourni"""
+        if ('ids' in data) == ('up_to_id' in data):
+            raise serializers.ValidationError("Fournir soit 'ids', soit 'up_to_id'")
+        return data
@@ -0,0 +1,183 @@
+"""
+Tâches en arrière-plan pour créer les notifications
+"""
+from django.conf import settings
+from django.db import transaction
+from jobs.queue import job
+from .coalescing import coalesce_notification
+from .emails import get_email_setting, send_digests
+from .counters import adjust_unread_counts, reconcile_unread_counts
+from .models import Notification
+from .retention import purge_notifications
+from stages.models import Candidature, OffreStage
+from accounts.models import Domaine, Stagiaire
+from accounts.references import find_reference
+
+
+@job('notifications.nouvelle_candidature')
+def notifier_nouvelle_candidature(candidature_id):
+    """Notifier l'entreprise propriétaire de l'offre d'une nouvelle candidature"""
+    candidature = Candidature.objects.select_related('offre__entreprise').filter(id=candidature_id).first()
+    if candidature is None:
+        return
+    offre = candidature.offre
+    coalesce_notification(
+        user_id=offre.entreprise.user_id,
+        type_notification='NOUVELLE_CANDIDATURE',
+        related_object_type='offre',
+        related_object_id=offre.id,
+        params={'offre': offre.titre}
+    )
+
+
+@job('notifications.statut_candidature')
+def notifier_statut_candidature(candidature_id, statut):
+    """Notifier le stagiaire de l'acceptation ou du refus de sa candidature"""
+    candidature = Candidature.objects.select_related('offre', 'stagiaire').filter(id=candidature_id).first()
+    if candidature is None:
+        return
+    type_notification = 'CANDIDATURE_ACCEPTEE' if statut == 'ACCEPTEE' else 'CANDIDATURE_REFUSEE'
+    
+    Notification.objects.create(
+        user_id=candidature.stagiaire.user_id,
+        type=type_notification,
+        params={'offre': candidature.offre.titre},
+        related_object_type='offre',
+        related_object_id=candidature.offre.id
+    )
+
+
+@job('notifications.statut_offre')
+def notifier_statut_offre(offre_id, est_active):
+    """Notifier l'entreprise de la validation ou du refus de son offre"""
+    offre = OffreStage.objects.select_related('entreprise').filter(id=offre_id).first()
+    if offre is None:
+        return
+    Notification.objects.create(
+        user_id=offre.entreprise.user_id,
+        type='OFFRE_VALIDEE' if est_active else 'OFFRE_REFUSEE',
+        params={'offre': offre.titre},
+        related_object_type='offre',
+        related_object_id=offre.id
+    )
+
+
+@job('notifications.nouveau_stagiaire')
+def notifier_nouveau_stagiaire(stagiaire_id):
+    """
+    Notifier les entreprises concernées de l'inscription d'un nouveau stagiaire.
+    Le stagiaire est verrouillé (SELECT FOR UPDATE) pendant la transaction :
+    deux exécutions de la tâche sont sérialisées, les destinataires déjà
+    notifiés sont donc exactement ceux écartés avant l'insertion et seuls
+    les compteurs des notifications insérées sont incrémentés. Sous SQLite,
+    sans FOR UPDATE, un écart éventuel est corrigé par reconcile_unread_counts.
+    """
+    with transaction.atomic():
+        stagiaire = Stagiaire.objects.select_for_update().filter(id=stagiaire_id).first()
+        if stagiaire is None:
+            return
+        
+        # Cibler en une seule requête les utilisateurs des entreprises qui ont des offres actives,
+        # dans le domaine du stagiaire s'il en a spécifié un
+        offres_actives = OffreStage.objects.filter(est_active=True)
+        if stagiaire.domaine_ref_id:
+            offres_actives = offres_actives.filter(domaine_ref_id=stagiaire.domaine_ref_id)
+        # order_by() : sans quoi le tri par défaut (-date_creation) s'ajoute au SELECT DISTINCT
+        user_ids = set(offres_actives.order_by().values_list('entreprise__user_id', flat=True).distinct())
+        # Ignorer les destinataires déjà notifiés si la tâche est rejouée
+        user_ids -= set(
+            Notification.objects.filter(
+                type='NOUVEAU_STAGIAIRE',
+                related_object_type='stagiaire',
+                related_object_id=stagiaire.id
+            ).values_list('user_id', flat=True)
+        )
+        
+        params = {'stagiaire': f"{stagiaire.prenom} {stagiaire.nom}", 'domaine': stagiaire.domaine}
+        notifications = [
+            Notification(
+                user_id=user_id,
+                type='NOUVEAU_STAGIAIRE',
+                params=params,
+                related_object_type='stagiaire',
+                related_object_id=stagiaire.id
+            )
+            for user_id in user_ids
+        ]
+        
+        # Filet de sécurité : la contrainte d'unicité (user, type, objet lié) écarte un éventuel doublon
+        Notification.objects.bulk_create(notifications, ignore_conflicts=True)
+        adjust_unread_counts({user_id: 1 for user_id in user_ids})
+
+
+@job('notifications.nouveaux_stagiaires')
+def notifier_nouveaux_stagiaires(groupes, cohorte=None):
+    """
+    Notifier en une seule passe les entreprises d'une cohorte de stagiaires
+    créés en masse : une notification par entreprise et par domaine, avec le
+    nombre de stagiaires dans occurrences.
+    groupes : [{'domaine', 'domaine_id', 'count', 'stagiaire'}]
+    cohorte : identifiant de la cohorte, enregistré dans les paramètres ; les
+    notifications et les compteurs sont écrits dans une seule transaction, qui
+    n'est pas refaite si la tâche est rejouée
+    """
+    offres_actives = OffreStage.objects.filter(est_active=True)
+    users_by_domaine = {}
+    for domaine_id, user_id in offres_actives.order_by().values_list('domaine_ref_id', 'entreprise__user_id').distinct():
+        users_by_domaine.setdefault(domaine_id, set()).add(user_id)
+    all_user_ids = set().union(*users_by_domaine.values())
+    
+    notifications = []
+    deltas = {}
+    for groupe in groupes:
+        domaine = groupe['domaine']
+        domaine_id = groupe.get('domaine_id')
+        if domaine and domaine_id is None:
+            # Tâche mise en file avant les valeurs de référence
+            reference = find_reference(Domaine, domaine)
+            domaine_id = reference.id if reference else 0
+        # Stagiaires sans domaine : toutes les entreprises qui ont des offres actives
+        user_ids = users_by_domaine.get(domaine_id, set()) if domaine else all_user_ids
+        params = {'domaine': domaine}
+        if cohorte:
+            params['cohorte'] = cohorte
+        if groupe['count'] == 1:
+            params['stagiaire'] = groupe['stagiaire']
+        for user_id in user_ids:
+            notifications.append(Notification(
+                user_id=user_id,
+                type='NOUVEAU_STAGIAIRE',
+                params=params,
+                occurrences=groupe['count'],
+                # Cohorte : pas d'objet lié unique
+                related_object_type=None,
+                related_object_id=None
+            ))
+            deltas[user_id] = deltas.get(user_id, 0) + 1
+    
+    with transaction.atomic():
+        if cohorte and Notification.objects.filter(
+            type='NOUVEAU_STAGIAIRE', related_object_id__isnull=True, params__cohorte=cohorte
+        ).exists():
+            return
+        Notification.objects.bulk_create(notifications, batch_size=1000)
+        adjust_unread_counts(deltas)
+
+
+@job('notifications.reconcile_unread_counts')
+def reconcilier_compteurs():
+    """Corriger périodiquement les écarts des compteurs de non lues"""
+    reconcile_unread_counts()
+
+
+@job('notifications.purge_notifications')
+def purger_notifications():
+    """Appliquer périodiquement la politique de rétention"""
+    purge_notifications(archive_dir=getattr(settings, 'NOTIFICATIONS_ARCHIVE_DIR', None))
+
+
+@job('notifications.send_email_digests')
+def envoyer_digests_email():
+    """Envoyer périodiquement les notifications en attente par email"""
+    if get_email_setting('ENABLED'):
+        send_digests()
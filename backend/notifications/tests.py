@@ -0,0 +1,421 @@
+"""
+Tests des notifications
+"""
+from datetime import date, timedelta
+from unittest import mock
+
+from django.core import mail
+from django.test import RequestFactory, TestCase
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework.test import APIClient
+
+from accounts.models import Entreprise, Stagiaire, User
+from stages.models import OffreStage
+from .coalescing import coalesce_notification
+from .counters import count_unread, get_unread_count, reconcile_unread_counts
+from .emails import send_digests
+from .hub import NotificationHub, event_cursor, parse_cursor, sign_stream_ticket
+from .models import Notification
+from .retention import purge_notifications
+from .tasks import notifier_nouveau_stagiaire, notifier_nouveaux_stagiaires
+from .views import NotificationStreamView
+
+
+def creer_entreprise(email, **extra):
+    user = User.objects.create_user(email=email, role='ENTREPRISE')
+    return Entreprise.objects.create(
+        user=user, nom_entreprise=email.split('@')[0], secteur_activite='Informatique',
+        telephone='0600000000', adresse='1 rue', ville='Lyon', contact_nom='Nom', contact_prenom='Prénom',
+        **extra
+    )
+
+
+def creer_offre(entreprise, domaine='Informatique', **extra):
+    extra.setdefault('est_active', True)
+    return OffreStage.objects.create(
+        entreprise=entreprise, titre='Stage data python', type_stage='PFE', domaine=domaine,
+        description='Description', competences_requises='Python', duree='6 mois',
+        date_debut=date(2027, 1, 1), ville='Lyon', **extra
+    )
+
+
+def creer_stagiaire(email, domaine='Informatique'):
+    user = User.objects.create_user(email=email, role='STAGIAIRE')
+    return Stagiaire.objects.create(user=user, nom='Nom', prenom='Prénom', telephone='0600000000', domaine=domaine)
+
+
+class NouveauStagiaireTests(TestCase):
+    def test_une_notification_par_entreprise(self):
+        # Plusieurs offres actives du même domaine : l'entreprise n'est notifiée qu'une fois
+        entreprises = [creer_entreprise(f'e{i}@exemple.fr') for i in range(3)]
+        for entreprise in entreprises:
+            creer_offre(entreprise)
+            creer_offre(entreprise)
+        creer_offre(creer_entreprise('autre@exemple.fr'), domaine='Gestion')
+        stagiaire = creer_stagiaire('s@exemple.fr')
+
+        notifier_nouveau_stagiaire(stagiaire.id)
+
+        notifications = Notification.objects.filter(type='NOUVEAU_STAGIAIRE', related_object_id=stagiaire.id)
+        self.assertEqual(
+            sorted(notifications.values_list('user_id', flat=True)),
+            sorted(entreprise.user_id for entreprise in entreprises)
+        )
+
+    def test_nombre_de_requetes_constant(self):
+        # Ciblage, dédoublonnage, insertion et compteurs : indépendant du nombre d'entreprises
+        # (avec SAVEPOINT et RELEASE de la transaction)
+        for i in range(20):
+            creer_offre(creer_entreprise(f'e{i}@exemple.fr'))
+        stagiaire = creer_stagiaire('s@exemple.fr')
+
+        with self.assertNumQueries(7):
+            notifier_nouveau_stagiaire(stagiaire.id)
+        self.assertEqual(Notification.objects.filter(type='NOUVEAU_STAGIAIRE').count(), 20)
+
+    def test_compteur_incremente_une_seule_fois(self):
+        entreprise = creer_entreprise('e@exemple.fr')
+        creer_offre(entreprise)
+        stagiaire = creer_stagiaire('s@exemple.fr')
+        self.assertEqual(get_unread_count(entreprise.user_id), 0)
+
+        # Tâche rejouée : la notification existe déjà, le compteur n'est pas incrémenté
+        notifier_nouveau_stagiaire(stagiaire.id)
+        notifier_nouveau_stagiaire(stagiaire.id)
+
+        self.assertEqual(get_unread_count(entreprise.user_id), 1)
+
+    def test_notification_de_cohorte_conservee_par_la_purge(self):
+        entreprise = creer_entreprise('e@exemple.fr')
+        creer_offre(entreprise)
+        stagiaire = creer_stagiaire('s@exemple.fr')
+        notifier_nouveau_stagiaire(stagiaire.id)
+        notifier_nouveaux_stagiaires([
+            {'domaine': 'Informatique', 'domaine_id': None, 'count': 12, 'stagiaire': None}
+        ])
+        stagiaire.delete()
+
+        stats = purge_notifications()
+
+        self.assertEqual(stats['orphans'], 1)
+        cohorte = Notification.objects.get(user=entreprise.user, type='NOUVEAU_STAGIAIRE')
+        self.assertEqual((cohorte.occurrences, cohorte.is_read), (12, False))
+
+    def test_cohorte_notifiee_une_seule_fois(self):
+        entreprise = creer_entreprise('e@exemple.fr')
+        creer_offre(entreprise)
+        creer_offre(entreprise, domaine='Gestion')
+        self.assertEqual(get_unread_count(entreprise.user_id), 0)
+        groupes = [
+            {'domaine': 'Informatique', 'domaine_id': None, 'count': 12, 'stagiaire': None},
+            {'domaine': 'Gestion', 'domaine_id': None, 'count': 1, 'stagiaire': 'Prénom Nom'},
+        ]
+
+        # Tâche rejouée (worker arrêté après l'écriture) : rien n'est refait
+        notifier_nouveaux_stagiaires(groupes, cohorte='c1')
+        notifier_nouveaux_stagiaires(groupes, cohorte='c1')
+
+        self.assertEqual(Notification.objects.filter(user=entreprise.user).count(), 2)
+        self.assertEqual(get_unread_count(entreprise.user_id), 2)
+        notifier_nouveaux_stagiaires(groupes, cohorte='c2')
+        self.assertEqual(get_unread_count(entreprise.user_id), 4)
+
+
+class CompteurNonLuesTests(TestCase):
+    def setUp(self):
+        self.entreprise = creer_entreprise('e@exemple.fr')
+        self.offre = creer_offre(self.entreprise)
+        self.client = APIClient()
+        self.client.force_authenticate(self.entreprise.user)
+        # Compteur calculé avant les notifications : tenu à jour ensuite de façon incrémentale
+        self.assertEqual(self.compteur(), 0)
+
+    def compteur(self):
+        response = self.client.get(reverse('notification-unread-count'))
+        self.assertEqual(response.status_code, 200)
+        return response.json()['unread_count']
+
+    def notification(self, **extra):
+        return Notification.objects.create(user=self.entreprise.user, type='OFFRE_VALIDEE', params={'offre': 'x'}, **extra)
+
+    def test_marquage_repete(self):
+        notification = self.notification()
+        self.notification()
+        self.assertEqual(self.compteur(), 2)
+
+        for _ in range(2):
+            response = self.client.post(reverse('notification-mark-as-read', args=[notification.id]))
+            self.assertEqual(response.status_code, 200)
+            self.assertEqual(self.compteur(), 1)
+
+    def test_suppression(self):
+        non_lue = self.notification()
+        lue = self.notification(is_read=True)
+        self.assertEqual(self.compteur(), 1)
+
+        lue.delete()
+        self.assertEqual(self.compteur(), 1)
+        non_lue.delete()
+        self.assertEqual(self.compteur(), 0)
+
+    def test_regroupement_sans_effet_sur_le_compteur(self):
+        for _ in range(3):
+            coalesce_notification(
+                user_id=self.entreprise.user_id,
+                type_notification='NOUVELLE_CANDIDATURE',
+                related_object_type='offre',
+                related_object_id=self.offre.id,
+                params={'offre': self.offre.titre}
+            )
+
+        self.assertEqual(Notification.objects.get().occurrences, 3)
+        self.assertEqual(self.compteur(), 1)
+        self.assertEqual(reconcile_unread_counts(), 0)
+        self.assertEqual(count_unread(self.entreprise.user_id), 1)
+
+
+class RegroupementCandidaturesTests(TestCase):
+    def setUp(self):
+        self.entreprise = creer_entreprise('e@exemple.fr')
+        self.offre = creer_offre(self.entreprise)
+
+    def notifier(self):
+        return coalesce_notification(
+            user_id=self.entreprise.user_id,
+            type_notification='NOUVELLE_CANDIDATURE',
+            related_object_type='offre',
+            related_object_id=self.offre.id,
+            params={'offre': self.offre.titre}
+        )
+
+    def test_evenements_fusionnes_dans_la_fenetre(self):
+        self.assertFalse(self.notifier())
+        self.assertTrue(self.notifier())
+        notification = Notification.objects.get()
+        self.assertEqual(notification.occurrences, 2)
+        self.assertGreater(notification.updated_at, notification.created_at)
+
+    def test_fenetre_comptee_depuis_la_premiere_occurrence(self):
+        # Un flux continu ne prolonge pas la fenêtre : une nouvelle notification est ouverte après une heure
+        debut = timezone.now()
+        with mock.patch('django.utils.timezone.now', return_value=debut):
+            self.notifier()
+        for minutes in (30, 50):
+            with mock.patch('django.utils.timezone.now', return_value=debut + timedelta(minutes=minutes)):
+                self.assertTrue(self.notifier())
+        with mock.patch('django.utils.timezone.now', return_value=debut + timedelta(minutes=70)):
+            self.assertFalse(self.notifier())
+        self.assertEqual(
+            list(Notification.objects.order_by('id').values_list('occurrences', flat=True)), [3, 1]
+        )
+
+
+class FluxNotificationsTests(TestCase):
+    def setUp(self):
+        self.entreprise = creer_entreprise('e@exemple.fr')
+        self.offre = creer_offre(self.entreprise)
+        self.user = self.entreprise.user
+
+    def notifier(self):
+        coalesce_notification(
+            user_id=self.user.id,
+            type_notification='NOUVELLE_CANDIDATURE',
+            related_object_type='offre',
+            related_object_id=self.offre.id,
+            params={'offre': self.offre.titre}
+        )
+        return Notification.objects.get(type='NOUVELLE_CANDIDATURE')
+
+    def test_ticket_ouvre_le_flux(self):
+        request = RequestFactory().get(reverse('notification-stream'), {'ticket': sign_stream_ticket(self.user)})
+        self.assertEqual(NotificationStreamView()._authenticate(request), self.user)
+
+    async def test_jeton_refuse_dans_l_url(self):
+        with self.settings(NOTIFICATIONS_STREAM={'TICKET_TTL': -1}):
+            expire = sign_stream_ticket(self.user)
+        for params in ({'ticket': expire}, {'ticket': 'invalide'}, {'token': 'jeton'}):
+            response = await self.async_client.get(reverse('notification-stream'), params)
+            self.assertEqual(response.status_code, 401)
+
+    def test_flux_refuse_sous_wsgi(self):
+        # runserver garderait la réponse en mémoire jusqu'à la fin du flux : le client lit le compteur
+        client = APIClient()
+        client.force_authenticate(self.user)
+        self.assertEqual(client.post(reverse('notification-stream-ticket')).status_code, 503)
+        response = self.client.get(reverse('notification-stream'), {'ticket': sign_stream_ticket(self.user)})
+        self.assertEqual(response.status_code, 503)
+
+    def abonner(self, stream_hub, *user_ids):
+        for user_id in user_ids:
+            stream_hub._subscribers[user_id] = set()
+        stream_hub._last_polled = timezone.now()
+
+    def diffuser(self, stream_hub):
+        fetched = stream_hub._fetch_new_notifications()
+        for notification in fetched:
+            stream_hub.publish_notification(notification)
+        return fetched
+
+    def test_notification_regroupee_rediffusee(self):
+        stream_hub = NotificationHub()
+        self.abonner(stream_hub, self.user.id)
+        notification = self.notifier()
+        self.assertEqual([(n.id, n.occurrences) for n in self.diffuser(stream_hub)], [(notification.id, 1)])
+        self.assertEqual(self.diffuser(stream_hub), [])
+
+        self.notifier()
+        self.assertEqual([(n.id, n.occurrences) for n in self.diffuser(stream_hub)], [(notification.id, 2)])
+
+        # Reprise après reconnexion : la notification regroupée depuis le dernier événement reçu
+        events = NotificationStreamView()._catch_up(self.user, parse_cursor(event_cursor(notification)))
+        self.assertEqual(len(events), 2)
+        self.assertIn('"occurrences": 2', events[0])
+
+    def test_notification_validee_apres_une_plus_recente(self):
+        stream_hub = NotificationHub()
+        autre = creer_entreprise('autre@exemple.fr').user
+        self.abonner(stream_hub, self.user.id)
+        # Datée avant la lecture, mais validée après : relue grâce au chevauchement
+        en_retard = Notification.objects.create(
+            user=self.user, type='OFFRE_VALIDEE', params={'offre': 'Stage'},
+            updated_at=timezone.now() - timedelta(seconds=3)
+        )
+        Notification.objects.create(user=autre, type='OFFRE_VALIDEE', params={'offre': 'Stage'})
+
+        self.assertEqual([n.id for n in self.diffuser(stream_hub)], [en_retard.id])
+
+        recente = self.notifier()
+        self.assertEqual([n.id for n in self.diffuser(stream_hub)], [recente.id])
+        stream_hub._last_polled -= timedelta(seconds=5)
+        self.assertEqual(self.diffuser(stream_hub), [])
+
+
+class RecuperationIncrementaleTests(TestCase):
+    def setUp(self):
+        self.entreprise = creer_entreprise('e@exemple.fr')
+        self.offre = creer_offre(self.entreprise)
+        self.client = APIClient()
+        self.client.force_authenticate(self.entreprise.user)
+
+    def notifier(self, now):
+        with mock.patch('django.utils.timezone.now', return_value=now):
+            coalesce_notification(
+                user_id=self.entreprise.user_id,
+                type_notification='NOUVELLE_CANDIDATURE',
+                related_object_type='offre',
+                related_object_id=self.offre.id,
+                params={'offre': self.offre.titre}
+            )
+
+    def lister(self, **params):
+        response = self.client.get(reverse('notification-list'), {'is_read': 'false', **params})
+        self.assertEqual(response.status_code, 200)
+        return response.json()['results']
+
+    def test_notification_regroupee_renvoyee(self):
+        debut = timezone.now()
+        self.notifier(debut)
+        [recue] = self.lister()
+        self.assertEqual(self.lister(since=recue['updated_at']), [recue])
+
+        # Regroupée sur place (même id) après la première lecture : renvoyée avec ses occurrences
+        for minutes in (5, 10, 15, 20):
+            self.notifier(debut + timedelta(minutes=minutes))
+        [regroupee] = self.lister(since=recue['updated_at'])
+        self.assertEqual((regroupee['id'], regroupee['occurrences']), (recue['id'], 5))
+        self.assertEqual(self.lister(since=regroupee['updated_at']), [regroupee])
+        self.assertEqual(self.lister(since=(debut + timedelta(hours=1)).isoformat()), [])
+
+        response = self.client.get(reverse('notification-list'), {'since': 'hier'})
+        self.assertEqual(response.status_code, 400)
+
+    def test_marquage_jusqu_a_un_id_repete(self):
+        for i in range(3):
+            Notification.objects.create(user=self.entreprise.user, type='OFFRE_VALIDEE', params={'offre': f'{i}'})
+        dernier = Notification.objects.create(user=self.entreprise.user, type='OFFRE_REFUSEE', params={'offre': 'x'})
+        up_to_id = Notification.objects.order_by('id')[2].id
+
+        for attendu in (3, 0):
+            response = self.client.post(reverse('notification-bulk-mark-as-read'), {'up_to_id': up_to_id}, format='json')
+            self.assertEqual(response.json(), {'updated': attendu})
+            self.assertEqual(get_unread_count(self.entreprise.user_id), 1)
+        self.assertEqual([n['id'] for n in self.lister()], [dernier.id])
+
+
+class ModerationOffreTests(TestCase):
+    def setUp(self):
+        self.entreprise = creer_entreprise('e@exemple.fr')
+        self.offre = creer_offre(self.entreprise)
+        self.client = APIClient()
+
+    def modifier(self, user, data):
+        self.client.force_authenticate(user)
+        with self.settings(JOBS={'EAGER': True}), self.captureOnCommitCallbacks(execute=True):
+            response = self.client.patch(reverse('offre-detail', args=[self.offre.id]), data, format='json')
+        self.assertEqual(response.status_code, 200)
+
+    def test_desactivation_par_l_entreprise_sans_notification(self):
+        self.modifier(self.entreprise.user, {'est_active': False})
+        self.assertFalse(Notification.objects.filter(type__in=['OFFRE_VALIDEE', 'OFFRE_REFUSEE']).exists())
+
+    def test_moderation_par_l_admin_notifiee(self):
+        admin = User.objects.create_user(email='admin@exemple.fr', role='ADMIN')
+        self.modifier(admin, {'est_active': False})
+        self.modifier(admin, {'est_active': True})
+        self.assertEqual(
+            list(Notification.objects.filter(user=self.entreprise.user).order_by('id').values_list('type', flat=True)),
+            ['OFFRE_REFUSEE', 'OFFRE_VALIDEE']
+        )
+
+
+class DigestEmailTests(TestCase):
+    def setUp(self):
+        self.entreprise = creer_entreprise('e@exemple.fr')
+        self.offre = creer_offre(self.entreprise)
+
+    def notifier(self, now):
+        with mock.patch('django.utils.timezone.now', return_value=now):
+            coalesce_notification(
+                user_id=self.entreprise.user_id,
+                type_notification='NOUVELLE_CANDIDATURE',
+                related_object_type='offre',
+                related_object_id=self.offre.id,
+                params={'offre': self.offre.titre}
+            )
+
+    def test_delai_de_grace_et_regroupement_apres_envoi(self):
+        debut = timezone.now()
+        self.notifier(debut)
+        # Dans le délai de grâce : rien n'est envoyé
+        send_digests(now=debut + timedelta(minutes=5))
+        self.assertEqual(len(mail.outbox), 0)
+        send_digests(now=debut + timedelta(minutes=20))
+        self.assertEqual(len(mail.outbox), 1)
+
+        # Nouvelle candidature regroupée après l'envoi : envoyée au digest suivant, passé le délai
+        self.notifier(debut + timedelta(minutes=30))
+        send_digests(now=debut + timedelta(minutes=35))
+        self.assertEqual(len(mail.outbox), 1)
+        send_digests(now=debut + timedelta(minutes=50))
+        self.assertEqual(len(mail.outbox), 2)
+        self.assertIn("2 nouvelles candidatures", mail.outbox[1].body)
+
+    def test_regroupement_pendant_l_envoi_conserve(self):
+        debut = timezone.now()
+        self.notifier(debut)
+        envoi = debut + timedelta(minutes=20)
+
+        def regroupement_concurrent(messages):
+            # Candidature regroupée par un autre processus pendant l'envoi SMTP
+            self.notifier(envoi)
+            return len(messages)
+
+        with mock.patch('django.core.mail.backends.locmem.EmailBackend.send_messages',
+                        side_effect=regroupement_concurrent):
+            send_digests(now=envoi)
+        self.assertIsNone(Notification.objects.get().emailed_at)
+
+        send_digests(now=envoi + timedelta(minutes=20))
+        self.assertEqual(len(mail.outbox), 1)
+        self.assertIn("2 nouvelles candidatures", mail.outbox[0].body)
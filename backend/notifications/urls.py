@@ -7,13 +7,19 @@ from .views import (
     NotificationUnreadCountView,
     NotificationMarkAsReadView,
     NotificationMarkAllAsReadView,
+    NotificationBulkMarkAsReadView,
     NotificationDetailView,
+    NotificationStreamView,
+    NotificationStreamTicketView,
 )
 
 urlpatterns = [
     path('', NotificationListView.as_view(), name='notification-list'),
+    path('stream/', NotificationStreamView.as_view(), name='notification-stream'),
+    path('stream/ticket/', NotificationStreamTicketView.as_view(), name='notification-stream-ticket'),
     path('unread-count/', NotificationUnreadCountView.as_view(), name='notification-unread-count'),
     path('<int:pk>/mark-as-read/', NotificationMarkAsReadView.as_view(), name='notification-mark-as-read'),
+    path('mark-as-read/', NotificationBulkMarkAsReadView.as_view(), name='notification-bulk-mark-as-read'),
     path('mark-all-as-read/', NotificationMarkAllAsReadView.as_view(), name='notification-mark-all-as-read'),
     path('<int:pk>/', NotificationDetailView.as_view(), name='notification-detail'),
 ]
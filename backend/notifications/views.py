@@ -1,12 +1,30 @@
 """
 Vues pour la gestion des notifications
 """
+import asyncio
+import json
+import time
+from datetime import timedelta
+
+from asgiref.sync import sync_to_async
 from rest_framework import generics, permissions, status
 from rest_framework.response import Response
 from rest_framework.views import APIView
+from rest_framework.exceptions import ValidationError
+from rest_framework_simplejwt.exceptions import AuthenticationFailed, InvalidToken
+from django.contrib.auth import get_user_model
+from django.core import signing
 from django.db.models import Q
+from django.http import JsonResponse, StreamingHttpResponse
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+from django.views import View
+from accounts.authentication import CachedJWTAuthentication
+from accounts.cv_delivery import is_asgi
+from .counters import adjust_unread_count, get_unread_count
+from .hub import hub, event_cursor, get_stream_setting, parse_cursor, read_stream_ticket, sign_stream_ticket
 from .models import Notification
-from .serializers import NotificationSerializer
+from .serializers import NotificationSerializer, NotificationBulkReadSerializer
 
 
 class NotificationListView(generics.ListAPIView):
@@ -23,7 +41,21 @@ class NotificationListView(generics.ListAPIView):
         if is_read is not None:
             queryset = queryset.filter(is_read=is_read.lower() == 'true')
         
-        return queryset.order_by('-created_at')
+        # Récupération incrémentale : notifications créées ou regroupées depuis ?since= (updated_at le plus
+        # récent déjà reçu). Même chevauchement que le flux SSE : celles déjà reçues sont remplacées par le client
+        since = self.request.query_params.get('since', None)
+        if since is not None:
+            try:
+                since = parse_datetime(since)
+            except ValueError:
+                since = None
+            if since is None:
+                raise ValidationError({'since': 'Doit être une date ISO 8601'})
+            if timezone.is_naive(since):
+                since = timezone.make_aware(since)
+            queryset = queryset.filter(updated_at__gte=since - timedelta(seconds=get_stream_setting('POLL_OVERLAP')))
+        
+        return queryset.order_by('-updated_at')
 
 
 class NotificationUnreadCountView(APIView):
@@ -31,7 +63,7 @@ class NotificationUnreadCountView(APIView):
     permission_classes = [permissions.IsAuthenticated]
     
     def get(self, request):
-        count = Notification.objects.filter(user=request.user, is_read=False).count()
+        count = get_unread_count(request.user.id)
         return Response({'unread_count': count}, status=status.HTTP_200_OK)
 
 
@@ -42,8 +74,12 @@ class NotificationMarkAsReadView(APIView):
     def post(self, request, pk):
         try:
             notification = Notification.objects.get(pk=pk, user=request.user)
-            notification.is_read = True
-            notification.save()
+            if not notification.is_read:
+                # UPDATE conditionnel : le compteur n'est décrémenté qu'une fois
+                updated = Notification.objects.filter(pk=pk, is_read=False).update(is_read=True)
+                adjust_unread_count(request.user.id, -updated)
+                notification.is_read = True
+                hub.publish_unread_count(request.user.id)
             serializer = NotificationSerializer(notification)
             return Response(serializer.data, status=status.HTTP_200_OK)
         except Notification.DoesNotExist:
@@ -53,12 +89,34 @@ class NotificationMarkAsReadView(APIView):
             )
 
 
+class NotificationBulkMarkAsReadView(APIView):
+    """Vue pour marquer plusieurs notifications comme lues (liste d'ids ou jusqu'à un id)"""
+    permission_classes = [permissions.IsAuthenticated]
+    
+    def post(self, request):
+        serializer = NotificationBulkReadSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        
+        queryset = Notification.objects.filter(user=request.user, is_read=False)
+        if 'ids' in serializer.validated_data:
+            queryset = queryset.filter(id__in=serializer.validated_data['ids'])
+        else:
+            queryset = queryset.filter(id__lte=serializer.validated_data['up_to_id'])
+        
+        updated = queryset.update(is_read=True)
+        adjust_unread_count(request.user.id, -updated)
+        hub.publish_unread_count(request.user.id)
+        return Response({'updated': updated}, status=status.HTTP_200_OK)
+
+
 class NotificationMarkAllAsReadView(APIView):
     """Vue pour marquer toutes les notifications comme lues"""
     permission_classes = [permissions.IsAuthenticated]
     
     def post(self, request):
-        Notification.objects.filter(user=request.user, is_read=False).update(is_read=True)
+        updated = Notification.objects.filter(user=request.user, is_read=False).update(is_read=True)
+        adjust_unread_count(request.user.id, -updated)
+        hub.publish_unread_count(request.user.id)
         return Response(
             {'message': 'Toutes les notifications ont été marquées comme lues'},
             status=status.HTTP_200_OK
@@ -73,3 +131,113 @@ class NotificationDetailView(generics.RetrieveAPIView):
     def get_queryset(self):
         return Notification.objects.filter(user=self.request.user)
 
+
+
+def format_sse(event, data, event_id=None):
+    """Formater un événement Server-Sent Events"""
+    lines = []
+    if event_id is not None:
+        lines.append(f"id: {event_id}")
+    lines.append(f"event: {event}")
+    lines.append(f"data: {json.dumps(data, default=str)}")
+    return "\n".join(lines) + "\n\n"
+
+
+STREAM_UNAVAILABLE = "Flux indisponible : le serveur ne fonctionne pas sous ASGI"
+
+
+class NotificationStreamTicketView(APIView):
+    """Vue pour obtenir un ticket d'ouverture du flux SSE, à la place du jeton d'accès dans l'URL"""
+    permission_classes = [permissions.IsAuthenticated]
+    
+    def post(self, request):
+        if not is_asgi(request):
+            # Le client se rabat sur la lecture périodique du compteur
+            return Response({'error': STREAM_UNAVAILABLE}, status=status.HTTP_503_SERVICE_UNAVAILABLE)
+        return Response(
+            {'ticket': sign_stream_ticket(request.user), 'expires_in': get_stream_setting('TICKET_TTL')},
+            status=status.HTTP_200_OK
+        )
+
+
+class NotificationStreamView(View):
+    """
+    Flux SSE des notifications créées ou regroupées et du compteur de non
+    lues. EventSource ne permettant pas d'envoyer d'en-tête, le client passe
+    un ticket de courte durée dans ?ticket= (voir NotificationStreamTicketView) ;
+    les autres clients peuvent utiliser l'en-tête Authorization.
+    Un client qui ouvre un nouveau flux reprend où il en était avec
+    l'en-tête Last-Event-ID ou le paramètre ?last_event_id=.
+    Sous WSGI (runserver), Django garderait toute la réponse en mémoire
+    jusqu'à la fin du flux (MAX_DURATION) : le flux y est refusé (503).
+    """
+    
+    def _authenticate(self, request):
+        ticket = request.GET.get('ticket')
+        if ticket is not None:
+            try:
+                user_id = read_stream_ticket(ticket)
+            except signing.BadSignature:
+                return None
+            return get_user_model().objects.filter(pk=user_id, is_active=True).first()
+        authentication = CachedJWTAuthentication()
+        header = authentication.get_header(request)
+        raw_token = authentication.get_raw_token(header) if header else None
+        if raw_token is None:
+            return None
+        validated_token = authentication.get_validated_token(raw_token)
+        return authentication.get_user(validated_token)
+    
+    def _catch_up(self, user, since):
+        events = []
+        if since is not None:
+            # Les 50 notifications créées ou regroupées le plus récemment depuis le dernier événement reçu,
+            # avec le même chevauchement que le hub pour celles validées après leur date (déjà reçues : remplacées)
+            since -= timedelta(seconds=get_stream_setting('POLL_OVERLAP'))
+            notifications = Notification.objects.filter(user=user, updated_at__gte=since).order_by('-updated_at')[:50]
+            events = [
+                format_sse('notification', NotificationSerializer(notification).data, event_cursor(notification))
+                for notification in reversed(notifications)
+            ]
+        count = get_unread_count(user.id)
+        events.append(format_sse('unread_count', {'unread_count': count}))
+        return events
+    
+    async def get(self, request):
+        if not is_asgi(request):
+            return JsonResponse({'error': STREAM_UNAVAILABLE}, status=503)
+        try:
+            user = await sync_to_async(self._authenticate)(request)
+        except (InvalidToken, AuthenticationFailed):
+            user = None
+        if user is None:
+            return JsonResponse({'error': 'Authentification requise'}, status=401)
+        
+        since = parse_cursor(request.headers.get('Last-Event-ID') or request.GET.get('last_event_id'))
+        
+        response = StreamingHttpResponse(
+            self._stream(user, since),
+            content_type='text/event-stream'
+        )
+        response['Cache-Control'] = 'no-cache'
+        response['X-Accel-Buffering'] = 'no'
+        return response
+    
+    async def _stream(self, user, since):
+        subscription = hub.subscribe(user.id)
+        heartbeat = get_stream_setting('HEARTBEAT')
+        # Durée de vie bornée : le navigateur se reconnecte avec Last-Event-ID
+        deadline = time.monotonic() + get_stream_setting('MAX_DURATION')
+        try:
+            yield "retry: 3000\n\n"
+            for event in await sync_to_async(self._catch_up)(user, since):
+                yield event
+            while time.monotonic() < deadline:
+                try:
+                    event = await asyncio.wait_for(subscription.queue.get(), timeout=heartbeat)
+                except asyncio.TimeoutError:
+                    yield ": ping\n\n"
+                    continue
+                yield format_sse(event['event'], event['data'], event['id'])
+        finally:
+            hub.unsubscribe(subscription)
@@ -0,0 +1,18 @@
+"""
+ASGI config for stage_project project.
+
+It exposes the ASGI callable as a module-level variable named ``application``.
+Required for the notification stream (/api/notifications/stream/), e.g.:
+uvicorn stage_project.asgi:application
+
+For more information on this file, see
+https://docs.djangoproject.com/en/4.2/howto/deployment/asgi/
+"""
+
+import os
+
+from django.core.asgi import get_asgi_application
+
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'stage_project.settings')
+
+application = get_asgi_application()
@@ -33,6 +33,8 @@ INSTALLED_APPS = [
     'accounts',
     'stages',
     'notifications',
+    'jobs',
+    'webhooks',
 ]
 
 MIDDLEWARE = [
@@ -65,6 +67,7 @@ TEMPLATES = [
 ]
 
 WSGI_APPLICATION = 'stage_project.wsgi.application'
+ASGI_APPLICATION = 'stage_project.asgi.application'
 
 
 # Base de données
@@ -92,6 +95,84 @@ AUTH_PASSWORD_VALIDATORS = [
     },
 ]
 
+# Hachage des mots de passe : scrypt en priorité, les anciens hachages PBKDF2
+# restent valides et sont convertis à la connexion suivante
+PASSWORD_HASHERS = [
+    'accounts.hashers.TunedScryptPasswordHasher',
+    'django.contrib.auth.hashers.PBKDF2PasswordHasher',
+    'django.contrib.auth.hashers.PBKDF2SHA1PasswordHasher',
+]
+
+# Coût de scrypt (mémoire utilisée : 128 * WORK_FACTOR * BLOCK_SIZE octets, ici 16 Mo)
+PASSWORD_SCRYPT = {
+    'WORK_FACTOR': 2 ** 14,
+    'BLOCK_SIZE': 8,
+    'PARALLELISM': 1,
+}
+
+# Pool borné pour le calcul des hachages (connexion, inscription)
+PASSWORD_HASHING = {
+    'WORKERS': os.cpu_count() or 1,  # hachages simultanés par processus
+    'MAX_PENDING': 32,  # hachages en attente au-delà desquels on répond 503
+    'QUEUE_TIMEOUT': 2,  # secondes d'attente maximum d'une place
+}
+
+# Création de comptes en masse (commande provision_accounts, /api/auth/admin/provision/)
+ACCOUNT_PROVISIONING = {
+    'CHUNK_SIZE': 1000,  # lignes insérées par transaction
+    'MAX_REPORTED_ERRORS': 100,
+    # CSV en attente du worker (mots de passe en clair) : hors de MEDIA_ROOT, fichiers 0600.
+    # Partagé entre le serveur web et les workers
+    'UPLOAD_DIRECTORY': BASE_DIR / 'private' / 'provisioning',
+    'UPLOAD_RETENTION': 86400,  # secondes avant suppression d'un CSV dont la tâche est terminée ou perdue
+}
+
+# Dépôt des CV (/api/auth/cv/)
+CV_UPLOAD = {
+    'MAX_SIZE': 10 * 1024 * 1024,  # octets
+    'CHUNK_SIZE': 64 * 1024,  # écriture sur disque et hachage par morceaux
+    'DIRECTORY': 'cvs',  # sous MEDIA_ROOT, un fichier par contenu : cvs/ab/<sha256>.pdf
+    'SWEEP_GRACE': 3600,  # âge minimal (secondes) d'un fichier non référencé avant suppression
+}
+
+# Accès aux CV par liens signés (/api/auth/cv/file/<jeton>/)
+# En production, confier l'envoi du fichier au serveur frontal, par exemple pour nginx :
+#   'MODE': 'x-accel' et location /protected-media/ { internal; alias <MEDIA_ROOT>/; }
+CV_DELIVERY = {
+    'MODE': 'python',  # 'python', 'x-accel' ou 'x-sendfile'
+    'URL_TTL': 300,  # secondes de validité d'un lien
+    'ACCEL_PREFIX': '/protected-media/',
+}
+
+# Recherche de profils (/api/auth/talents/?q=) : index des CV et profils stagiaires
+# Le texte des CV est extrait avec pypdf s'il est installé (pip install pypdf) ; sans lui, seuls les champs du profil sont indexés
+TALENT_SEARCH = {
+    'BATCH_SIZE': 500,  # stagiaires indexés par transaction
+    'PROCESSES': None,  # processus d'extraction des CV (None : un par cœur)
+    'MAX_CV_WEIGHT': 5,  # plafond des occurrences d'un terme dans un CV
+    'PROFILE_WEIGHT': 5,  # poids d'un terme du domaine, du niveau d'études ou de la ville
+    'MAX_QUERY_TERMS': 10,
+}
+
+# Tri des candidatures d'une offre par adéquation (?order=match) : facteur de chaque partie de l'offre
+CANDIDATE_MATCHING = {
+    'COMPETENCE_FACTOR': 3,
+    'DOMAINE_FACTOR': 2,
+    'VILLE_FACTOR': 2,
+    'TYPE_STAGE_FACTOR': 1,
+}
+
+# Offres similaires (/api/stages/offres/<id>/similaires/?k=) : vecteurs TF-IDF des offres
+SIMILAR_OFFRES = {
+    'TOP_K': 5,
+    'MAX_K': 20,
+    'QUERY_TERMS': 25,  # termes les plus discriminants de l'offre comparés aux autres offres
+}
+
+AUTHENTICATION_BACKENDS = [
+    'accounts.backends.PooledModelBackend',
+]
+
 
 # Internationalisation
 LANGUAGE_CODE = 'fr-fr'
@@ -112,13 +193,35 @@ MEDIA_ROOT = BASE_DIR / 'media'
 # Configuration REST Framework
 REST_FRAMEWORK = {
     'DEFAULT_AUTHENTICATION_CLASSES': (
-        'rest_framework_simplejwt.authentication.JWTAuthentication',
+        'accounts.authentication.CachedJWTAuthentication',
     ),
     'DEFAULT_PERMISSION_CLASSES': [
         'rest_framework.permissions.IsAuthenticated',
     ],
+    'DEFAULT_THROTTLE_CLASSES': [
+        'accounts.throttling.TokenBucketThrottle',
+    ],
     'DEFAULT_PAGINATION_CLASS': 'rest_framework.pagination.PageNumberPagination',
-    'PAGE_SIZE': 10
+    'PAGE_SIZE': 10,
+    # Nombre de proxys inverses de confiance devant l'application. À 0, l'adresse des
+    # visiteurs limités est REMOTE_ADDR : un en-tête X-Forwarded-For forgé est ignoré
+    'NUM_PROXIES': 0,
+}
+
+# Limitation de débit par seau à jetons (voir accounts/throttling.py)
+# SCOPES : {scope: {rôle: 'nombre/période'}} ; 'ANON' pour les visiteurs, 'default' pour les autres rôles.
+# Une rafale plus grande que le débit peut être autorisée avec {'rate': '10/min', 'burst': 20}.
+THROTTLING = {
+    'BACKEND': 'local',  # 'cache' pour partager les seaux entre workers (cache Redis ou Memcached)
+    'CACHE_ALIAS': 'default',
+    'SCOPES': {
+        'login': {'ANON': {'rate': '10/min', 'burst': 5}},
+        'register': {'ANON': '5/hour'},
+        'candidature_create': {'STAGIAIRE': '30/hour'},
+        'offres_list': {'ANON': {'rate': '120/min', 'burst': 30}, 'default': '600/min'},
+        'talent_search': {'ENTREPRISE': '120/min'},
+        'cv_archive': {'ENTREPRISE': '30/hour'},
+    },
 }
 
 # Configuration JWT
@@ -135,6 +238,104 @@ SIMPLE_JWT = {
     'USER_ID_CLAIM': 'user_id',
     'AUTH_TOKEN_CLASSES': ('rest_framework_simplejwt.tokens.AccessToken',),
     'TOKEN_TYPE_CLAIM': 'token_type',
+    'TOKEN_REFRESH_SERIALIZER': 'accounts.serializers.RevocationAwareTokenRefreshSerializer',
+}
+
+# Révocation des jetons (déconnexion, désactivation d'un compte)
+TOKEN_REVOCATION = {
+    'SYNC_INTERVAL': 5,  # secondes avant qu'une révocation faite par un autre processus soit vue
+    'SYNC_OVERLAP': 10,  # secondes relues à chaque synchronisation (transactions validées en retard)
+    'REBUILD_INTERVAL': 3600,  # reconstruction du filtre de Bloom (oubli des jetons expirés)
+    'CAPACITY': 100000,  # jetons révoqués non expirés attendus
+    'ERROR_RATE': 0.001,  # faux positifs du filtre (confirmés par une requête)
+}
+
+# File de tâches en arrière-plan (python manage.py run_workers)
+JOBS = {
+    'MODE': 'thread',  # 'thread' ou 'process'
+    'CONCURRENCY': 4,
+    'POLL_INTERVAL': 1.0,  # secondes
+    'MAX_ATTEMPTS': 5,
+    'BACKOFF_BASE': 5,  # secondes, doublé à chaque tentative
+    'BACKOFF_MAX': 3600,
+    'LOCK_TIMEOUT': 600,  # secondes avant de considérer une tâche en cours comme perdue
+    'SUCCEEDED_RETENTION': timedelta(days=7),
+    'EAGER': False,  # True : exécuter les tâches immédiatement, sans worker
+    # Tâches périodiques : {nom de la tâche: intervalle en secondes}
+    'PERIODIC': {
+        'notifications.reconcile_unread_counts': 3600,
+        'notifications.purge_notifications': 86400,
+        'notifications.send_email_digests': 300,
+        'webhooks.deliver': 30,  # nouvelles tentatives des webhooks en échec
+        'accounts.purge_revoked_tokens': 86400,
+        'accounts.sweep_cv_files': 86400,
+        'accounts.index_candidates': 60,  # profils et CV modifiés depuis la dernière indexation
+        'stages.rebuild_offre_vectors': 86400,  # fréquences documentaires des offres similaires
+    },
+}
+
+# Flux SSE des notifications (servi sous ASGI)
+NOTIFICATIONS_STREAM = {
+    'HEARTBEAT': 20,  # secondes entre deux commentaires keep-alive
+    'MAX_DURATION': 300,  # secondes avant de fermer le flux (le client se reconnecte)
+    'POLL_INTERVAL': 2,  # secondes entre deux lectures des notifications créées par les workers
+    'QUEUE_SIZE': 100,  # événements en attente par connexion
+    'TICKET_TTL': 60,  # secondes de validité d'un ticket d'ouverture du flux
+    'POLL_OVERLAP': 10,  # secondes relues à chaque lecture (notifications validées après leur date)
+}
+
+# Regroupement des notifications : {type: fenêtre pendant laquelle les événements
+# sur le même objet sont fusionnés dans une seule notification non lue}
+NOTIFICATIONS_COALESCE_WINDOWS = {
+    'NOUVELLE_CANDIDATURE': timedelta(hours=1),
+}
+
+# Rétention des notifications lues, par type ('default' pour les autres types)
+NOTIFICATIONS_RETENTION = {
+    'default': timedelta(days=180),
+    'NOUVEAU_STAGIAIRE': timedelta(days=30),
+    'NOUVELLE_CANDIDATURE': timedelta(days=90),
+}
+# Dossier des archives JSONL compressées (None : suppression sans archive)
+NOTIFICATIONS_ARCHIVE_DIR = BASE_DIR / 'archives' / 'notifications'
+
+# Envoi des notifications par email (digest par utilisateur, envoyé par les workers)
+NOTIFICATIONS_EMAIL = {
+    'ENABLED': True,
+    'DELAY': timedelta(minutes=15),  # délai de grâce : une notification lue entre-temps n'est pas envoyée
+    'BATCH_SIZE': 100,  # utilisateurs par lot (une connexion SMTP par lot)
+    'MAX_PER_DIGEST': 20,  # notifications détaillées dans un digest
+}
+
+# Email : en développement, les messages sont écrits dans des fichiers
+# (en production : 'django.core.mail.backends.smtp.EmailBackend')
+EMAIL_BACKEND = 'django.core.mail.backends.filebased.EmailBackend'
+EMAIL_FILE_PATH = BASE_DIR / 'sent_emails'
+EMAIL_HOST = 'localhost'
+EMAIL_PORT = 25
+EMAIL_TIMEOUT = 10
+DEFAULT_FROM_EMAIL = 'Plateforme de stages <noreply@stages.local>'
+
+# Cache en mémoire des utilisateurs authentifiés (voir accounts/authentication.py)
+AUTH_USER_CACHE = {
+    'TTL': 60,  # secondes ; délai maximum de prise en compte d'une désactivation par les autres processus
+    'MAX_SIZE': 10000,  # utilisateurs par processus
+}
+
+# Webhooks sortants des entreprises
+WEBHOOKS = {
+    'BATCH_SIZE': 50,  # événements envoyés dans une même requête
+    'CONCURRENCY': 8,  # abonnements servis en parallèle par un worker
+    'MAX_PER_HOST': 2,  # requêtes simultanées vers un même hôte
+    'TIMEOUT': 5,  # secondes avant de considérer un destinataire comme trop lent
+    'MAX_ATTEMPTS': 8,
+    'BACKOFF_BASE': 10,  # secondes, doublé à chaque tentative
+    'BACKOFF_MAX': 3600,
+    'CIRCUIT_THRESHOLD': 5,  # échecs consécutifs avant de suspendre un abonnement
+    'CIRCUIT_COOLDOWN': 300,  # secondes de suspension
+    # Les URL résolues vers une adresse interne (boucle locale, réseaux privés,
+    # lien local, réservées) sont refusées ; exceptions : noms d'hôte ou réseaux CIDR
+    'ALLOWED_HOSTS': [],
 }
 
 # CORS Configuration
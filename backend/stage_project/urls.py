@@ -11,6 +11,8 @@ urlpatterns = [
     path('api/auth/', include('accounts.urls')),
     path('api/stages/', include('stages.urls')),
     path('api/notifications/', include('notifications.urls')),
+    path('api/jobs/', include('jobs.urls')),
+    path('api/webhooks/', include('webhooks.urls')),
 ]
 
 # Servir les fichiers médias en développement
@@ -2,7 +2,7 @@
 Configuration de l'interface d'administration pour les stages
 """
 from django.contrib import admin
-from .models import OffreStage, Candidature
+from .models import OffreStage, Candidature, Competence
 
 
 @admin.register(OffreStage)
@@ -27,6 +27,11 @@ class OffreStageAdmin(admin.ModelAdmin):
         ('Statut', {'fields': ('est_active',)}),
         ('Dates', {'fields': ('date_creation', 'date_modification')}),
     )
+    
+    def save_model(self, request, obj, form, change):
+        # Changement de statut depuis l'admin Django : modération notifiée à l'entreprise
+        obj.moderated = True
+        super().save_model(request, obj, form, change)
 
 
 @admin.register(Candidature)
@@ -43,3 +48,13 @@ class CandidatureAdmin(admin.ModelAdmin):
         ('Candidature', {'fields': ('lettre_motivation', 'statut')}),
         ('Dates', {'fields': ('date_candidature', 'date_modification')}),
     )
+
+
+@admin.register(Competence)
+class CompetenceAdmin(admin.ModelAdmin):
+    """Configuration de l'admin pour les compétences : déclarer une compétence alias d'une autre"""
+    list_display = ['nom', 'cle', 'alias_de']
+    list_filter = [('alias_de', admin.EmptyFieldListFilter)]
+    search_fields = ['nom', 'cle']
+    readonly_fields = ['cle']
+    raw_id_fields = ['alias_de']
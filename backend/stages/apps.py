@@ -5,3 +5,6 @@ class StagesConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'stages'
     verbose_name = 'Gestion des stages'
+    
+    def ready(self):
+        import stages.signals  # noqa
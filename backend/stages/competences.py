@@ -0,0 +1,85 @@
+"""
+Compétences des offres : découpage du texte competences_requises,
+rattachement aux compétences de référence (alias compris) et filtre
+?competences=
+"""
+import re
+
+from django.db import transaction
+from django.db.models import Count
+
+from .models import Competence, OffreCompetence, competence_key
+
+SEPARATORS_RE = re.compile(r'[,;\n/|•]+')
+MAX_LENGTH = 100
+
+
+def split_competences(text):
+    """Texte libre -> noms de compétences distincts (selon leur clé), dans l'ordre"""
+    names = {}
+    for name in SEPARATORS_RE.split(text or ''):
+        name = ' '.join(name.split())[:MAX_LENGTH]
+        key = competence_key(name)
+        if key and key not in names:
+            names[key] = name
+    return names
+
+
+def resolve_competences(keys):
+    """{clé: id de la compétence de référence} pour les clés connues (directement ou par alias)"""
+    return {
+        cle: alias_de_id or competence_id
+        for cle, competence_id, alias_de_id in Competence.objects.filter(cle__in=list(keys)).values_list(
+            'cle', 'id', 'alias_de_id'
+        )
+    }
+
+
+def sync_offre_competences(offre):
+    """Rattacher l'offre aux compétences de son texte, en créant celles qui sont nouvelles"""
+    names = split_competences(offre.competences_requises)
+    with transaction.atomic():
+        resolved = resolve_competences(names)
+        for key, name in names.items():
+            if key not in resolved:
+                competence, _ = Competence.objects.get_or_create(cle=key, defaults={'nom': name})
+                resolved[key] = competence.alias_de_id or competence.id
+        offre.competences.set(set(resolved.values()))
+
+
+def merge_alias(competence):
+    """Une compétence devenue alias : reporter ses offres sur la compétence de référence"""
+    links = OffreCompetence.objects.filter(competence=competence)
+    with transaction.atomic():
+        links.filter(
+            offre_id__in=OffreCompetence.objects.filter(competence_id=competence.alias_de_id).values('offre_id')
+        ).delete()
+        links.update(competence_id=competence.alias_de_id)
+        # Pas de chaîne d'alias : les alias de l'alias pointent vers la référence
+        Competence.objects.filter(alias_de=competence).update(alias_de_id=competence.alias_de_id)
+
+
+def filter_by_competences(queryset, value, mode='all'):
+    """
+    Offres requérant toutes (mode 'all') ou au moins une (mode 'any') des
+    compétences de `value` (séparées par des virgules). Sous-requête sur
+    l'index (compétence, offre) : aucun parcours du texte des offres.
+    """
+    keys = set(split_competences(value))
+    if not keys:
+        return queryset
+    resolved = resolve_competences(keys)
+    competence_ids = set(resolved.values())
+    if mode == 'any':
+        links = OffreCompetence.objects.filter(competence_id__in=competence_ids)
+    else:
+        if len(resolved) < len(keys):
+            # Compétence inconnue : aucune offre ne les requiert toutes
+            return queryset.none()
+        links = (
+            OffreCompetence.objects.filter(competence_id__in=competence_ids)
+            .values('offre_id')
+            .annotate(matched=Count('competence_id'))
+            .filter(matched=len(competence_ids))
+        )
+    return queryset.filter(id__in=links.values('offre_id'))
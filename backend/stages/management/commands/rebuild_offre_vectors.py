@@ -0,0 +1,20 @@
+"""
+Commande pour recalculer les vecteurs TF-IDF de toutes les offres (offres similaires)
+"""
+import time
+
+from django.core.management.base import BaseCommand
+
+from stages.similarity import rebuild_offre_vectors
+
+
+class Command(BaseCommand):
+    help = "Recalcule les vecteurs TF-IDF de toutes les offres de stage"
+
+    def handle(self, *args, **options):
+        start = time.monotonic()
+        stats = rebuild_offre_vectors()
+        self.stdout.write(
+            f"Offres indexées : {stats['offres']} ({stats['terms']} termes distincts) "
+            f"en {time.monotonic() - start:.1f}s"
+        )
@@ -0,0 +1,71 @@
+"""
+Classement des candidatures d'une offre par adéquation : les termes de
+l'offre sont comparés aux termes indexés de chaque stagiaire (CV et
+profil, voir accounts.talent_search)
+"""
+from collections import defaultdict
+
+from django.conf import settings
+from django.db.models import Case, F, IntegerField, OuterRef, Subquery, Sum, Value, When
+from django.db.models.functions import Coalesce
+
+from accounts.cv_text import normalize_terms
+from accounts.models import CandidateTerm
+
+DEFAULTS = {
+    # Facteur appliqué au poids d'un terme du stagiaire selon la partie de l'offre où il figure
+    'COMPETENCE_FACTOR': 3,
+    'DOMAINE_FACTOR': 2,
+    'VILLE_FACTOR': 2,
+    'TYPE_STAGE_FACTOR': 1,
+    'MAX_TERMS': 50,
+}
+
+
+def get_matching_setting(name):
+    """Lire un paramètre de settings.CANDIDATE_MATCHING avec sa valeur par défaut"""
+    return getattr(settings, 'CANDIDATE_MATCHING', {}).get(name, DEFAULTS[name])
+
+
+def offre_terms(offre):
+    """{terme: facteur} pour les compétences requises, le domaine, la ville et le type de stage de l'offre"""
+    factors = {}
+    for text, setting in (
+        (offre.competences_requises, 'COMPETENCE_FACTOR'),
+        (offre.domaine, 'DOMAINE_FACTOR'),
+        (offre.ville, 'VILLE_FACTOR'),
+        # Code du type (pfe, initiation...) tel qu'il apparaît dans les CV
+        (offre.type_stage, 'TYPE_STAGE_FACTOR'),
+    ):
+        factor = get_matching_setting(setting)
+        for term in normalize_terms(text or ''):
+            factors[term] = max(factor, factors.get(term, 0))
+    return dict(sorted(factors.items(), key=lambda item: -item[1])[:get_matching_setting('MAX_TERMS')])
+
+
+def annotate_match_score(queryset, offre):
+    """
+    Annoter les candidatures de `match_score` : somme, sur les termes de
+    l'offre, du poids du terme chez le stagiaire multiplié par son facteur.
+    Calculé par la base en une sous-requête corrélée sur l'index
+    (stagiaire, terme), sans charger les termes.
+    """
+    by_factor = defaultdict(list)
+    for term, factor in offre_terms(offre).items():
+        by_factor[factor].append(term)
+    if not by_factor:
+        return queryset.annotate(match_score=Value(0))
+
+    weighted = Case(
+        *[When(term__in=terms, then=F('weight') * factor) for factor, terms in by_factor.items()],
+        default=Value(0),
+        output_field=IntegerField(),
+    )
+    scores = (
+        CandidateTerm.objects
+        .filter(stagiaire_id=OuterRef('stagiaire_id'), term__in=[term for terms in by_factor.values() for term in terms])
+        .values('stagiaire_id')
+        .annotate(score=Sum(weighted))
+        .values('score')
+    )
+    return queryset.annotate(match_score=Coalesce(Subquery(scores, output_field=IntegerField()), Value(0)))
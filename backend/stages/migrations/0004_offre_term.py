@@ -0,0 +1,32 @@
+# Generated by Django 4.2.7 on 2026-10-19 19:48
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('stages', '0003_remove_offrestage_date_fin'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='OffreTerm',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('term', models.CharField(max_length=64, verbose_name='Terme')),
+                ('weight', models.FloatField(verbose_name='Poids TF-IDF')),
+                ('offre', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='terms', to='stages.offrestage', verbose_name='Offre')),
+            ],
+            options={
+                'verbose_name': "Terme d'offre",
+                'verbose_name_plural': "Termes d'offres",
+                'indexes': [models.Index(fields=['term', 'offre', 'weight'], name='offre_term_lookup_idx')],
+            },
+        ),
+        migrations.AddConstraint(
+            model_name='offreterm',
+            constraint=models.UniqueConstraint(fields=('offre', 'term'), name='offre_term_unique'),
+        ),
+    ]
@@ -0,0 +1,53 @@
+# Generated by Django 4.2.7 on 2026-10-19 19:51
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('stages', '0004_offre_term'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Competence',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('nom', models.CharField(max_length=100, verbose_name='Nom')),
+                ('cle', models.CharField(editable=False, max_length=100, unique=True, verbose_name='Clé')),
+                ('alias_de', models.ForeignKey(blank=True, limit_choices_to={'alias_de__isnull': True}, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='alias', to='stages.competence', verbose_name='Alias de')),
+            ],
+            options={
+                'verbose_name': 'Compétence',
+                'verbose_name_plural': 'Compétences',
+                'ordering': ['nom'],
+            },
+        ),
+        migrations.CreateModel(
+            name='OffreCompetence',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('competence', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='offre_competences', to='stages.competence')),
+                ('offre', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='offre_competences', to='stages.offrestage')),
+            ],
+            options={
+                'verbose_name': "Compétence d'une offre",
+                'verbose_name_plural': 'Compétences des offres',
+            },
+        ),
+        migrations.AddField(
+            model_name='offrestage',
+            name='competences',
+            field=models.ManyToManyField(blank=True, related_name='offres', through='stages.OffreCompetence', to='stages.competence', verbose_name='Compétences'),
+        ),
+        migrations.AddIndex(
+            model_name='offrecompetence',
+            index=models.Index(fields=['competence', 'offre'], name='offre_competence_lookup_idx'),
+        ),
+        migrations.AddConstraint(
+            model_name='offrecompetence',
+            constraint=models.UniqueConstraint(fields=('offre', 'competence'), name='offre_competence_unique'),
+        ),
+    ]
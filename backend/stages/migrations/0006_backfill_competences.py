@@ -0,0 +1,75 @@
+"""
+Compétences des offres existantes : découpage de competences_requises et
+alias courants
+"""
+import re
+import unicodedata
+
+from django.db import migrations
+
+SEPARATORS_RE = re.compile(r'[,;\n/|•]+')
+
+# Alias courants : (alias, compétence de référence)
+ALIASES = [
+    ('JS', 'JavaScript'),
+    ('NodeJS', 'Node.js'),
+    ('Node', 'Node.js'),
+    ('ReactJS', 'React'),
+    ('React.js', 'React'),
+    ('Postgres', 'PostgreSQL'),
+    ('Python3', 'Python'),
+    ('TS', 'TypeScript'),
+    ('MS Excel', 'Excel'),
+    ('Microsoft Excel', 'Excel'),
+    ('Anglais courant', 'Anglais'),
+]
+
+
+def competence_key(nom):
+    # Copie de stages.models.competence_key au moment de la migration
+    nom = unicodedata.normalize('NFKD', nom.lower())
+    nom = ''.join(char for char in nom if not unicodedata.combining(char))
+    return re.sub(r'[^a-z0-9+#.]+', ' ', nom).strip(' .')
+
+
+def get_competence(Competence, nom, cache):
+    key = competence_key(nom)
+    if key not in cache:
+        competence = Competence.objects.filter(cle=key).first()
+        cache[key] = competence or Competence.objects.create(nom=nom, cle=key)
+    return cache[key]
+
+
+def backfill(apps, schema_editor):
+    Competence = apps.get_model('stages', 'Competence')
+    OffreStage = apps.get_model('stages', 'OffreStage')
+    OffreCompetence = apps.get_model('stages', 'OffreCompetence')
+
+    cache = {}
+    for alias, reference in ALIASES:
+        competence = get_competence(Competence, alias, cache)
+        competence.alias_de = get_competence(Competence, reference, cache)
+        competence.save(update_fields=['alias_de'])
+
+    links = []
+    for offre_id, text in OffreStage.objects.values_list('id', 'competences_requises').iterator():
+        competence_ids = set()
+        for nom in SEPARATORS_RE.split(text or ''):
+            nom = ' '.join(nom.split())[:100]
+            if not competence_key(nom):
+                continue
+            competence = get_competence(Competence, nom, cache)
+            competence_ids.add(competence.alias_de_id or competence.id)
+        links.extend(OffreCompetence(offre_id=offre_id, competence_id=competence_id) for competence_id in competence_ids)
+    OffreCompetence.objects.bulk_create(links, batch_size=1000, ignore_conflicts=True)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('stages', '0005_competences'),
+    ]
+
+    operations = [
+        migrations.RunPython(backfill, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,25 @@
+# Generated by Django 4.2.7 on 2026-10-19 19:57
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounts', '0006_reference_values'),
+        ('stages', '0006_backfill_competences'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='offrestage',
+            name='domaine_ref',
+            field=models.ForeignKey(blank=True, editable=False, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='offres', to='accounts.domaine'),
+        ),
+        migrations.AddField(
+            model_name='offrestage',
+            name='ville_ref',
+            field=models.ForeignKey(blank=True, editable=False, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='offres', to='accounts.ville'),
+        ),
+    ]
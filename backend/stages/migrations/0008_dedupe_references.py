@@ -0,0 +1,62 @@
+"""
+Valeurs de référence des profils et offres existants : une valeur par clé
+normalisée (l'orthographe la plus fréquente), texte réécrit avec ce nom
+"""
+import re
+import unicodedata
+from collections import Counter, defaultdict
+
+from django.db import migrations
+from django.db.models import Count
+
+# Valeur de référence -> champs texte qui l'utilisent
+SOURCES = {
+    ('accounts', 'Ville'): [('accounts', 'Stagiaire', 'ville'), ('accounts', 'Entreprise', 'ville'),
+                            ('stages', 'OffreStage', 'ville')],
+    ('accounts', 'Domaine'): [('accounts', 'Stagiaire', 'domaine'), ('stages', 'OffreStage', 'domaine')],
+    ('accounts', 'SecteurActivite'): [('accounts', 'Entreprise', 'secteur_activite')],
+}
+
+
+def reference_key(nom):
+    # Copie de accounts.models.reference_key au moment de la migration
+    nom = unicodedata.normalize('NFKD', (nom or '').lower())
+    nom = ''.join(char for char in nom if not unicodedata.combining(char))
+    return re.sub(r'[^a-z0-9]+', ' ', nom).strip()
+
+
+def dedupe(apps, schema_editor):
+    for (app_label, model_name), sources in SOURCES.items():
+        Reference = apps.get_model(app_label, model_name)
+        spellings = defaultdict(Counter)
+        values = []
+        for source_app, source_model, field in sources:
+            Model = apps.get_model(source_app, source_model)
+            for text, count in Model.objects.values_list(field).annotate(n=Count('id')).values_list(field, 'n'):
+                key = reference_key(text)
+                if key:
+                    spellings[key][' '.join(text.split())[:100]] += count
+                    values.append((Model, field, text, key))
+
+        references = {reference.cle: reference for reference in Reference.objects.all()}
+        for key, counter in spellings.items():
+            if key not in references:
+                # Orthographe la plus fréquente, puis ordre alphabétique
+                nom = sorted(counter.items(), key=lambda item: (-item[1], item[0]))[0][0]
+                references[key] = Reference.objects.create(nom=nom, cle=key)
+
+        for Model, field, text, key in values:
+            reference = references[key]
+            Model.objects.filter(**{field: text}).update(**{f'{field}_ref': reference, field: reference.nom})
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounts', '0006_reference_values'),
+        ('stages', '0007_offre_references'),
+    ]
+
+    operations = [
+        migrations.RunPython(dedupe, migrations.RunPython.noop),
+    ]
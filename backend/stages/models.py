@@ -1,16 +1,65 @@
 """
 Modèles pour la gestion des stages
 """
+import re
+import unicodedata
+
 from django.db import models
 from django.contrib.auth import get_user_model
-from accounts.models import Entreprise
+from django.core.exceptions import ValidationError
+from accounts.models import Domaine, Entreprise, Ville
+from .tracking import FieldTrackerMixin
 
 User = get_user_model()
 
 
-class OffreStage(models.Model):
+def competence_key(nom):
+    """Clé de comparaison d'une compétence : minuscules, sans accents ni espaces superflus"""
+    nom = unicodedata.normalize('NFKD', nom.lower())
+    nom = ''.join(char for char in nom if not unicodedata.combining(char))
+    return re.sub(r'[^a-z0-9+#.]+', ' ', nom).strip(' .')
+
+
+class Competence(models.Model):
+    """Compétence normalisée ; un alias pointe vers la compétence de référence"""
+    
+    nom = models.CharField(max_length=100, verbose_name="Nom")
+    cle = models.CharField(max_length=100, unique=True, editable=False, verbose_name="Clé")
+    alias_de = models.ForeignKey(
+        'self',
+        on_delete=models.CASCADE,
+        null=True,
+        blank=True,
+        related_name='alias',
+        limit_choices_to={'alias_de__isnull': True},
+        verbose_name="Alias de"
+    )
+    
+    class Meta:
+        verbose_name = "Compétence"
+        verbose_name_plural = "Compétences"
+        ordering = ['nom']
+    
+    def __str__(self):
+        return f"{self.nom} → {self.alias_de.nom}" if self.alias_de_id else self.nom
+    
+    def clean(self):
+        if self.alias_de_id and self.alias_de_id == self.pk:
+            raise ValidationError({'alias_de': "Une compétence ne peut pas être son propre alias"})
+    
+    def save(self, *args, **kwargs):
+        self.cle = competence_key(self.nom)
+        super().save(*args, **kwargs)
+
+
+class OffreStage(FieldTrackerMixin, models.Model):
     """Modèle pour les offres de stage"""
     
+    tracked_fields = ('est_active', 'titre', 'description', 'competences_requises')
+    # Positionné par les vues d'administration avant save() : seul un changement de est_active
+    # fait par un admin est une validation ou un refus notifié à l'entreprise
+    moderated = False
+    
     TYPE_STAGE_CHOICES = [
         ('OBSERVATION', 'Stage d\'observation'),
         ('INITIATION', 'Stage d\'initiation'),
@@ -31,14 +80,28 @@ class OffreStage(models.Model):
         verbose_name="Type de stage"
     )
     domaine = models.CharField(max_length=100, verbose_name="Domaine")
+    domaine_ref = models.ForeignKey(
+        Domaine, on_delete=models.SET_NULL, null=True, blank=True, editable=False, related_name='offres'
+    )
     description = models.TextField(verbose_name="Description")
     competences_requises = models.TextField(
         verbose_name="Compétences requises",
         help_text="Séparées par des virgules"
     )
+    # Renseigné à partir de competences_requises à chaque modification
+    competences = models.ManyToManyField(
+        Competence,
+        through='OffreCompetence',
+        related_name='offres',
+        blank=True,
+        verbose_name="Compétences"
+    )
     duree = models.CharField(max_length=50, verbose_name="Durée")
     date_debut = models.DateField(verbose_name="Date de début")
     ville = models.CharField(max_length=100, verbose_name="Ville")
+    ville_ref = models.ForeignKey(
+        Ville, on_delete=models.SET_NULL, null=True, blank=True, editable=False, related_name='offres'
+    )
     remuneration = models.CharField(
         max_length=100, 
         verbose_name="Rémunération",
@@ -70,6 +133,9 @@ class OffreStage(models.Model):
     
     def get_places_prises(self):
         """Retourne le nombre de places prises (candidatures acceptées)"""
+        if hasattr(self, 'places_prises'):
+            # Déjà compté par la requête (annotation des listes)
+            return self.places_prises
         return self.candidatures.filter(statut='ACCEPTEE').count()
     
     def est_complete(self):
@@ -88,9 +154,11 @@ class OffreStage(models.Model):
         return self.est_active and not self.est_expiree() and not self.est_complete()
 
 
-class Candidature(models.Model):
+class Candidature(FieldTrackerMixin, models.Model):
     """Modèle pour les candidatures aux offres"""
     
+    tracked_fields = ('statut',)
+    
     STATUT_CHOICES = [
         ('EN_ATTENTE', 'En attente'),
         ('ACCEPTEE', 'Acceptée'),
@@ -130,3 +198,46 @@ class Candidature(models.Model):
     
     def __str__(self):
         return f"{self.stagiaire} - {self.offre.titre} ({self.get_statut_display()})"
+
+
+class OffreCompetence(models.Model):
+    """Compétence (de référence) requise par une offre"""
+    
+    offre = models.ForeignKey(OffreStage, on_delete=models.CASCADE, related_name='offre_competences')
+    competence = models.ForeignKey(Competence, on_delete=models.CASCADE, related_name='offre_competences')
+    
+    class Meta:
+        verbose_name = "Compétence d'une offre"
+        verbose_name_plural = "Compétences des offres"
+        constraints = [
+            models.UniqueConstraint(fields=['offre', 'competence'], name='offre_competence_unique'),
+        ]
+        indexes = [
+            # Filtre ?competences= : offres par compétence sans lire la table des offres
+            models.Index(fields=['competence', 'offre'], name='offre_competence_lookup_idx'),
+        ]
+    
+    def __str__(self):
+        return f"{self.offre_id} - {self.competence_id}"
+
+
+class OffreTerm(models.Model):
+    """Composante non nulle du vecteur TF-IDF normalisé d'une offre (offres similaires)"""
+    
+    offre = models.ForeignKey(OffreStage, on_delete=models.CASCADE, related_name='terms', verbose_name="Offre")
+    term = models.CharField(max_length=64, verbose_name="Terme")
+    weight = models.FloatField(verbose_name="Poids TF-IDF")
+    
+    class Meta:
+        verbose_name = "Terme d'offre"
+        verbose_name_plural = "Termes d'offres"
+        constraints = [
+            models.UniqueConstraint(fields=['offre', 'term'], name='offre_term_unique'),
+        ]
+        indexes = [
+            # Index couvrant : listes d'offres par terme pour le produit scalaire
+            models.Index(fields=['term', 'offre', 'weight'], name='offre_term_lookup_idx'),
+        ]
+    
+    def __str__(self):
+        return self.term
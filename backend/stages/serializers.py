@@ -8,6 +8,7 @@ import re
 from .models import OffreStage, Candidature
 from accounts.serializers import EntrepriseSerializer, StagiaireSerializer
 from accounts.models import Stagiaire
+from accounts.cv_delivery import signed_cv_url
 
 
 class OffreStageSerializer(serializers.ModelSerializer):
@@ -186,12 +187,8 @@ class StagiaireWithUserSerializer(serializers.ModelSerializer):
     
     def get_cv_file(self, obj):
         """Récupérer l'URL du CV"""
-        if obj.cv_file:
-            request = self.context.get('request')
-            if request:
-                return request.build_absolute_uri(obj.cv_file.url)
-            return obj.cv_file.url
-        return None
+        # Lien signé temporaire : le fichier n'est pas exposé sous /media/
+        return signed_cv_url(obj, self.context.get('request'))
 
 
 class CandidatureSerializer(serializers.ModelSerializer):
@@ -200,12 +197,14 @@ class CandidatureSerializer(serializers.ModelSerializer):
     offre_id = serializers.IntegerField(write_only=True, required=False)
     stagiaire = serializers.SerializerMethodField()
     stagiaire_id = serializers.IntegerField(write_only=True, required=False)
+    match_score = serializers.SerializerMethodField()
     
     class Meta:
         model = Candidature
         fields = [
             'id', 'offre', 'offre_id', 'stagiaire', 'stagiaire_id',
-            'lettre_motivation', 'statut', 'date_candidature', 'date_modification'
+            'lettre_motivation', 'statut', 'date_candidature', 'date_modification',
+            'match_score'
         ]
         read_only_fields = ['id', 'date_candidature', 'date_modification']
     
@@ -217,6 +216,10 @@ class CandidatureSerializer(serializers.ModelSerializer):
             return serializer.data
         return None
     
+    def get_match_score(self, obj):
+        """Score d'adéquation, présent seulement pour les listes triées par adéquation"""
+        return getattr(obj, 'match_score', None)
+    
     def create(self, validated_data):
         """Créer une candidature"""
         offre_id = validated_data.pop('offre_id', None)
@@ -247,12 +250,14 @@ class CandidatureAdminSerializer(serializers.ModelSerializer):
     offre_id = serializers.IntegerField(write_only=True, required=False)
     stagiaire = serializers.SerializerMethodField()
     stagiaire_id = serializers.IntegerField(write_only=True, required=False)
+    match_score = serializers.SerializerMethodField()
     
     class Meta:
         model = Candidature
         fields = [
             'id', 'offre', 'offre_id', 'stagiaire', 'stagiaire_id',
-            'lettre_motivation', 'statut', 'date_candidature', 'date_modification'
+            'lettre_motivation', 'statut', 'date_candidature', 'date_modification',
+            'match_score'
         ]
         read_only_fields = ['id', 'date_candidature', 'date_modification']
     
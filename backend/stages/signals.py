@@ -0,0 +1,39 @@
+"""
+Signaux des offres de stage : vecteur des offres similaires, compétences,
+valeurs de référence
+"""
+from django.db.models.signals import post_save, pre_save
+from django.dispatch import receiver
+
+from accounts.references import assign_references
+from jobs.queue import enqueue
+from .competences import merge_alias, sync_offre_competences
+from .models import Competence, OffreStage
+from .similarity import TEXT_FIELDS
+
+
+@receiver(pre_save, sender=OffreStage)
+def resolve_offre_references(sender, instance, **kwargs):
+    """Ville et domaine : clé de la valeur de référence et nom canonique"""
+    assign_references([instance])
+
+
+@receiver(post_save, sender=OffreStage)
+def reindex_offre(sender, instance, created, **kwargs):
+    """Nouvelle offre ou texte modifié : recalculer son vecteur après la transaction"""
+    if created or any(instance.has_changed(field) for field in TEXT_FIELDS):
+        enqueue('stages.index_offres', offre_ids=[instance.pk])
+
+
+@receiver(post_save, sender=OffreStage)
+def sync_competences(sender, instance, created, **kwargs):
+    """Compétences requises modifiées : mettre à jour les compétences de l'offre"""
+    if created or instance.has_changed('competences_requises'):
+        sync_offre_competences(instance)
+
+
+@receiver(post_save, sender=Competence)
+def merge_competence_alias(sender, instance, **kwargs):
+    """Compétence déclarée alias d'une autre : ses offres passent à la compétence de référence"""
+    if instance.alias_de_id:
+        merge_alias(instance)
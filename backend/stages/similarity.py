@@ -0,0 +1,156 @@
+"""
+Offres similaires : vecteurs TF-IDF creux des offres (titre, description,
+compétences requises) stockés dans OffreTerm et comparés par similarité
+cosinus
+"""
+import math
+from collections import Counter
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Case, Count, F, FloatField, Q, Sum, Value, When
+from django.utils import timezone
+
+from accounts.cv_text import normalize_terms
+from .models import OffreStage, OffreTerm
+
+DEFAULTS = {
+    'TOP_K': 5,
+    'MAX_K': 20,
+    'QUERY_TERMS': 25,  # termes les plus discriminants de l'offre de départ utilisés pour la recherche
+    'CANDIDATE_FACTOR': 4,  # offres classées avant d'écarter celles qui sont complètes
+    'BATCH_SIZE': 500,
+}
+
+TEXT_FIELDS = ('titre', 'description', 'competences_requises')
+
+
+def get_similarity_setting(name):
+    """Lire un paramètre de settings.SIMILAR_OFFRES avec sa valeur par défaut"""
+    return getattr(settings, 'SIMILAR_OFFRES', {}).get(name, DEFAULTS[name])
+
+
+def offre_term_counts(offre):
+    """Occurrences des termes de l'offre ; le titre compte double"""
+    title = normalize_terms(offre.titre or '')
+    return title + title + normalize_terms(offre.description or '') + normalize_terms(offre.competences_requises or '')
+
+
+def tfidf_vector(counts, document_frequencies, total):
+    """{terme: poids} : tf logarithmique, idf lissé, norme euclidienne 1"""
+    weights = {
+        term: (1 + math.log(count)) * (math.log((1 + total) / (1 + document_frequencies.get(term, 0))) + 1)
+        for term, count in counts.items()
+    }
+    norm = math.sqrt(sum(weight * weight for weight in weights.values())) or 1.0
+    return {term: weight / norm for term, weight in weights.items()}
+
+
+def _store(vectors):
+    OffreTerm.objects.filter(offre_id__in=list(vectors)).delete()
+    OffreTerm.objects.bulk_create(
+        [
+            OffreTerm(offre_id=offre_id, term=term, weight=weight)
+            for offre_id, vector in vectors.items()
+            for term, weight in vector.items()
+        ],
+        batch_size=5000
+    )
+
+
+def index_offres(offre_ids):
+    """
+    Recalculer le vecteur des offres données (création ou modification du
+    texte) avec les fréquences documentaires actuelles. Les vecteurs des
+    autres offres ne sont pas touchés : rebuild_offre_vectors() remet tout
+    à jour avec les mêmes fréquences.
+    """
+    offres = list(OffreStage.objects.filter(id__in=offre_ids).only('id', *TEXT_FIELDS))
+    counts = {offre.id: offre_term_counts(offre) for offre in offres}
+    terms = set().union(*counts.values())
+    with transaction.atomic():
+        OffreTerm.objects.filter(offre_id__in=offre_ids).delete()
+        document_frequencies = Counter(dict(
+            OffreTerm.objects.filter(term__in=terms).values('term').annotate(df=Count('offre_id')).values_list('term', 'df')
+        ))
+        for offre_counts in counts.values():
+            document_frequencies.update(offre_counts.keys())
+        total = OffreStage.objects.count()
+        _store({
+            offre_id: tfidf_vector(offre_counts, document_frequencies, total)
+            for offre_id, offre_counts in counts.items()
+        })
+    return len(offres)
+
+
+def _batches(batch_size):
+    last_id = 0
+    while True:
+        batch = list(OffreStage.objects.filter(id__gt=last_id).order_by('id').only('id', *TEXT_FIELDS)[:batch_size])
+        if not batch:
+            return
+        last_id = batch[-1].id
+        yield batch
+
+
+def rebuild_offre_vectors():
+    """
+    Recalculer les vecteurs de toutes les offres en deux passes (fréquences
+    documentaires, puis vecteurs) sans garder tous les textes en mémoire
+    """
+    batch_size = get_similarity_setting('BATCH_SIZE')
+    document_frequencies = Counter()
+    total = 0
+    for batch in _batches(batch_size):
+        for offre in batch:
+            document_frequencies.update(offre_term_counts(offre).keys())
+        total += len(batch)
+    for batch in _batches(batch_size):
+        with transaction.atomic():
+            _store({offre.id: tfidf_vector(offre_term_counts(offre), document_frequencies, total) for offre in batch})
+    # Offres supprimées entre les deux passes : leurs termes partent avec elles (CASCADE)
+    return {'offres': total, 'terms': len(document_frequencies)}
+
+
+def similar_offres(offre, k=None):
+    """
+    Offres disponibles les plus proches de `offre`, chacune avec son score
+    dans `similarity`. Le produit scalaire des vecteurs normalisés (cosinus)
+    est calculé par la base sur les termes les plus discriminants de l'offre.
+    """
+    k = k or get_similarity_setting('TOP_K')
+    query = list(
+        OffreTerm.objects.filter(offre=offre).order_by('-weight').values_list('term', 'weight')
+        [:get_similarity_setting('QUERY_TERMS')]
+    )
+    if not query:
+        return []
+
+    score = Sum(
+        Case(*[When(term=term, then=F('weight') * Value(weight)) for term, weight in query], default=Value(0.0)),
+        output_field=FloatField()
+    )
+    today = timezone.now().date()
+    ranked = (
+        OffreTerm.objects
+        .filter(term__in=[term for term, _ in query], offre__est_active=True)
+        .filter(Q(offre__date_limite__isnull=True) | Q(offre__date_limite__gte=today))
+        .exclude(offre_id=offre.id)
+        .values('offre_id')
+        .annotate(score=score)
+        .order_by('-score', '-offre_id')
+        [:k * get_similarity_setting('CANDIDATE_FACTOR')]
+    )
+    scores = {row['offre_id']: row['score'] for row in ranked}
+
+    # Offres complètes écartées ici : le nombre de places prises n'est compté que pour les candidates
+    offres = (
+        OffreStage.objects.filter(id__in=list(scores))
+        .select_related('entreprise__user')
+        .annotate(places_prises=Count('candidatures', filter=Q(candidatures__statut='ACCEPTEE')))
+        .filter(places_prises__lt=F('nombre_places'))
+    )
+    result = sorted(offres, key=lambda similar: (-scores[similar.id], -similar.id))[:k]
+    for similar in result:
+        similar.similarity = round(scores[similar.id], 4)
+    return result
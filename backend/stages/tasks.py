@@ -0,0 +1,17 @@
+"""
+Tâches en arrière-plan des stages
+"""
+from jobs.queue import job
+from .similarity import index_offres, rebuild_offre_vectors
+
+
+@job('stages.index_offres')
+def indexer_offres(offre_ids):
+    """Recalculer le vecteur TF-IDF des offres créées ou modifiées"""
+    index_offres(offre_ids)
+
+
+@job('stages.rebuild_offre_vectors')
+def reconstruire_vecteurs_offres():
+    """Recalculer tous les vecteurs avec les fréquences documentaires à jour"""
+    rebuild_offre_vectors()
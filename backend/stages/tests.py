@@ -0,0 +1,139 @@
+"""
+Tests des offres de stage et des candidatures
+"""
+import io
+import os
+import tempfile
+import threading
+import zipfile
+from datetime import date
+from unittest import mock
+
+from django.test import TestCase, TransactionTestCase
+from django.urls import reverse
+from rest_framework_simplejwt.tokens import AccessToken
+
+from accounts.cv_delivery import stream_zip
+from accounts.models import Entreprise, Stagiaire, User
+from .competences import filter_by_competences
+from .models import Candidature, Competence, OffreCompetence, OffreStage
+
+
+# Les morceaux sont produits dans un thread réservé, avec sa propre connexion : données validées en base
+class ArchiveCVTests(TransactionTestCase):
+    def setUp(self):
+        media = tempfile.TemporaryDirectory()
+        self.addCleanup(media.cleanup)
+        override = self.settings(MEDIA_ROOT=media.name, CV_DELIVERY={'CHUNK_SIZE': 16 * 1024})
+        override.enable()
+        self.addCleanup(override.disable)
+        os.makedirs(os.path.join(media.name, 'cvs'))
+
+        user = User.objects.create_user(email='e@exemple.fr', role='ENTREPRISE')
+        entreprise = Entreprise.objects.create(
+            user=user, nom_entreprise='e', secteur_activite='Informatique', telephone='0600000000',
+            adresse='1 rue', ville='Lyon', contact_nom='Nom', contact_prenom='Prénom'
+        )
+        self.offre = OffreStage.objects.create(
+            entreprise=entreprise, titre='Stage data', type_stage='PFE', domaine='Informatique',
+            description='Description', competences_requises='Python', duree='6 mois',
+            date_debut=date(2027, 1, 1), ville='Lyon', est_active=True
+        )
+        self.contenus = {}
+        for i in range(3):
+            contenu = b'%PDF-1.4\n' + os.urandom(40 * 1024)
+            with open(os.path.join(media.name, 'cvs', f'{i}.pdf'), 'wb') as file:
+                file.write(contenu)
+            stagiaire = Stagiaire.objects.create(
+                user=User.objects.create_user(email=f's{i}@exemple.fr', role='STAGIAIRE'),
+                nom=f'Nom{i}', prenom='Prénom', telephone='0600000000', cv_file=f'cvs/{i}.pdf'
+            )
+            Candidature.objects.create(offre=self.offre, stagiaire=stagiaire)
+            self.contenus[stagiaire.id] = contenu
+        self.token = str(AccessToken.for_user(user))
+
+    async def test_archive_produite_par_morceaux_sous_asgi(self):
+        threads = set()
+
+        def archive(files):
+            for chunk in stream_zip(files):
+                threads.add(threading.current_thread().name)
+                yield chunk
+
+        with mock.patch('stages.views.stream_zip', side_effect=archive):
+            response = await self.async_client.get(
+                reverse('candidatures-cv-archive', args=[self.offre.id]),
+                headers={'Authorization': f'Bearer {self.token}'}
+            )
+            self.assertEqual(response.status_code, 200)
+            self.assertTrue(response.is_async)
+            chunks = [chunk async for chunk in response.streaming_content]
+        self.assertGreater(len(chunks), len(self.contenus))
+        # Tous les morceaux (et la lecture du curseur) dans le même thread, réservé à la réponse
+        self.assertEqual(len(threads), 1)
+        self.assertTrue(threads.pop().startswith('streaming'))
+
+        with zipfile.ZipFile(io.BytesIO(b''.join(chunks))) as archive:
+            self.assertEqual(
+                sorted(archive.read(name) for name in archive.namelist()),
+                sorted(self.contenus.values())
+            )
+
+
+class CompetencesTests(TestCase):
+    def setUp(self):
+        user = User.objects.create_user(email='e@exemple.fr', role='ENTREPRISE')
+        self.entreprise = Entreprise.objects.create(
+            user=user, nom_entreprise='e', secteur_activite='Informatique', telephone='0600000000',
+            adresse='1 rue', ville='Lyon', contact_nom='Nom', contact_prenom='Prénom'
+        )
+
+    def offre(self, competences):
+        return OffreStage.objects.create(
+            entreprise=self.entreprise, titre='Stage', type_stage='PFE', domaine='Informatique',
+            description='Description', competences_requises=competences, duree='6 mois',
+            date_debut=date(2027, 1, 1), ville='Lyon', est_active=True
+        )
+
+    def filtrer(self, value, mode='all'):
+        return set(filter_by_competences(OffreStage.objects.all(), value, mode).values_list('id', flat=True))
+
+    def alias(self, nom, reference):
+        competence = Competence.objects.get(nom=nom)
+        competence.alias_de = reference
+        competence.save()
+
+    def test_alias_suivi_par_le_filtre(self):
+        python = self.offre('Python, Django')
+        golang = self.offre('Golang; Docker')
+        les_deux = self.offre('Golang, Go')
+        go = Competence.objects.get(nom='Go')
+
+        self.alias('Golang', go)
+
+        self.assertEqual(self.filtrer('go'), {golang.id, les_deux.id})
+        self.assertEqual(self.filtrer('golang, docker'), {golang.id})
+        self.assertEqual(self.filtrer('Python, Golang', mode='any'), {python.id, golang.id, les_deux.id})
+        # Offre qui citait l'alias et la référence : un seul rattachement
+        self.assertEqual(OffreCompetence.objects.filter(offre=les_deux).count(), 1)
+        # Nouvelle offre citant l'alias : rattachée directement à la référence
+        nouvelle = self.offre('golang')
+        self.assertEqual(list(nouvelle.competences.values_list('id', flat=True)), [go.id])
+
+    def test_competence_inconnue(self):
+        python = self.offre('Python, Django')
+
+        self.assertEqual(self.filtrer('Python, Cobol'), set())
+        self.assertEqual(self.filtrer('Python, Cobol', mode='any'), {python.id})
+        self.assertEqual(self.filtrer(' , '), {python.id})
+
+    def test_chaine_d_alias_aplatie(self):
+        offre = self.offre('VueJS, Vue.js')
+        vue = Competence.objects.create(nom='Vue')
+
+        self.alias('VueJS', Competence.objects.get(nom='Vue.js'))
+        self.alias('Vue.js', vue)
+
+        self.assertEqual(Competence.objects.get(nom='VueJS').alias_de, vue)
+        self.assertEqual(list(offre.competences.values_list('id', flat=True)), [vue.id])
+        self.assertEqual(self.filtrer('vuejs'), {offre.id})
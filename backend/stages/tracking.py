@@ -0,0 +1,48 @@
+"""
+Suivi des modifications de champs sans relecture de l'état précédent en base
+"""
+
+
+class FieldTrackerMixin:
+    """
+    Mixin de modèle qui conserve la valeur des champs de `tracked_fields`
+    telle que chargée depuis la base (ou lors du dernier save()), afin que
+    les signaux puissent détecter une vraie transition sans SELECT supplémentaire.
+    """
+    tracked_fields = ()
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        instance._loaded_values = {
+            name: value
+            for name, value in zip(field_names, values)
+            if name in cls.tracked_fields
+        }
+        return instance
+
+    def _snapshot(self):
+        self._loaded_values = {
+            name: getattr(self, name)
+            for name in self.tracked_fields
+            if name in self.__dict__
+        }
+
+    def previous_value(self, field):
+        """Valeur du champ au chargement ou au dernier save() (None pour un nouvel objet)"""
+        return getattr(self, '_loaded_values', {}).get(field)
+
+    def has_changed(self, field):
+        """Indique si le champ a été modifié depuis le chargement ou le dernier save()"""
+        if self._state.adding:
+            return True
+        loaded_values = getattr(self, '_loaded_values', {})
+        if field not in loaded_values:
+            # Champ différé ou instance construite à la main : état précédent inconnu
+            return True
+        return getattr(self, field) != loaded_values[field]
+
+    def save(self, *args, **kwargs):
+        # post_save est envoyé pendant super().save() : les signaux voient encore l'ancien état
+        super().save(*args, **kwargs)
+        self._snapshot()
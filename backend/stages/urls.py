@@ -6,11 +6,13 @@ from .views import (
     OffreStageListCreateView,
     OffreStageDetailView,
     MyOffresView,
+    OffresSimilairesView,
     CandidatureListCreateView,
     CandidatureDetailView,
     CandidatureAcceptView,
     CandidatureRejectView,
     CandidaturesByOffreView,
+    CandidaturesCVArchiveView,
     MyCandidaturesView,
 )
 
@@ -18,6 +20,7 @@ urlpatterns = [
     # Offres de stage
     path('offres/', OffreStageListCreateView.as_view(), name='offre-list-create'),
     path('offres/<int:pk>/', OffreStageDetailView.as_view(), name='offre-detail'),
+    path('offres/<int:pk>/similaires/', OffresSimilairesView.as_view(), name='offre-similaires'),
     path('offres/my-offres/', MyOffresView.as_view(), name='my-offres'),
     
     # Candidatures
@@ -27,4 +30,5 @@ urlpatterns = [
     path('candidatures/<int:pk>/reject/', CandidatureRejectView.as_view(), name='candidature-reject'),
     path('candidatures/my-candidatures/', MyCandidaturesView.as_view(), name='my-candidatures'),
     path('candidatures/offre/<int:offre_id>/candidatures/', CandidaturesByOffreView.as_view(), name='candidatures-by-offre'),
+    path('candidatures/offre/<int:offre_id>/cvs/', CandidaturesCVArchiveView.as_view(), name='candidatures-cv-archive'),
 ]
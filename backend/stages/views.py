@@ -5,16 +5,24 @@ from rest_framework import status, generics, permissions
 from rest_framework.response import Response
 from rest_framework.views import APIView
 from django.shortcuts import get_object_or_404
+from django.core.files.storage import default_storage
 from django.db.models import Q, Count, F
+from django.http import StreamingHttpResponse
 from django.utils import timezone
+from django.utils.text import slugify
 
+from .competences import filter_by_competences
+from .matching import annotate_match_score
 from .models import OffreStage, Candidature
+from .similarity import get_similarity_setting, similar_offres
 from .serializers import (
     OffreStageSerializer, 
     CandidatureSerializer,
     OffreStageAdminSerializer,
     CandidatureAdminSerializer
 )
+from accounts.cv_delivery import stream_zip, streaming_content
+from accounts.references import filter_reference
 from accounts.models import Entreprise, Stagiaire
 
 
@@ -22,6 +30,7 @@ class OffreStageListCreateView(generics.ListCreateAPIView):
     """Vue pour lister et créer des offres de stage"""
     serializer_class = OffreStageSerializer
     permission_classes = [permissions.IsAuthenticatedOrReadOnly]
+    throttle_scope = {'GET': 'offres_list'}
     
     def get_queryset(self):
         queryset = OffreStage.objects.annotate(
@@ -33,6 +42,7 @@ class OffreStageListCreateView(generics.ListCreateAPIView):
         ville = self.request.query_params.get('ville', None)
         domaine = self.request.query_params.get('domaine', None)
         est_active = self.request.query_params.get('est_active', None)
+        competences = self.request.query_params.get('competences', None)
         
         if search:
             queryset = queryset.filter(
@@ -42,14 +52,18 @@ class OffreStageListCreateView(generics.ListCreateAPIView):
             )
         
         if ville:
-            queryset = queryset.filter(ville=ville)
+            queryset = filter_reference(queryset, 'ville', ville)
         
         if domaine:
-            queryset = queryset.filter(domaine=domaine)
+            queryset = filter_reference(queryset, 'domaine', domaine)
         
         if est_active is not None:
             queryset = queryset.filter(est_active=est_active.lower() == 'true')
         
+        if competences:
+            mode = 'any' if self.request.query_params.get('mode') == 'any' else 'all'
+            queryset = filter_by_competences(queryset, competences, mode)
+        
         # Filtrer selon le rôle de l'utilisateur
         if not self.request.user.is_authenticated or self.request.user.role == 'STAGIAIRE':
             # Pour les stagiaires et visiteurs non authentifiés, filtrer les offres disponibles
@@ -157,6 +171,11 @@ class OffreStageDetailView(generics.RetrieveUpdateDestroyAPIView):
         
         return super().update(request, *args, **kwargs)
     
+    def perform_update(self, serializer):
+        # Une entreprise qui désactive sa propre offre ne reçoit pas de notification de refus
+        serializer.instance.moderated = self.request.user.role == 'ADMIN'
+        serializer.save()
+    
     def destroy(self, request, *args, **kwargs):
         """Supprimer une offre"""
         offre = self.get_object()
@@ -171,6 +190,24 @@ class OffreStageDetailView(generics.RetrieveUpdateDestroyAPIView):
         return super().destroy(request, *args, **kwargs)
 
 
+class OffresSimilairesView(APIView):
+    """Vue pour récupérer les offres disponibles les plus proches d'une offre"""
+    permission_classes = [permissions.AllowAny]
+    
+    def get(self, request, pk):
+        offre = get_object_or_404(OffreStage, pk=pk)
+        try:
+            k = min(int(request.query_params.get('k', get_similarity_setting('TOP_K'))), get_similarity_setting('MAX_K'))
+        except ValueError:
+            return Response({'error': 'Paramètre k invalide'}, status=status.HTTP_400_BAD_REQUEST)
+        
+        offres = similar_offres(offre, max(k, 1))
+        data = OffreStageSerializer(offres, many=True, context={'request': request}).data
+        for item, similar in zip(data, offres):
+            item['similarite'] = similar.similarity
+        return Response(data)
+
+
 class MyOffresView(generics.ListAPIView):
     """Vue pour récupérer les offres de l'entreprise connectée"""
     serializer_class = OffreStageSerializer
@@ -191,6 +228,7 @@ class CandidatureListCreateView(generics.ListCreateAPIView):
     """Vue pour lister et créer des candidatures"""
     serializer_class = CandidatureSerializer
     permission_classes = [permissions.IsAuthenticated]
+    throttle_scope = {'POST': 'candidature_create'}
     
     def get_serializer_context(self):
         """Ajouter le request au contexte du serializer"""
@@ -356,7 +394,7 @@ class CandidatureRejectView(APIView):
 
 
 class CandidaturesByOffreView(generics.ListAPIView):
-    """Vue pour récupérer les candidatures d'une offre"""
+    """Vue pour récupérer les candidatures d'une offre (?order=match : par adéquation du profil)"""
     serializer_class = CandidatureSerializer
     permission_classes = [permissions.IsAuthenticated]
     
@@ -368,7 +406,12 @@ class CandidaturesByOffreView(generics.ListAPIView):
     
     def get_queryset(self):
         offre_id = self.kwargs['offre_id']
-        offre = get_object_or_404(OffreStage, pk=offre_id)
+        offre = get_object_or_404(
+            OffreStage.objects.select_related('entreprise__user').annotate(
+                places_prises=Count('candidatures', filter=Q(candidatures__statut='ACCEPTEE'))
+            ),
+            pk=offre_id
+        )
         
         user = self.request.user
         
@@ -379,7 +422,55 @@ class CandidaturesByOffreView(generics.ListAPIView):
         elif user.role != 'ADMIN':
             return Candidature.objects.none()
         
-        return Candidature.objects.filter(offre=offre).order_by('-date_candidature')
+        self.offre = offre
+        queryset = Candidature.objects.filter(offre=offre).select_related('stagiaire__user')
+        if self.request.query_params.get('order') == 'match':
+            return annotate_match_score(queryset, offre).order_by('-match_score', '-date_candidature')
+        return queryset.order_by('-date_candidature')
+    
+    def paginate_queryset(self, queryset):
+        page = super().paginate_queryset(queryset)
+        # Toutes les candidatures portent sur la même offre : une seule instance, places prises comptées une fois
+        for candidature in page or []:
+            candidature.offre = self.offre
+        return page
+
+
+class CandidaturesCVArchiveView(APIView):
+    """Vue pour télécharger en une archive ZIP les CV des candidats à une offre"""
+    permission_classes = [permissions.IsAuthenticated]
+    throttle_scope = 'cv_archive'
+    
+    def get(self, request, offre_id):
+        offre = get_object_or_404(OffreStage.objects.select_related('entreprise'), pk=offre_id)
+        
+        user = request.user
+        if not (user.role == 'ADMIN' or (user.role == 'ENTREPRISE' and offre.entreprise.user_id == user.id)):
+            return Response({'error': 'Permission refusée'}, status=status.HTTP_403_FORBIDDEN)
+        
+        candidatures = Candidature.objects.filter(offre=offre).exclude(
+            Q(stagiaire__cv_file='') | Q(stagiaire__cv_file__isnull=True)
+        )
+        statut = request.query_params.get('statut')
+        if statut:
+            candidatures = candidatures.filter(statut=statut)
+        
+        # Une seule requête, lue au fur et à mesure de l'écriture de l'archive
+        rows = candidatures.order_by('date_candidature').values_list(
+            'stagiaire_id', 'stagiaire__prenom', 'stagiaire__nom', 'stagiaire__cv_file'
+        ).iterator(chunk_size=500)
+        files = (
+            (default_storage.path(cv_file), f"CV_{slugify(f'{prenom} {nom}') or 'stagiaire'}_{stagiaire_id}.pdf")
+            for stagiaire_id, prenom, nom, cv_file in rows
+        )
+        
+        # Sous ASGI, archive produite morceau par morceau plutôt que mise en mémoire en entier,
+        # dans un thread réservé : le curseur de la requête reste sur la connexion qui l'a ouvert
+        response = StreamingHttpResponse(
+            streaming_content(request, stream_zip(files), dedicated_thread=True), content_type='application/zip'
+        )
+        response['Content-Disposition'] = f'attachment; filename="CV_{slugify(offre.titre) or offre.id}.zip"'
+        return response
 
 
 class MyCandidaturesView(generics.ListAPIView):
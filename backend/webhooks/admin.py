@@ -0,0 +1,18 @@
+from django.contrib import admin
+from .models import WebhookSubscription, WebhookEvent
+
+
+@admin.register(WebhookSubscription)
+class WebhookSubscriptionAdmin(admin.ModelAdmin):
+    list_display = ['entreprise', 'url', 'is_active', 'consecutive_failures', 'circuit_open_until', 'last_success_at']
+    list_filter = ['is_active']
+    search_fields = ['url', 'entreprise__nom_entreprise']
+    readonly_fields = ['secret', 'created_at', 'last_success_at']
+
+
+@admin.register(WebhookEvent)
+class WebhookEventAdmin(admin.ModelAdmin):
+    list_display = ['event', 'subscription', 'status', 'attempts', 'next_attempt_at', 'delivered_at']
+    list_filter = ['status', 'event']
+    search_fields = ['subscription__url', 'last_error']
+    readonly_fields = ['created_at', 'delivered_at', 'locked_by', 'locked_at']
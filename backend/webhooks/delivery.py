@@ -0,0 +1,235 @@
+"""
+Livraison des webhooks : réservation des événements par lots, signature,
+envoi concurrent, nouvelles tentatives et coupe-circuit
+"""
+import hashlib
+import hmac
+import http.client
+import json
+import logging
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from datetime import timedelta
+from itertools import groupby
+
+from django.conf import settings
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import connection
+from django.db.models import Exists, F, OuterRef, Q
+from django.utils import timezone
+
+from .http import ConnectionPool
+from .models import WebhookEvent, WebhookSubscription
+
+logger = logging.getLogger('webhooks')
+
+DEFAULTS = {
+    'BATCH_SIZE': 50,  # événements par requête
+    'CONCURRENCY': 8,  # abonnements servis en parallèle
+    'MAX_PER_HOST': 2,  # requêtes simultanées vers un même hôte
+    'TIMEOUT': 5,  # secondes
+    'MAX_ATTEMPTS': 8,
+    'BACKOFF_BASE': 10,
+    'BACKOFF_MAX': 3600,
+    'CIRCUIT_THRESHOLD': 5,  # échecs consécutifs avant de suspendre un abonnement
+    'CIRCUIT_COOLDOWN': 300,  # secondes de suspension
+    'LOCK_TIMEOUT': 120,
+    'ALLOWED_HOSTS': [],  # hôtes ou réseaux internes autorisés malgré le filtrage des adresses
+}
+
+_pool = None
+_pool_lock = threading.Lock()
+
+
+def get_setting(name):
+    """Lire un paramètre de settings.WEBHOOKS avec sa valeur par défaut"""
+    return getattr(settings, 'WEBHOOKS', {}).get(name, DEFAULTS[name])
+
+
+def get_pool():
+    """Pool de connexions partagé par les threads du processus"""
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            _pool = ConnectionPool(
+                max_per_host=get_setting('MAX_PER_HOST'),
+                timeout=get_setting('TIMEOUT'),
+                allowed_hosts=get_setting('ALLOWED_HOSTS'),
+            )
+        return _pool
+
+
+def sign(secret, timestamp, body):
+    """Signature HMAC-SHA256 de '<timestamp>.<corps>'"""
+    message = f"{timestamp}.".encode() + body
+    return hmac.new(secret.encode(), message, hashlib.sha256).hexdigest()
+
+
+def build_request(subscription, events):
+    """Corps JSON et en-têtes signés pour un lot d'événements"""
+    body = json.dumps({
+        'events': [
+            {
+                'id': event.id,
+                'event': event.event,
+                'created_at': event.created_at,
+                'data': event.payload,
+            }
+            for event in events
+        ]
+    }, cls=DjangoJSONEncoder).encode()
+    timestamp = str(int(time.time()))
+    headers = {
+        'Content-Type': 'application/json',
+        'User-Agent': 'PlateformeStages-Webhooks/1.0',
+        'X-Webhook-Timestamp': timestamp,
+        'X-Webhook-Signature': f"sha256={sign(subscription.secret, timestamp, body)}",
+    }
+    return body, headers
+
+
+def backoff_delay(attempts):
+    """Délai exponentiel avant la prochaine tentative, plafonné"""
+    delay = get_setting('BACKOFF_BASE') * (2 ** max(attempts - 1, 0))
+    return timedelta(seconds=min(delay, get_setting('BACKOFF_MAX')))
+
+
+def claim_events(subscription_id, limit):
+    """Réserver par un UPDATE conditionnel un lot d'événements prêts pour un abonnement"""
+    now = timezone.now()
+    token = uuid.uuid4().hex
+    ids = list(
+        WebhookEvent.objects.filter(
+            subscription_id=subscription_id, status='PENDING', next_attempt_at__lte=now
+        ).order_by('id').values_list('id', flat=True)[:limit]
+    )
+    if not ids:
+        return []
+    WebhookEvent.objects.filter(id__in=ids, status='PENDING').update(
+        status='SENDING',
+        locked_by=token,
+        locked_at=now,
+        attempts=F('attempts') + 1,
+    )
+    return list(WebhookEvent.objects.filter(locked_by=token, status='SENDING').order_by('id'))
+
+
+def requeue_stale_events():
+    """Remettre en attente les lots dont le worker a disparu pendant l'envoi"""
+    limit = timezone.now() - timedelta(seconds=get_setting('LOCK_TIMEOUT'))
+    return WebhookEvent.objects.filter(status='SENDING', locked_at__lt=limit).update(
+        status='PENDING',
+        locked_by='',
+        locked_at=None,
+    )
+
+
+def record_success(subscription, events):
+    now = timezone.now()
+    WebhookEvent.objects.filter(id__in=[event.id for event in events]).update(
+        status='DELIVERED',
+        delivered_at=now,
+        locked_by='',
+        last_error='',
+    )
+    WebhookSubscription.objects.filter(id=subscription.id).update(
+        consecutive_failures=0,
+        circuit_open_until=None,
+        last_success_at=now,
+    )
+
+
+def record_failure(subscription, events, error):
+    """Planifier une nouvelle tentative (ou abandonner) et ouvrir le circuit si besoin"""
+    now = timezone.now()
+    max_attempts = get_setting('MAX_ATTEMPTS')
+    for attempts, group in groupby(sorted(events, key=lambda event: event.attempts), key=lambda event: event.attempts):
+        ids = [event.id for event in group]
+        if attempts >= max_attempts:
+            WebhookEvent.objects.filter(id__in=ids).update(status='FAILED', locked_by='', last_error=error)
+        else:
+            WebhookEvent.objects.filter(id__in=ids).update(
+                status='PENDING',
+                locked_by='',
+                locked_at=None,
+                next_attempt_at=now + backoff_delay(attempts),
+                last_error=error,
+            )
+
+    WebhookSubscription.objects.filter(id=subscription.id).update(
+        consecutive_failures=F('consecutive_failures') + 1
+    )
+    failures = WebhookSubscription.objects.values_list('consecutive_failures', flat=True).get(id=subscription.id)
+    if failures >= get_setting('CIRCUIT_THRESHOLD'):
+        cooldown = timedelta(seconds=get_setting('CIRCUIT_COOLDOWN'))
+        WebhookSubscription.objects.filter(id=subscription.id).update(circuit_open_until=now + cooldown)
+        logger.warning("Webhook %s suspendu après %s échecs : %s", subscription.url, failures, error)
+
+
+def deliver_subscription(subscription_id, pool=None):
+    """
+    Envoyer les événements en attente d'un abonnement, lot par lot, jusqu'à
+    épuisement ou au premier échec. Retourne (livrés, en échec).
+    """
+    pool = pool or get_pool()
+    subscription = WebhookSubscription.objects.get(id=subscription_id)
+    delivered = failed = 0
+    while True:
+        events = claim_events(subscription.id, get_setting('BATCH_SIZE'))
+        if not events:
+            break
+        body, headers = build_request(subscription, events)
+        try:
+            status_code = pool.post(subscription.url, body, headers)
+            error = '' if 200 <= status_code < 300 else f"HTTP {status_code}"
+        except (OSError, http.client.HTTPException) as exc:
+            error = f"{type(exc).__name__}: {exc}"
+        if error:
+            record_failure(subscription, events, error)
+            failed += len(events)
+            break
+        record_success(subscription, events)
+        delivered += len(events)
+    return delivered, failed
+
+
+def _deliver_in_thread(subscription_id):
+    try:
+        return deliver_subscription(subscription_id)
+    except Exception:
+        logger.exception("Échec de la livraison des webhooks de l'abonnement %s", subscription_id)
+        return 0, 0
+    finally:
+        connection.close()
+
+
+def deliver_pending():
+    """Livrer les événements prêts de tous les abonnements actifs dont le circuit est fermé"""
+    start = time.monotonic()
+    requeue_stale_events()
+    now = timezone.now()
+    due = WebhookEvent.objects.filter(
+        subscription=OuterRef('pk'), status='PENDING', next_attempt_at__lte=now
+    )
+    subscription_ids = list(
+        WebhookSubscription.objects.filter(is_active=True)
+        .filter(Q(circuit_open_until__isnull=True) | Q(circuit_open_until__lte=now))
+        .filter(Exists(due))
+        .values_list('id', flat=True)
+    )
+    delivered = failed = 0
+    if subscription_ids:
+        with ThreadPoolExecutor(max_workers=get_setting('CONCURRENCY')) as executor:
+            for ok, ko in executor.map(_deliver_in_thread, subscription_ids):
+                delivered += ok
+                failed += ko
+    stats = {
+        'subscriptions': len(subscription_ids),
+        'delivered': delivered,
+        'failed': failed,
+        'duration_seconds': round(time.monotonic() - start, 3),
+    }
+    logger.info("Livraison des webhooks : %s", stats)
+    return stats
@@ -0,0 +1,141 @@
+"""
+Pool de connexions HTTP persistantes (bibliothèque standard) pour l'envoi des webhooks
+"""
+import http.client
+import ipaddress
+import socket
+import threading
+from urllib.parse import urlsplit
+
+
+class UnsafeDestination(OSError):
+    """Hôte résolu vers une adresse non publique (boucle locale, réseau privé, lien local, réservée)"""
+
+
+def is_allowed(host, allowed_hosts):
+    """Indique si un hôte ou une adresse figure dans les exceptions (noms d'hôte ou réseaux CIDR)"""
+    for allowed in allowed_hosts:
+        if host.lower() == allowed.lower():
+            return True
+        try:
+            if ipaddress.ip_address(host) in ipaddress.ip_network(allowed, strict=False):
+                return True
+        except ValueError:
+            continue
+    return False
+
+
+def resolve_destination(host, port, allowed_hosts=()):
+    """
+    Résoudre l'hôte et retourner l'adresse IP à laquelle se connecter.
+    Toutes les adresses résolues doivent être publiques : une seule adresse
+    interne suffit à refuser l'hôte (UnsafeDestination), sauf exception
+    déclarée dans allowed_hosts. Lève socket.gaierror si l'hôte est introuvable.
+    """
+    addresses = [info[4][0] for info in socket.getaddrinfo(host, port, type=socket.SOCK_STREAM)]
+    if not is_allowed(host, allowed_hosts):
+        for address in addresses:
+            ip = ipaddress.ip_address(address)
+            if (not ip.is_global or ip.is_multicast) and not is_allowed(address, allowed_hosts):
+                raise UnsafeDestination(f"Adresse non publique pour {host} : {address}")
+    return addresses[0]
+
+
+class _PinnedAddressMixin:
+    """
+    Connexion ouverte vers l'adresse déjà vérifiée plutôt que vers le nom
+    d'hôte : une nouvelle résolution DNS (rebinding) ne peut pas détourner
+    la requête. L'en-tête Host et le SNI/certificat TLS gardent le nom d'hôte.
+    """
+
+    def __init__(self, host, port, address, **kwargs):
+        super().__init__(host, port, **kwargs)
+        self._address = address
+        self._create_connection = self._connect_address
+
+    def _connect_address(self, address, *args, **kwargs):
+        return socket.create_connection((self._address, address[1]), *args, **kwargs)
+
+
+class PinnedHTTPConnection(_PinnedAddressMixin, http.client.HTTPConnection):
+    pass
+
+
+class PinnedHTTPSConnection(_PinnedAddressMixin, http.client.HTTPSConnection):
+    pass
+
+
+class ConnectionPool:
+    """
+    Réutilise les connexions keep-alive par hôte et limite le nombre de
+    requêtes simultanées vers un même hôte. Utilisable depuis plusieurs threads.
+    L'hôte est résolu et vérifié (resolve_destination) à chaque nouvelle connexion.
+    """
+
+    def __init__(self, max_per_host=2, timeout=5, allowed_hosts=()):
+        self.max_per_host = max_per_host
+        self.timeout = timeout
+        self.allowed_hosts = tuple(allowed_hosts)
+        self._lock = threading.Lock()
+        self._idle = {}
+        self._slots = {}
+
+    def _slot(self, key):
+        with self._lock:
+            if key not in self._slots:
+                self._slots[key] = threading.BoundedSemaphore(self.max_per_host)
+            return self._slots[key]
+
+    def _acquire(self, key):
+        with self._lock:
+            idle = self._idle.get(key)
+            if idle:
+                return idle.pop(), True
+        scheme, host, port = key
+        address = resolve_destination(host, port, self.allowed_hosts)
+        connection_class = PinnedHTTPSConnection if scheme == 'https' else PinnedHTTPConnection
+        return connection_class(host, port, address, timeout=self.timeout), False
+
+    def _release(self, key, connection):
+        with self._lock:
+            self._idle.setdefault(key, []).append(connection)
+
+    def post(self, url, body, headers):
+        """Envoyer une requête POST et retourner le code HTTP de la réponse"""
+        parts = urlsplit(url)
+        scheme = parts.scheme.lower()
+        port = parts.port or (443 if scheme == 'https' else 80)
+        key = (scheme, parts.hostname, port)
+        path = parts.path or '/'
+        if parts.query:
+            path = f"{path}?{parts.query}"
+
+        with self._slot(key):
+            while True:
+                connection, reused = self._acquire(key)
+                try:
+                    connection.request('POST', path, body=body, headers=headers)
+                    response = connection.getresponse()
+                    response.read()
+                except (http.client.RemoteDisconnected, ConnectionResetError, BrokenPipeError):
+                    connection.close()
+                    # Connexion keep-alive fermée par le serveur entre deux requêtes : en ouvrir une neuve
+                    if reused:
+                        continue
+                    raise
+                except Exception:
+                    connection.close()
+                    raise
+                if response.will_close:
+                    connection.close()
+                else:
+                    self._release(key, connection)
+                return response.status
+
+    def close(self):
+        """Fermer toutes les connexions inactives"""
+        with self._lock:
+            idle, self._idle = self._idle, {}
+        for connections in idle.values():
+            for connection in connections:
+                connection.close()
@@ -0,0 +1,61 @@
+# Generated by Django 4.2.7 on 2026-10-19 19:00
+
+from django.db import migrations, models
+import django.db.models.deletion
+import django.utils.timezone
+import webhooks.models
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+        ('accounts', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='WebhookSubscription',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('url', models.URLField(max_length=500, verbose_name='URL de réception')),
+                ('secret', models.CharField(default=webhooks.models.generate_secret, max_length=64, verbose_name='Secret de signature')),
+                ('events', models.JSONField(blank=True, default=list, help_text='Liste des événements transmis (vide : tous les événements)', verbose_name='Événements')),
+                ('is_active', models.BooleanField(default=True, verbose_name='Actif')),
+                ('consecutive_failures', models.PositiveIntegerField(default=0, verbose_name='Échecs consécutifs')),
+                ('circuit_open_until', models.DateTimeField(blank=True, null=True, verbose_name="Envois suspendus jusqu'à")),
+                ('last_success_at', models.DateTimeField(blank=True, null=True, verbose_name='Dernier envoi réussi')),
+                ('created_at', models.DateTimeField(auto_now_add=True, verbose_name='Date de création')),
+                ('entreprise', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='webhooks', to='accounts.entreprise', verbose_name='Entreprise')),
+            ],
+            options={
+                'verbose_name': 'Abonnement webhook',
+                'verbose_name_plural': 'Abonnements webhook',
+                'ordering': ['-created_at'],
+            },
+        ),
+        migrations.CreateModel(
+            name='WebhookEvent',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('event', models.CharField(choices=[('candidature.created', 'Nouvelle candidature'), ('candidature.statut_changed', "Changement de statut d'une candidature")], max_length=50, verbose_name='Événement')),
+                ('payload', models.JSONField(default=dict, verbose_name='Données')),
+                ('status', models.CharField(choices=[('PENDING', 'En attente'), ('SENDING', "En cours d'envoi"), ('DELIVERED', 'Livré'), ('FAILED', 'Abandonné')], default='PENDING', max_length=20, verbose_name='Statut')),
+                ('attempts', models.PositiveIntegerField(default=0, verbose_name='Tentatives')),
+                ('next_attempt_at', models.DateTimeField(default=django.utils.timezone.now, verbose_name='Prochaine tentative')),
+                ('locked_by', models.CharField(blank=True, max_length=32, verbose_name="Lot d'envoi")),
+                ('locked_at', models.DateTimeField(blank=True, null=True)),
+                ('delivered_at', models.DateTimeField(blank=True, null=True, verbose_name='Date de livraison')),
+                ('last_error', models.TextField(blank=True, verbose_name='Dernière erreur')),
+                ('created_at', models.DateTimeField(auto_now_add=True, verbose_name='Date de création')),
+                ('subscription', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='deliveries', to='webhooks.webhooksubscription', verbose_name='Abonnement')),
+            ],
+            options={
+                'verbose_name': 'Événement webhook',
+                'verbose_name_plural': 'Événements webhook',
+                'ordering': ['-created_at'],
+                'indexes': [models.Index(fields=['subscription', 'status', 'next_attempt_at'], name='webhook_event_due_idx')],
+            },
+        ),
+    ]
@@ -0,0 +1,107 @@
+"""
+Modèles pour les webhooks sortants des entreprises
+"""
+import secrets
+
+from django.db import models
+from django.utils import timezone
+
+from accounts.models import Entreprise
+
+
+def generate_secret():
+    """Secret partagé servant à signer les requêtes (HMAC-SHA256)"""
+    return secrets.token_hex(32)
+
+
+class WebhookSubscription(models.Model):
+    """Abonnement d'une entreprise : URL appelée lors des événements sur ses candidatures"""
+    
+    EVENT_CHOICES = [
+        ('candidature.created', 'Nouvelle candidature'),
+        ('candidature.statut_changed', 'Changement de statut d\'une candidature'),
+    ]
+    
+    entreprise = models.ForeignKey(
+        Entreprise,
+        on_delete=models.CASCADE,
+        related_name='webhooks',
+        verbose_name="Entreprise"
+    )
+    url = models.URLField(max_length=500, verbose_name="URL de réception")
+    secret = models.CharField(max_length=64, default=generate_secret, verbose_name="Secret de signature")
+    events = models.JSONField(
+        default=list,
+        blank=True,
+        verbose_name="Événements",
+        help_text="Liste des événements transmis (vide : tous les événements)"
+    )
+    is_active = models.BooleanField(default=True, verbose_name="Actif")
+    consecutive_failures = models.PositiveIntegerField(default=0, verbose_name="Échecs consécutifs")
+    circuit_open_until = models.DateTimeField(
+        null=True,
+        blank=True,
+        verbose_name="Envois suspendus jusqu'à"
+    )
+    last_success_at = models.DateTimeField(null=True, blank=True, verbose_name="Dernier envoi réussi")
+    created_at = models.DateTimeField(auto_now_add=True, verbose_name="Date de création")
+    
+    class Meta:
+        verbose_name = "Abonnement webhook"
+        verbose_name_plural = "Abonnements webhook"
+        ordering = ['-created_at']
+    
+    def __str__(self):
+        return f"{self.entreprise.nom_entreprise} - {self.url}"
+    
+    def accepts(self, event):
+        """Indique si l'abonnement reçoit ce type d'événement"""
+        return not self.events or event in self.events
+
+
+class WebhookEvent(models.Model):
+    """Événement à transmettre à un abonnement ; plusieurs événements partent dans une même requête"""
+    
+    STATUS_CHOICES = [
+        ('PENDING', 'En attente'),
+        ('SENDING', 'En cours d\'envoi'),
+        ('DELIVERED', 'Livré'),
+        ('FAILED', 'Abandonné'),
+    ]
+    
+    subscription = models.ForeignKey(
+        WebhookSubscription,
+        on_delete=models.CASCADE,
+        related_name='deliveries',
+        verbose_name="Abonnement"
+    )
+    event = models.CharField(
+        max_length=50,
+        choices=WebhookSubscription.EVENT_CHOICES,
+        verbose_name="Événement"
+    )
+    payload = models.JSONField(default=dict, verbose_name="Données")
+    status = models.CharField(
+        max_length=20,
+        choices=STATUS_CHOICES,
+        default='PENDING',
+        verbose_name="Statut"
+    )
+    attempts = models.PositiveIntegerField(default=0, verbose_name="Tentatives")
+    next_attempt_at = models.DateTimeField(default=timezone.now, verbose_name="Prochaine tentative")
+    locked_by = models.CharField(max_length=32, blank=True, verbose_name="Lot d'envoi")
+    locked_at = models.DateTimeField(null=True, blank=True)
+    delivered_at = models.DateTimeField(null=True, blank=True, verbose_name="Date de livraison")
+    last_error = models.TextField(blank=True, verbose_name="Dernière erreur")
+    created_at = models.DateTimeField(auto_now_add=True, verbose_name="Date de création")
+    
+    class Meta:
+        verbose_name = "Événement webhook"
+        verbose_name_plural = "Événements webhook"
+        ordering = ['-created_at']
+        indexes = [
+            models.Index(fields=['subscription', 'status', 'next_attempt_at'], name='webhook_event_due_idx'),
+        ]
+    
+    def __str__(self):
+        return f"{self.event} #{self.id} ({self.get_status_display()})"
@@ -0,0 +1,62 @@
+"""
+Serializers pour les webhooks
+"""
+from urllib.parse import urlsplit
+
+from rest_framework import serializers
+from .delivery import get_setting
+from .http import UnsafeDestination, resolve_destination
+from .models import WebhookSubscription, WebhookEvent
+
+
+class WebhookSubscriptionSerializer(serializers.ModelSerializer):
+    """Serializer pour les abonnements webhook d'une entreprise"""
+    events = serializers.ListField(
+        child=serializers.ChoiceField(choices=WebhookSubscription.EVENT_CHOICES),
+        required=False
+    )
+    
+    class Meta:
+        model = WebhookSubscription
+        fields = [
+            'id', 'url', 'events', 'is_active', 'secret', 'consecutive_failures',
+            'circuit_open_until', 'last_success_at', 'created_at'
+        ]
+        read_only_fields = ['id', 'secret', 'consecutive_failures', 'circuit_open_until',
+                            'last_success_at', 'created_at']
+    
+    def validate_url(self, value):
+        parts = urlsplit(value)
+        if parts.scheme not in ('http', 'https'):
+            raise serializers.ValidationError("L'URL doit utiliser http ou https")
+        try:
+            port = parts.port or (443 if parts.scheme == 'https' else 80)
+        except ValueError:
+            raise serializers.ValidationError("Port invalide")
+        # Adresse vérifiée de nouveau à chaque connexion lors de la livraison
+        try:
+            resolve_destination(parts.hostname, port, get_setting('ALLOWED_HOSTS'))
+        except UnsafeDestination:
+            raise serializers.ValidationError("L'URL doit désigner une adresse publique")
+        except (OSError, UnicodeError):
+            raise serializers.ValidationError("Hôte introuvable")
+        return value
+    
+    def update(self, instance, validated_data):
+        # Nouvelle URL ou réactivation : repartir avec un circuit fermé
+        if 'url' in validated_data or validated_data.get('is_active'):
+            instance.consecutive_failures = 0
+            instance.circuit_open_until = None
+        return super().update(instance, validated_data)
+
+
+class WebhookEventSerializer(serializers.ModelSerializer):
+    """Serializer pour l'historique des envois"""
+    
+    class Meta:
+        model = WebhookEvent
+        fields = [
+            'id', 'event', 'payload', 'status', 'attempts', 'next_attempt_at',
+            'delivered_at', 'last_error', 'created_at'
+        ]
+        read_only_fields = fields
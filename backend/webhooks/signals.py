@@ -0,0 +1,22 @@
+"""
+Signaux pour mettre en file les événements webhook des candidatures
+"""
+from django.db.models.signals import post_save
+from django.dispatch import receiver
+from jobs.queue import enqueue
+from .models import WebhookSubscription
+from stages.models import Candidature
+
+
+@receiver(post_save, sender=Candidature)
+def enqueue_candidature_event(sender, instance, created, **kwargs):
+    """Mettre en file un événement si l'entreprise de l'offre a un webhook actif"""
+    if created:
+        event, extra = 'candidature.created', {}
+    elif instance.has_changed('statut'):
+        event, extra = 'candidature.statut_changed', {'ancien_statut': instance.previous_value('statut')}
+    else:
+        return
+    # Une seule requête, sans charger l'offre ni l'entreprise
+    if WebhookSubscription.objects.filter(is_active=True, entreprise__offres__id=instance.offre_id).exists():
+        enqueue('webhooks.candidature_event', candidature_id=instance.id, event=event, statut=instance.statut, **extra)
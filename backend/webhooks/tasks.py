@@ -0,0 +1,64 @@
+"""
+Tâches en arrière-plan pour les webhooks
+"""
+from jobs.queue import enqueue, job
+from .delivery import deliver_pending
+from .models import WebhookEvent, WebhookSubscription
+from stages.models import Candidature
+
+
+def candidature_payload(candidature):
+    """Données transmises pour une candidature"""
+    return {
+        'candidature_id': candidature.id,
+        'statut': candidature.statut,
+        'date_candidature': candidature.date_candidature.isoformat(),
+        'offre': {
+            'id': candidature.offre.id,
+            'titre': candidature.offre.titre,
+        },
+        'stagiaire': {
+            'id': candidature.stagiaire.id,
+            'nom': candidature.stagiaire.nom,
+            'prenom': candidature.stagiaire.prenom,
+            'email': candidature.stagiaire.user.email,
+            'niveau_etude': candidature.stagiaire.niveau_etude,
+            'domaine': candidature.stagiaire.domaine,
+        },
+    }
+
+
+@job('webhooks.candidature_event')
+def enregistrer_evenement_candidature(candidature_id, event, statut, ancien_statut=None):
+    """Créer un événement par abonnement concerné puis déclencher la livraison"""
+    candidature = Candidature.objects.select_related(
+        'offre', 'stagiaire__user'
+    ).filter(id=candidature_id).first()
+    if candidature is None:
+        return
+    subscriptions = [
+        subscription
+        for subscription in WebhookSubscription.objects.filter(
+            is_active=True, entreprise_id=candidature.offre.entreprise_id
+        )
+        if subscription.accepts(event)
+    ]
+    if not subscriptions:
+        return
+    
+    payload = candidature_payload(candidature)
+    # Statut au moment de l'événement, pas au moment de l'exécution de la tâche
+    payload['statut'] = statut
+    if ancien_statut is not None:
+        payload['ancien_statut'] = ancien_statut
+    WebhookEvent.objects.bulk_create([
+        WebhookEvent(subscription=subscription, event=event, payload=payload)
+        for subscription in subscriptions
+    ])
+    enqueue('webhooks.deliver')
+
+
+@job('webhooks.deliver', max_attempts=1)
+def livrer_webhooks():
+    """Livrer les événements en attente (les nouvelles tentatives sont gérées par événement)"""
+    deliver_pending()
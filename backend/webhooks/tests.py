@@ -0,0 +1,73 @@
+"""
+Tests des webhooks
+"""
+import threading
+from http.server import BaseHTTPRequestHandler, HTTPServer
+
+from django.test import TestCase
+
+from accounts.models import Entreprise, User
+from .delivery import deliver_subscription
+from .http import ConnectionPool
+from .models import WebhookEvent, WebhookSubscription
+from .serializers import WebhookSubscriptionSerializer
+
+
+class Receiver(BaseHTTPRequestHandler):
+    def do_POST(self):
+        self.rfile.read(int(self.headers['Content-Length']))
+        self.send_response(204)
+        self.end_headers()
+
+    def log_message(self, *args):
+        pass
+
+
+class DestinationTests(TestCase):
+    def setUp(self):
+        user = User.objects.create_user(email='e@exemple.fr', role='ENTREPRISE')
+        self.entreprise = Entreprise.objects.create(
+            user=user, nom_entreprise='e', secteur_activite='Informatique', telephone='0600000000',
+            adresse='1 rue', ville='Lyon', contact_nom='Nom', contact_prenom='Prénom'
+        )
+
+    def valider(self, url):
+        serializer = WebhookSubscriptionSerializer(data={'url': url})
+        return serializer.is_valid(), serializer.errors.get('url')
+
+    def test_adresses_internes_refusees(self):
+        for url in (
+            'http://127.0.0.1/hook', 'http://localhost:8000/hook', 'http://169.254.169.254/latest/meta-data/',
+            'http://10.0.0.1/hook', 'https://192.168.1.10/hook', 'http://[::1]/hook', 'http://0.0.0.0/hook',
+        ):
+            valid, errors = self.valider(url)
+            self.assertFalse(valid, url)
+            self.assertEqual(errors, ["L'URL doit désigner une adresse publique"])
+
+    def test_adresse_publique_et_exceptions_acceptees(self):
+        self.assertTrue(self.valider('https://93.184.216.34/hook')[0])
+        with self.settings(WEBHOOKS={'ALLOWED_HOSTS': ['127.0.0.1', '10.0.0.0/8']}):
+            self.assertTrue(self.valider('http://127.0.0.1:8000/hook')[0])
+            self.assertTrue(self.valider('http://10.1.2.3/hook')[0])
+            self.assertFalse(self.valider('http://192.168.1.10/hook')[0])
+
+    def test_adresse_verifiee_a_la_livraison(self):
+        server = HTTPServer(('127.0.0.1', 0), Receiver)
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        self.addCleanup(server.server_close)
+        self.addCleanup(server.shutdown)
+        # Abonnement enregistré avant la vérification, ou hôte qui résout désormais vers une adresse interne
+        subscription = WebhookSubscription.objects.create(
+            entreprise=self.entreprise, url=f'http://localhost:{server.server_port}/hook'
+        )
+        WebhookEvent.objects.create(subscription=subscription, event='candidature.created', payload={})
+
+        self.assertEqual(deliver_subscription(subscription.id, pool=ConnectionPool()), (0, 1))
+        event = WebhookEvent.objects.get()
+        self.assertIn('UnsafeDestination', event.last_error)
+
+        event.next_attempt_at = event.created_at
+        event.save()
+        pool = ConnectionPool(allowed_hosts=['localhost'])
+        self.addCleanup(pool.close)
+        self.assertEqual(deliver_subscription(subscription.id, pool=pool), (1, 0))
@@ -0,0 +1,15 @@
+"""
+URLs pour les webhooks
+"""
+from django.urls import path
+from .views import (
+    WebhookSubscriptionListCreateView,
+    WebhookSubscriptionDetailView,
+    WebhookEventListView
+)
+
+urlpatterns = [
+    path('', WebhookSubscriptionListCreateView.as_view(), name='webhook-list-create'),
+    path('<int:pk>/', WebhookSubscriptionDetailView.as_view(), name='webhook-detail'),
+    path('<int:pk>/deliveries/', WebhookEventListView.as_view(), name='webhook-deliveries'),
+]
@@ -0,0 +1,52 @@
+"""
+Vues pour la gestion des webhooks des entreprises
+"""
+from rest_framework import generics, permissions
+from rest_framework.exceptions import PermissionDenied
+from django.shortcuts import get_object_or_404
+
+from .models import WebhookSubscription
+from .serializers import WebhookSubscriptionSerializer, WebhookEventSerializer
+
+
+class EntrepriseWebhookMixin:
+    """Restreindre l'accès aux abonnements de l'entreprise connectée"""
+    permission_classes = [permissions.IsAuthenticated]
+    
+    def get_entreprise(self):
+        if self.request.user.role != 'ENTREPRISE':
+            raise PermissionDenied("Seules les entreprises peuvent gérer des webhooks")
+        try:
+            return self.request.user.entreprise_profile
+        except AttributeError:
+            raise PermissionDenied("Profil entreprise non trouvé")
+
+
+class WebhookSubscriptionListCreateView(EntrepriseWebhookMixin, generics.ListCreateAPIView):
+    """Vue pour lister et créer les webhooks de l'entreprise connectée"""
+    serializer_class = WebhookSubscriptionSerializer
+    
+    def get_queryset(self):
+        return WebhookSubscription.objects.filter(entreprise=self.get_entreprise())
+    
+    def perform_create(self, serializer):
+        serializer.save(entreprise=self.get_entreprise())
+
+
+class WebhookSubscriptionDetailView(EntrepriseWebhookMixin, generics.RetrieveUpdateDestroyAPIView):
+    """Vue pour récupérer, modifier et supprimer un webhook"""
+    serializer_class = WebhookSubscriptionSerializer
+    
+    def get_queryset(self):
+        return WebhookSubscription.objects.filter(entreprise=self.get_entreprise())
+
+
+class WebhookEventListView(EntrepriseWebhookMixin, generics.ListAPIView):
+    """Vue pour consulter l'historique des envois d'un webhook"""
+    serializer_class = WebhookEventSerializer
+    
+    def get_queryset(self):
+        subscription = get_object_or_404(
+            WebhookSubscription, pk=self.kwargs['pk'], entreprise=self.get_entreprise()
+        )
+        return subscription.deliveries.order_by('-id')
@@ -27,15 +27,98 @@ const NotificationBell = () => {
 
   useEffect(() => {
     isMountedRef.current = true;
-    fetchUnreadCount();
-    const interval = setInterval(() => {
-      if (isMountedRef.current) {
-        fetchUnreadCount();
+    const token = localStorage.getItem('access_token');
+    let source = null;
+    let interval = null;
+    let retryTimer = null;
+    let retryDelay = 1000;
+    let lastEventId = null;
+
+    const startPolling = () => {
+      if (!isMountedRef.current) {
+        return;
+      }
+      fetchUnreadCount();
+      interval = setInterval(() => {
+        if (isMountedRef.current) {
+          fetchUnreadCount();
+        }
+      }, 30000); // Rafraîchir toutes les 30 secondes si SSE n'est pas disponible
+    };
+
+    const scheduleReconnect = () => {
+      if (!isMountedRef.current) {
+        return;
+      }
+      // Compteur tenu à jour pendant la coupure, puis nouvelle tentative avec un délai croissant
+      fetchUnreadCount();
+      retryTimer = setTimeout(connect, retryDelay);
+      retryDelay = Math.min(retryDelay * 2, 60000);
+    };
+
+    const connect = async () => {
+      // Ticket de courte durée : le jeton d'accès n'apparaît pas dans l'URL
+      let ticket;
+      try {
+        const response = await notificationAPI.getStreamTicket();
+        ticket = response.data.ticket;
+      } catch (err) {
+        if (err.response && err.response.status === 503) {
+          // Serveur sans flux SSE (WSGI, runserver) : lecture périodique du compteur
+          startPolling();
+        } else {
+          scheduleReconnect();
+        }
+        return;
+      }
+      if (!isMountedRef.current) {
+        return;
       }
-    }, 30000); // Rafraîchir toutes les 30 secondes
+      source = new EventSource(notificationAPI.getStreamUrl(ticket, lastEventId));
+      source.onopen = () => {
+        retryDelay = 1000;
+      };
+      source.onerror = () => {
+        // Coupure réseau : le navigateur se reconnecte seul. Reconnexion refusée (ticket expiré
+        // à la fin d'un flux) : le navigateur abandonne, on redemande un ticket.
+        if (source && source.readyState === EventSource.CLOSED) {
+          source.close();
+          source = null;
+          scheduleReconnect();
+        }
+      };
+      source.addEventListener('unread_count', (event) => {
+        if (isMountedRef.current) {
+          setUnreadCount(JSON.parse(event.data).unread_count || 0);
+        }
+      });
+      source.addEventListener('notification', (event) => {
+        const notification = JSON.parse(event.data);
+        lastEventId = event.lastEventId || lastEventId;
+        if (isMountedRef.current) {
+          // Une notification regroupée est renvoyée avec ses nouvelles occurrences : la remplacer
+          setNotifications(prev => [notification, ...prev.filter(n => n.id !== notification.id)]);
+        }
+      });
+    };
+
+    if (window.EventSource && token) {
+      // Flux SSE : le serveur pousse les notifications créées ou regroupées et le compteur de non lues
+      connect();
+    } else {
+      startPolling();
+    }
     return () => {
       isMountedRef.current = false;
-      clearInterval(interval);
+      if (source) {
+        source.close();
+      }
+      if (retryTimer) {
+        clearTimeout(retryTimer);
+      }
+      if (interval) {
+        clearInterval(interval);
+      }
     };
   }, []);
 
@@ -56,13 +139,26 @@ const NotificationBell = () => {
   };
 
   const fetchNotifications = async () => {
+    // Si des notifications sont déjà chargées, ne récupérer que celles créées ou regroupées depuis
+    const since = notifications.reduce(
+      (latest, n) => (!latest || n.updated_at > latest ? n.updated_at : latest),
+      null
+    );
     try {
-      setLoading(true);
-      const response = await notificationAPI.getNotifications({ is_read: 'false' });
-      setNotifications(response.data.results || response.data || []);
+      if (!since) {
+        setLoading(true);
+      }
+      const params = since ? { is_read: 'false', since } : { is_read: 'false' };
+      const response = await notificationAPI.getNotifications(params);
+      const results = response.data.results || response.data || [];
+      // Une notification regroupée revient avec ses nouvelles occurrences : elle remplace l'ancienne version
+      const ids = new Set(results.map(n => n.id));
+      setNotifications(prev => (since ? [...results, ...prev.filter(n => !ids.has(n.id))] : results));
     } catch (err) {
       console.error('Erreur lors du chargement des notifications:', err);
-      setNotifications([]);
+      if (!since) {
+        setNotifications([]);
+      }
     } finally {
       setLoading(false);
     }
@@ -227,7 +323,7 @@ const NotificationBell = () => {
                       }
                       secondary={
                         <Typography variant="caption" color="text.secondary">
-                          {new Date(notification.created_at).toLocaleString('fr-FR')}
+                          {new Date(notification.updated_at).toLocaleString('fr-FR')}
                         </Typography>
                       }
                     />
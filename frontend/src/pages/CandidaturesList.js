@@ -16,6 +16,8 @@ import {
   CircularProgress,
   Alert,
   IconButton,
+  ToggleButton,
+  ToggleButtonGroup,
 } from '@mui/material';
 import { Download, CheckCircle, Cancel, ArrowBack } from '@mui/icons-material';
 import { candidatureAPI } from '../services/api';
@@ -28,15 +30,19 @@ const CandidaturesList = () => {
   const [candidatures, setCandidatures] = useState([]);
   const [loading, setLoading] = useState(true);
   const [error, setError] = useState('');
+  const [order, setOrder] = useState('date');
 
   useEffect(() => {
     fetchCandidatures();
-  }, [id]);
+  }, [id, order]);
 
   const fetchCandidatures = async () => {
     try {
       setLoading(true);
-      const candidaturesResponse = await candidatureAPI.getCandidaturesByOffre(id);
+      const candidaturesResponse = await candidatureAPI.getCandidaturesByOffre(
+        id,
+        order === 'match' ? { order: 'match' } : {}
+      );
       setCandidatures(candidaturesResponse.data.results || candidaturesResponse.data || []);
     } catch (err) {
       setError('Erreur lors du chargement des candidatures');
@@ -64,6 +70,22 @@ const CandidaturesList = () => {
     }
   };
 
+  const handleDownloadArchive = async () => {
+    try {
+      const response = await candidatureAPI.downloadCVArchive(id);
+      const url = window.URL.createObjectURL(new Blob([response.data], { type: 'application/zip' }));
+      const link = document.createElement('a');
+      link.href = url;
+      link.download = `CV_offre_${id}.zip`;
+      document.body.appendChild(link);
+      link.click();
+      link.remove();
+      window.URL.revokeObjectURL(url);
+    } catch (err) {
+      alert('Erreur lors du téléchargement des CV');
+    }
+  };
+
   const getStatusColor = (status) => {
     switch (status) {
       case 'ACCEPTEE':
@@ -93,9 +115,16 @@ const CandidaturesList = () => {
         Retour
       </Button>
 
-      <Typography variant="h4" component="h1" gutterBottom>
-        Candidatures pour l'offre
-      </Typography>
+      <Box display="flex" justifyContent="space-between" alignItems="center" mb={2}>
+        <Typography variant="h4" component="h1">
+          Candidatures pour l'offre
+        </Typography>
+        {candidatures.some((candidature) => candidature.stagiaire?.cv_file) && (
+          <Button variant="outlined" startIcon={<Download />} onClick={handleDownloadArchive}>
+            Télécharger tous les CV
+          </Button>
+        )}
+      </Box>
 
       {error && (
         <Alert severity="error" sx={{ mb: 2 }}>
@@ -104,6 +133,16 @@ const CandidaturesList = () => {
       )}
 
       <Paper elevation={3} sx={{ p: 3 }}>
+        <ToggleButtonGroup
+          value={order}
+          exclusive
+          size="small"
+          onChange={(event, value) => value && setOrder(value)}
+          sx={{ mb: 2 }}
+        >
+          <ToggleButton value="date">Plus récentes</ToggleButton>
+          <ToggleButton value="match">Meilleure adéquation</ToggleButton>
+        </ToggleButtonGroup>
         {candidatures.length === 0 ? (
           <Alert severity="info">Aucune candidature pour cette offre.</Alert>
         ) : (
@@ -125,6 +164,11 @@ const CandidaturesList = () => {
                       <Typography variant="body2" fontWeight="bold">
                         {candidature.stagiaire?.prenom} {candidature.stagiaire?.nom}
                       </Typography>
+                      {candidature.match_score != null && (
+                        <Typography variant="caption" color="text.secondary">
+                          Score d'adéquation : {candidature.match_score}
+                        </Typography>
+                      )}
                     </TableCell>
                     <TableCell>{candidature.stagiaire?.user?.email || 'N/A'}</TableCell>
                     <TableCell>
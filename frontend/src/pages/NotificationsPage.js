@@ -317,7 +317,7 @@ const NotificationsPage = () => {
                         {notification.message}
                       </Typography>
                       <Typography variant="caption" color="text.secondary" sx={{ mt: 0.5, display: 'block' }}>
-                        {new Date(notification.created_at).toLocaleString('fr-FR', {
+                        {new Date(notification.updated_at).toLocaleString('fr-FR', {
                           day: 'numeric',
                           month: 'long',
                           year: 'numeric',
@@ -37,10 +37,12 @@ const OffreDetail = () => {
   const [hasApplied, setHasApplied] = useState(false);
   const [dialogOpen, setDialogOpen] = useState(false);
   const [applying, setApplying] = useState(false);
+  const [similarOffres, setSimilarOffres] = useState([]);
 
   useEffect(() => {
     fetchOffre();
     checkApplication();
+    fetchSimilarOffres();
   }, [id]);
 
   const fetchOffre = async () => {
@@ -55,6 +57,16 @@ const OffreDetail = () => {
     }
   };
 
+  const fetchSimilarOffres = async () => {
+    try {
+      const response = await offreAPI.getSimilarOffres(id);
+      setSimilarOffres(response.data || []);
+    } catch (err) {
+      // Section facultative : pas d'offres similaires en cas d'erreur
+      setSimilarOffres([]);
+    }
+  };
+
   const checkApplication = async () => {
     if (user?.role === 'STAGIAIRE') {
       try {
@@ -327,6 +339,42 @@ const OffreDetail = () => {
         )}
       </Paper>
 
+      {similarOffres.length > 0 && (
+        <Paper elevation={3} sx={{ p: 3, mt: 3 }}>
+          <Typography variant="h6" gutterBottom>
+            Offres similaires
+          </Typography>
+          <Grid container spacing={2}>
+            {similarOffres.map((similar) => (
+              <Grid item xs={12} sm={6} md={4} key={similar.id}>
+                <Paper variant="outlined" sx={{ p: 2, height: '100%' }}>
+                  <Typography
+                    variant="subtitle1"
+                    component={Link}
+                    to={`/offres/${similar.id}`}
+                    sx={{ textDecoration: 'none', color: 'primary.main', fontWeight: 'bold' }}
+                  >
+                    {similar.titre}
+                  </Typography>
+                  <Box display="flex" alignItems="center" gap={0.5} mt={1}>
+                    <Business fontSize="small" color="action" />
+                    <Typography variant="body2" color="text.secondary">
+                      {similar.entreprise?.nom_entreprise}
+                    </Typography>
+                  </Box>
+                  <Box display="flex" alignItems="center" gap={0.5}>
+                    <LocationOn fontSize="small" color="action" />
+                    <Typography variant="body2" color="text.secondary">
+                      {similar.ville}
+                    </Typography>
+                  </Box>
+                </Paper>
+              </Grid>
+            ))}
+          </Grid>
+        </Paper>
+      )}
+
       <Dialog open={dialogOpen} onClose={() => setDialogOpen(false)}>
         <DialogTitle>Postuler à cette offre</DialogTitle>
         <DialogContent>
@@ -30,6 +30,8 @@ const OffresList = () => {
     search: '',
     ville: '',
     domaine: '',
+    competences: '',
+    mode: 'all',
     est_active: user?.role === 'STAGIAIRE' ? 'true' : '',
   });
   const [page, setPage] = useState(1);
@@ -140,6 +142,29 @@ const OffresList = () => {
               ))}
             </TextField>
           </Grid>
+          <Grid item xs={12} md={8}>
+            <TextField
+              fullWidth
+              label="Compétences"
+              placeholder="python, django"
+              variant="outlined"
+              value={filters.competences}
+              onChange={(e) => handleFilterChange('competences', e.target.value)}
+            />
+          </Grid>
+          <Grid item xs={12} md={2}>
+            <TextField
+              fullWidth
+              select
+              label="Correspondance"
+              variant="outlined"
+              value={filters.mode}
+              onChange={(e) => handleFilterChange('mode', e.target.value)}
+            >
+              <MenuItem value="all">Toutes</MenuItem>
+              <MenuItem value="any">Au moins une</MenuItem>
+            </TextField>
+          </Grid>
           {user?.role !== 'STAGIAIRE' && (
             <Grid item xs={12} md={2}>
               <TextField
@@ -1,6 +1,6 @@
 import axios from 'axios';
 
-const API_BASE_URL = 'http://localhost:8000/api';
+export const API_BASE_URL = 'http://localhost:8000/api';
 
 // Créer une instance axios avec configuration par défaut
 const api = axios.create({
@@ -120,7 +120,7 @@ export const authAPI = {
 };
 
 // ===== CV =====
-// Note: Les CV sont gérés via le profil stagiaire
+// Note: Les CV sont lus via le profil stagiaire et déposés via /auth/cv/
 export const cvAPI = {
   getCV: () => {
     // Récupérer le CV via le profil
@@ -133,29 +133,24 @@ export const cvAPI = {
     });
   },
   uploadCV: (formData) => {
-    // Uploader le CV via le profil stagiaire
-    return api.patch('/auth/profile/stagiaire/update/', formData, {
+    // Déposer le CV (champ cv_file) : validé et stocké par le serveur au fil de l'envoi
+    return api.post('/auth/cv/', formData, {
       headers: {
         'Content-Type': 'multipart/form-data',
       },
     });
   },
   updateCV: (formData) => {
-    // Mettre à jour le CV via le profil stagiaire
-    return api.patch('/auth/profile/stagiaire/update/', formData, {
+    // Remplacer le CV : même dépôt, l'ancien fichier est nettoyé côté serveur
+    return api.post('/auth/cv/', formData, {
       headers: {
         'Content-Type': 'multipart/form-data',
       },
     });
   },
   deleteCV: () => {
-    // Supprimer le CV en mettant cv_file à null
-    // Pour supprimer un fichier, on doit envoyer une chaîne vide ou utiliser un champ spécial
-    return api.patch('/auth/profile/stagiaire/update/', { cv_file: null }, {
-      headers: {
-        'Content-Type': 'application/json',
-      },
-    });
+    // Supprimer le CV du stagiaire connecté
+    return api.delete('/auth/cv/');
   },
   viewCV: (stagiaireId = null) => {
     // Récupérer l'URL pour visualiser le CV
@@ -166,16 +161,17 @@ export const cvAPI = {
       responseType: 'blob', // Important pour les fichiers binaires
     });
   },
+  getCVLink: (stagiaireId = null) => {
+    // Lien temporaire vers un CV, utilisable sans en-tête d'authentification
+    const url = stagiaireId
+      ? `/auth/cv/link/${stagiaireId}/`
+      : '/auth/cv/link/';
+    return api.get(url);
+  },
   downloadCV: () => {
-    // Télécharger le CV via le profil
-    return api.get('/auth/profile/').then(response => {
-      const cvUrl = response.data.stagiaire_profile?.cv_file;
-      if (cvUrl) {
-        // Si c'est une URL complète, l'utiliser directement, sinon construire l'URL complète
-        const fullUrl = cvUrl.startsWith('http') ? cvUrl : `http://localhost:8000${cvUrl}`;
-        return api.get(fullUrl, { responseType: 'blob' });
-      }
-      throw new Error('Aucun CV trouvé');
+    // Télécharger le CV via un lien signé
+    return api.get('/auth/cv/link/').then(response => {
+      return api.get(response.data.url, { responseType: 'blob' });
     });
   },
 };
@@ -188,6 +184,7 @@ export const offreAPI = {
   updateOffre: (id, data) => api.put(`/stages/offres/${id}/`, data),
   deleteOffre: (id) => api.delete(`/stages/offres/${id}/`),
   getMyOffres: () => api.get('/stages/offres/my-offres/'),
+  getSimilarOffres: (id, k) => api.get(`/stages/offres/${id}/similaires/`, { params: k ? { k } : {} }),
 };
 
 // ===== CANDIDATURES =====
@@ -200,7 +197,13 @@ export const candidatureAPI = {
   acceptCandidature: (id) => api.post(`/stages/candidatures/${id}/accept/`),
   rejectCandidature: (id) => api.post(`/stages/candidatures/${id}/reject/`),
   getMyCandidatures: () => api.get('/stages/candidatures/my-candidatures/'),
-  getCandidaturesByOffre: (offreId) => api.get(`/stages/candidatures/offre/${offreId}/candidatures/`),
+  // params : { order: 'match' } pour trier par adéquation du profil à l'offre
+  getCandidaturesByOffre: (offreId, params) => api.get(`/stages/candidatures/offre/${offreId}/candidatures/`, { params }),
+  // Archive ZIP des CV des candidats, éventuellement limitée à un statut
+  downloadCVArchive: (offreId, statut = null) => api.get(`/stages/candidatures/offre/${offreId}/cvs/`, {
+    params: statut ? { statut } : {},
+    responseType: 'blob',
+  }),
 };
 
 // ===== NOTIFICATIONS =====
@@ -210,6 +213,17 @@ export const notificationAPI = {
   getUnreadCount: () => api.get('/notifications/unread-count/'),
   markAsRead: (id) => api.post(`/notifications/${id}/mark-as-read/`),
   markAllAsRead: () => api.post('/notifications/mark-all-as-read/'),
+  // data : { ids: [...] } ou { up_to_id: N }
+  markManyAsRead: (data) => api.post('/notifications/mark-as-read/', data),
+  // EventSource ne permet pas d'envoyer d'en-tête Authorization : ticket de courte durée limité au flux
+  getStreamTicket: () => api.post('/notifications/stream/ticket/'),
+  getStreamUrl: (ticket, lastEventId) => {
+    const params = new URLSearchParams({ ticket });
+    if (lastEventId) {
+      params.set('last_event_id', lastEventId);
+    }
+    return `${API_BASE_URL}/notifications/stream/?${params}`;
+  },
 };
 
 export default api;